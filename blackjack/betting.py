@@ -0,0 +1,425 @@
+"""
+Module which implements bet ramps and an optimizer for them.
+
+A bet ramp maps true count bins to a number of betting units. The
+optimizer picks the ramp which maximizes the growth rate of the bankroll
+while keeping the risk of ruin below a ceiling. It works off per-bin
+statistics (see simulation.BinStats) which are cached on disk so that
+evaluating a candidate ramp never requires a new simulation.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from .counting import HI_LO, CountingSystem
+from .policy import BasicStrategy, Policy
+from .rules import Rules
+from .simulation import BinStats, Simulator
+
+
+def cache_key(rules: Rules, system: CountingSystem, policy: Policy) -> str:
+    """Function which returns the key under which the statistics of a rule set,
+    a counting system and a playing strategy are cached.
+
+    Arguments
+    ----------
+    rules: Rule set the statistics were simulated under.
+
+    system: Counting system used to bin the rounds.
+
+    policy: Policy which played the rounds.
+    """
+    return f"{rules.key()}/{system.name}/{policy.name}"
+
+
+class BinStatsCache:
+    """Class which stores per-bin statistics in a JSON file.
+
+    Statistics from successive simulations are merged, so the estimates
+    keep getting better as more rounds are simulated.
+
+    Attributes
+    ----------
+    path: str
+        Path to the JSON file.
+
+    Methods
+    ----------
+    get(key: str) -> Dict[int, BinStats]:
+        Returns the statistics stored under a key.
+
+    update(key: str, stats: Dict[int, BinStats]) -> None:
+        Merges statistics into the ones stored under a key.
+
+    save() -> None:
+        Writes the statistics to the JSON file.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Arguments
+        ----------
+        path: Path to the JSON file. It is created on the first save
+        if it does not exist.
+        """
+        self.path = path
+        self._data: Dict[str, Dict[str, List[float]]] = {}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._data = json.load(f)
+
+    def get(self, key: str) -> Dict[int, BinStats]:
+        """Method which returns the statistics stored under a key.
+
+        Arguments
+        ----------
+        key: Key of the statistics (see cache_key()).
+
+        Returns
+        ----------
+        dict, a mapping between true count bins and their statistics.
+        It is empty when nothing is stored under key.
+        """
+        entry = self._data.get(key, {})
+        return {int(tc_bin): BinStats(*values) for tc_bin, values in entry.items()}
+
+    def update(self, key: str, stats: Dict[int, BinStats]) -> None:
+        """Method which merges statistics into the ones stored under a key.
+
+        Arguments
+        ----------
+        key: Key of the statistics (see cache_key()).
+
+        stats: Mapping between true count bins and their statistics.
+        """
+        merged = self.get(key)
+
+        for tc_bin, bin_stats in stats.items():
+            merged.setdefault(tc_bin, BinStats()).merge(bin_stats)
+
+        self._data[key] = {
+            str(tc_bin): [s.n, s.total, s.total_sq]
+            for tc_bin, s in sorted(merged.items())
+        }
+
+    def save(self) -> None:
+        """Method which writes the statistics to the JSON file."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2)
+
+
+def load_or_simulate(
+    cache: BinStatsCache,
+    rules: Rules = Rules(),
+    system: CountingSystem = HI_LO,
+    n_rounds: int = 1_000_000,
+    seed: int = None,
+    policy: Policy = None,
+) -> Dict[int, BinStats]:
+    """Function which returns the per-bin statistics for a rule set, a
+    counting system and a policy, simulating only the rounds missing from
+    the cache.
+
+    Arguments
+    ----------
+    cache: Cache to read the statistics from and store new ones in.
+
+    rules: Rule set to simulate. Defaults to Rules().
+
+    system: Counting system used to bin the rounds. Defaults to HI_LO.
+
+    n_rounds: Minimum number of rounds the statistics should be based on.
+    Defaults to 1,000,000.
+
+    seed: Seed for the simulation. It is offset by the number of rounds
+    already cached so that new rounds are not repeats. Defaults to None.
+
+    policy: Policy playing the rounds. When None, BasicStrategy is used.
+    Defaults to None.
+
+    Returns
+    ----------
+    dict, a mapping between true count bins and their statistics.
+    """
+    policy = policy if policy is not None else BasicStrategy()
+    key = cache_key(rules, system, policy)
+    stats = cache.get(key)
+    rounds = sum(s.n for s in stats.values())
+
+    if (missing := n_rounds - rounds) > 0:
+        if seed is not None:
+            seed += rounds
+
+        simulator = Simulator(rules=rules, system=system, seed=seed, policy=policy)
+        cache.update(key, simulator.run(missing))
+        cache.save()
+        stats = cache.get(key)
+
+    return stats
+
+
+class BetRamp:
+    """Class to represent a bet ramp.
+
+    Attributes
+    ----------
+    units: dict
+        Mapping between true count bins and the number of units bet in them.
+
+    unit: float
+        Amount of money (in dollars) in a unit.
+
+    Methods
+    ----------
+    units_for(tc_bin: int) -> int:
+        Returns the number of units to bet in a true count bin.
+
+    bet(tc_bin: int) -> float:
+        Returns the amount of money to bet in a true count bin.
+    """
+
+    def __init__(self, units: Dict[int, int], unit: float = 1.0) -> None:
+        """
+        Arguments
+        ----------
+        units: Mapping between true count bins and the number of units bet in them.
+
+        unit: Amount of money in a unit. Defaults to 1.
+
+        Raises
+        ----------
+        ValueError, when units is empty.
+        """
+        if not units:
+            raise ValueError("units must have at least one bin.")
+
+        self.units = dict(sorted(units.items()))
+        self.unit = unit
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(units={self.units}, unit={self.unit})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BetRamp):
+            return NotImplemented
+        return self.units == other.units and self.unit == other.unit
+
+    def units_for(self, tc_bin: int) -> int:
+        """Method which returns the number of units to bet in a true count bin.
+
+        Bins outside the ramp get the units of the nearest bin in it.
+
+        Arguments
+        ----------
+        tc_bin: True count bin.
+        """
+        if (units := self.units.get(tc_bin)) is not None:
+            return units
+
+        bins = list(self.units)
+        return self.units[bins[0] if tc_bin < bins[0] else bins[-1]]
+
+    def bet(self, tc_bin: int) -> float:
+        """Method which returns the amount of money to bet in a true count bin.
+
+        Arguments
+        ----------
+        tc_bin: True count bin.
+        """
+        return self.units_for(tc_bin) * self.unit
+
+
+class RampOptimizer:
+    """Class which finds the bet ramp that maximizes the growth of a bankroll
+    subject to a risk of ruin ceiling.
+
+    With f, m and s being the frequency, the mean and the second moment of
+    the result per unit bet in a bin, a ramp b is evaluated using:
+    - mean per round: mu = sum(f * b * m)
+    - variance per round: var = sum(f * b^2 * s) - mu^2
+    - growth per round: g = mu - sum(f * b^2 * s) / (2 * bankroll)
+    - risk of ruin: exp(-2 * mu * bankroll / var)
+
+    Candidate ramps are:
+    - fractional-Kelly ramps, rounded to whole units, clamped to the allowed
+      spread and made non-decreasing in the count
+    - linear ramps, betting the smallest bet up to a starting bin and then
+      a number of units more per bin, up to a top bet
+
+    Attributes
+    ----------
+    stats: dict
+        Mapping between true count bins and their statistics.
+
+    bankroll: float
+        Bankroll in units.
+
+    min_units: int
+        Smallest bet in units.
+
+    max_units: int
+        Largest bet in units.
+
+    max_ror: float
+        Highest acceptable risk of ruin.
+
+    Methods
+    ----------
+    growth(ramp: BetRamp) -> float:
+        Returns the expected growth of the bankroll per round, in units.
+
+    risk_of_ruin(ramp: BetRamp) -> float:
+        Returns the probability of losing the whole bankroll.
+
+    optimize(unit: float = 1.0, steps: int = 200) -> Optional[BetRamp]:
+        Returns the best ramp, if any satisfies the risk of ruin ceiling.
+    """
+
+    def __init__(
+        self,
+        stats: Dict[int, BinStats],
+        bankroll: float,
+        min_units: int = 1,
+        max_units: int = 8,
+        max_ror: float = 0.05,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        stats: Mapping between true count bins and their statistics.
+
+        bankroll: Bankroll in units.
+
+        min_units: Smallest bet in units. Defaults to 1.
+
+        max_units: Largest bet in units. Defaults to 8.
+
+        max_ror: Highest acceptable risk of ruin. Defaults to 0.05.
+
+        Raises
+        ----------
+        ValueError, when there are no rounds in stats or the spread is invalid.
+        """
+        total = sum(s.n for s in stats.values())
+        if not total:
+            raise ValueError("stats must have at least one round.")
+
+        if not 1 <= min_units <= max_units:
+            raise ValueError("min_units must be between 1 and max_units.")
+
+        self.stats = dict(sorted(stats.items()))
+        self.bankroll = bankroll
+        self.min_units = min_units
+        self.max_units = max_units
+        self.max_ror = max_ror
+
+        # Frequency, mean and second moment of each bin
+        self._moments = {
+            tc_bin: (s.n / total, s.mean, s.variance + s.mean**2)
+            for tc_bin, s in self.stats.items()
+            if s.n
+        }
+
+    def _mean_and_second(self, ramp: BetRamp) -> Tuple[float, float]:
+        """Method which returns the mean and the second moment of the
+        result per round of a ramp.
+        """
+        mean, second = 0.0, 0.0
+
+        for tc_bin, (freq, m, s) in self._moments.items():
+            b = ramp.units_for(tc_bin)
+            mean += freq * b * m
+            second += freq * b * b * s
+
+        return mean, second
+
+    def growth(self, ramp: BetRamp) -> float:
+        """Method which returns the expected growth of the bankroll per round.
+
+        Arguments
+        ----------
+        ramp: Ramp to evaluate.
+        """
+        mean, second = self._mean_and_second(ramp)
+        return mean - second / (2 * self.bankroll)
+
+    def risk_of_ruin(self, ramp: BetRamp) -> float:
+        """Method which returns the probability of losing the whole bankroll.
+
+        Arguments
+        ----------
+        ramp: Ramp to evaluate.
+        """
+        mean, second = self._mean_and_second(ramp)
+        variance = second - mean**2
+
+        if mean <= 0:
+            return 1.0
+
+        if variance <= 0:
+            return 0.0
+
+        return math.exp(-2 * mean * self.bankroll / variance)
+
+    def _kelly_ramp(self, fraction: float, unit: float) -> BetRamp:
+        """Method which creates the ramp betting a fraction of the Kelly bet."""
+        units, floor = {}, self.min_units
+
+        for tc_bin, (_, m, s) in self._moments.items():
+            kelly = fraction * self.bankroll * m / s if m > 0 and s > 0 else 0
+            b = min(max(round(kelly), floor), self.max_units)
+            units[tc_bin] = floor = b
+
+        return BetRamp(units, unit=unit)
+
+    def _linear_ramps(self, unit: float) -> List[BetRamp]:
+        """Method which creates the linear ramps for every starting bin,
+        number of units added per bin and top bet."""
+        bins = list(self._moments)
+        ramps = []
+
+        for start in range(len(bins)):
+            for slope in range(1, self.max_units - self.min_units + 1):
+                for top in range(self.min_units + 1, self.max_units + 1):
+                    units = {
+                        tc_bin: min(self.min_units + slope * max(idx - start, 0), top)
+                        for idx, tc_bin in enumerate(bins)
+                    }
+                    ramps.append(BetRamp(units, unit=unit))
+
+        return ramps
+
+    def optimize(self, unit: float = 1.0, steps: int = 200) -> Optional[BetRamp]:
+        """Method which returns the ramp with the highest growth whose
+        risk of ruin is within the ceiling.
+
+        Arguments
+        ----------
+        unit: Amount of money in a unit. Defaults to 1.
+
+        steps: Number of Kelly fractions between 0 and 1 to try. Defaults to 200.
+
+        Returns
+        ----------
+        BetRamp, the best ramp. None when no ramp satisfies the ceiling,
+        e.g. when the bankroll is too small for the spread.
+        """
+        flat = BetRamp({tc_bin: self.min_units for tc_bin in self._moments}, unit)
+        kelly = [self._kelly_ramp(step / steps, unit) for step in range(1, steps + 1)]
+
+        best: Optional[BetRamp] = None
+        best_growth = -math.inf
+
+        for candidate in [flat] + kelly + self._linear_ramps(unit):
+            if self.risk_of_ruin(candidate) > self.max_ror:
+                continue
+
+            if (g := self.growth(candidate)) > best_growth:
+                best, best_growth = candidate, g
+
+        return best
@@ -0,0 +1,187 @@
+"""
+Module which implements card counting systems and a running count tracker.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Tuple
+
+from .deck import Card
+
+# Order in which pips are listed when defining the tags of a system
+_PIPS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A", "K", "Q", "J")
+
+
+class CountingSystem:
+    """Class to represent a balanced card counting system.
+
+    Attributes
+    ----------
+    name: str
+        Name of the system.
+
+    tags: dict
+        Mapping between the string pip of a card and its tag.
+
+    Methods
+    ----------
+    tag(pip: int) -> int:
+        Returns the tag for the integer position of a card.
+    """
+
+    def __init__(self, name: str, tags: Dict[str, int]) -> None:
+        """
+        Arguments
+        ----------
+        name: Name of the system.
+
+        tags: Mapping between string pips and tags. Pips K, Q and J
+        can be omitted, in which case they get the same tag as 10.
+
+        Raises
+        ----------
+        ValueError, when a pip is missing or the system is not balanced.
+        """
+        tags = {"K": tags.get("10"), "Q": tags.get("10"), "J": tags.get("10"), **tags}
+
+        if missing := [pip for pip in _PIPS if tags.get(pip) is None]:
+            raise ValueError(f"tags are missing for pips: {', '.join(missing)}.")
+
+        if sum(tags[pip] for pip in _PIPS) != 0:
+            raise ValueError("Only balanced counting systems are supported.")
+
+        self.name = name
+        self.tags = {pip: tags[pip] for pip in _PIPS}
+
+        # Indexed by the integer position of a card (see Card)
+        self._by_pip: Tuple[int, ...] = (0, 0) + tuple(self.tags[pip] for pip in _PIPS)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name!r})"
+
+    def tag(self, pip: int) -> int:
+        """Method which returns the tag for a card.
+
+        Arguments
+        ----------
+        pip: Integer position of the card (see Card).
+        """
+        return self._by_pip[pip]
+
+
+HI_LO = CountingSystem(
+    "Hi-Lo",
+    {"2": 1, "3": 1, "4": 1, "5": 1, "6": 1, "7": 0, "8": 0, "9": 0, "10": -1, "A": -1},
+)
+
+HI_OPT_I = CountingSystem(
+    "Hi-Opt I",
+    {"2": 0, "3": 1, "4": 1, "5": 1, "6": 1, "7": 0, "8": 0, "9": 0, "10": -1, "A": 0},
+)
+
+OMEGA_II = CountingSystem(
+    "Omega II",
+    {"2": 1, "3": 1, "4": 2, "5": 2, "6": 2, "7": 1, "8": 0, "9": -1, "10": -2, "A": 0},
+)
+
+ZEN = CountingSystem(
+    "Zen",
+    {"2": 1, "3": 1, "4": 2, "5": 2, "6": 2, "7": 1, "8": 0, "9": 0, "10": -2, "A": -1},
+)
+
+
+class RunningCount:
+    """Class which keeps the running count of a shoe.
+
+    Attributes
+    ----------
+    system: CountingSystem
+        Counting system used to tag cards.
+
+    decks: int
+        Size of the shoe in terms of a 52-card deck.
+
+    running: int
+        Current running count.
+
+    seen: int
+        Number of cards observed since the last reset.
+
+    Methods
+    ----------
+    observe(card: Card) -> None:
+        Updates the count with a card.
+
+    observe_pip(pip: int) -> None:
+        Updates the count with the integer position of a card.
+
+    true_count() -> float:
+        Returns the running count per remaining deck.
+
+    bin(low: int = -5, high: int = 5) -> int:
+        Returns the true count as an integer bin.
+
+    reset() -> None:
+        Resets the count for a fresh shoe.
+    """
+
+    def __init__(self, system: CountingSystem, decks: int = 1) -> None:
+        """
+        Arguments
+        ----------
+        system: Counting system used to tag cards.
+
+        decks: Size of the shoe in terms of a 52-card deck. Defaults to 1.
+        """
+        self.system = system
+        self.decks = decks
+        self.running = 0
+        self.seen = 0
+
+    def observe(self, card: Card) -> None:
+        """Method to update the count with a card.
+
+        Arguments
+        ----------
+        card: Card that has been exposed.
+        """
+        self.running += self.system.tags[card.pip]
+        self.seen += 1
+
+    def observe_pip(self, pip: int) -> None:
+        """Method to update the count with the integer position of a card.
+
+        Arguments
+        ----------
+        pip: Integer position of the card that has been exposed.
+        """
+        self.running += self.system.tag(pip)
+        self.seen += 1
+
+    def true_count(self) -> float:
+        """Method to compute the true count.
+
+        The number of remaining decks is never taken to be less than
+        half a deck so that the true count stays bounded near the cut.
+        """
+        decks_left = max(self.decks - self.seen / 52, 0.5)
+        return self.running / decks_left
+
+    def bin(self, low: int = -5, high: int = 5) -> int:
+        """Method to obtain the true count as an integer bin.
+
+        The true count is floored and clamped to [low, high].
+
+        Arguments
+        ----------
+        low: Lowest bin. Defaults to -5.
+
+        high: Highest bin. Defaults to 5.
+        """
+        return min(max(math.floor(self.true_count()), low), high)
+
+    def reset(self) -> None:
+        """Method to reset the count for a freshly shuffled shoe."""
+        self.running = 0
+        self.seen = 0
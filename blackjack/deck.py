@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import random
-from typing import List
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from .shuffles import ShuffleModel
 
 
 class Card:
@@ -12,8 +15,17 @@ class Card:
     pip: str
         String pip of the card like '2' and 'A'.
 
+    suit: int
+        Integer position of the suit of the card (see suits).
+
+    code: int
+        Integer code of the card, which fits in a single byte.
+
     Methods
     ----------
+    from_code(code: int) -> Card:
+        Class method which creates a Card instance from its code.
+
     value(current_count: int = None) -> int:
         Returns the value of the card for counting.
 
@@ -23,7 +35,10 @@ class Card:
 
     _face_cards = ("A", "K", "Q", "J")
 
-    def __init__(self, pip: int) -> None:
+    # Clubs, diamonds, hearts and spades
+    suits = ("\u2663", "\u2666", "\u2665", "\u2660")
+
+    def __init__(self, pip: int, suit: int = 0) -> None:
         """
         Arguments
         ---------
@@ -33,19 +48,45 @@ class Card:
         Using this allows for easier generation of cards since users
         do not have handle A, K, Q and J separately.
 
+        suit: Integer position of the suit of the card in suits, which are
+        clubs, diamonds, hearts and spades. Defaults to 0.
+
         Raises
         ----------
-        ValueError, when pip is less than 2 or greater than 14.
+        ValueError, when pip is less than 2 or greater than 14,
+        or when suit is not between 0 and 3.
         """
         if not 2 <= pip <= 14:
             raise ValueError("pip can only be between 2 and 14.")
+        if not 0 <= suit <= 3:
+            raise ValueError("suit can only be between 0 and 3.")
         self._pip = pip
+        self.suit = suit
 
     def __str__(self) -> str:
-        return self.pip
+        return f"{self.pip}{self.suits[self.suit]}"
 
     def __repr__(self) -> str:
-        return f"{self.__class__.__name__}(pip={self.pip})"
+        return f"{self.__class__.__name__}(pip={self.pip}, suit={self.suit})"
+
+    @classmethod
+    def from_code(cls, code: int) -> Card:
+        """Class method which creates a Card instance from its code.
+
+        Arguments
+        ----------
+        code: Integer code of the card (see code).
+        """
+        return cls(pip=code & 0xF, suit=code >> 4)
+
+    @property
+    def code(self) -> int:
+        """Integer code of the card, which fits in a single byte.
+
+        The low 4 bits are the integer position of the card and the next
+        2 bits are the suit, so a card of suit 0 has its position as code.
+        """
+        return self.suit << 4 | self._pip
 
     @property
     def pip(self) -> str:
@@ -85,16 +126,25 @@ class Deck:
     multipliers: tuple
         Sizes of the deck supported in terms of a 52-card deck.
 
+    multiplier: int
+        Size of the deck in terms of a 52-card deck.
+
+    rng: random.Random
+        Random number generator used to shuffle the deck.
+
+    shuffle_model: ShuffleModel
+        Model of the shuffle, if any.
+
     Methods
     ----------
     shuffle() -> None:
-        Randomly shuffles the deck.
+        Shuffles the deck.
 
     pick_card() -> Card:
         Picks a card from the top of the deck and returns it.
 
     reset() -> None:
-        Clears the deck.
+        Clears the deck, putting its cards on the discard pile.
 
     __bool__() -> bool:
         Returns True if the deck is not empty.
@@ -105,13 +155,28 @@ class Deck:
 
     multipliers = (1, 2, 4, 6, 8)
 
-    def __init__(self, multiplier: int = 1) -> None:
+    def __init__(
+        self,
+        multiplier: int = 1,
+        rng: random.Random = None,
+        shuffle_model: ShuffleModel = None,
+    ) -> None:
         """
         Arguments
         ----------
         multiplier: Size of the deck in terms of a 52-card deck.
         Defaults to 1.
 
+        rng: Random number generator used to shuffle the deck. Pass a seeded
+        instance for reproducible shuffles. When None, a new unseeded instance
+        is created. Defaults to None.
+
+        shuffle_model: Model of the shuffle (see shuffles.ShuffleModel). When
+        None, shuffles are uniformly random and a cleared deck is refilled with
+        a new one. Otherwise, the deck is only shuffled when it is rebuilt: a
+        cleared deck is refilled with the discard pile, shuffled by the model.
+        Defaults to None.
+
         Raises
         ----------
         ValueError, when multiplier is not a supported value.
@@ -120,9 +185,18 @@ class Deck:
             msg = f"multiplier can only be one of {self.multipliers}"
             raise ValueError(msg)
 
-        self._deck = [Card(card) for card in range(2, 15)] * (4 * multiplier)
+        self.multiplier = multiplier
+        self._deck = [
+            Card(pip, suit) for suit in range(4) for pip in range(2, 15)
+        ] * multiplier
         self._deck_state: List[Card] = []
 
+        # Cards picked from the deck, in the order they were picked
+        self._discards: List[Card] = []
+
+        self.rng = rng if rng is not None else random.Random()
+        self.shuffle_model = shuffle_model
+
     def __bool__(self) -> bool:
         """Returns True if the deck is not empty."""
         return bool(self._deck_state)
@@ -132,20 +206,48 @@ class Deck:
         return len(self._deck_state)
 
     def shuffle(self) -> None:
-        """Method to shuffle the deck."""
-        if not self._deck_state:
-            self._deck_state = list(self._deck)
-        random.shuffle(self._deck_state)
+        """Method to shuffle the deck.
+
+        An empty deck is refilled first: with the discard pile when there is
+        a shuffle model and the pile has all the cards, else with a new deck,
+        which is always shuffled uniformly.
+
+        With a shuffle model, a deck which is not empty is left as it is,
+        since a shoe is only shuffled when it is rebuilt (see reset()).
+        """
+        model = self.shuffle_model
+
+        if self._deck_state:
+            if model is not None:
+                return
+        else:
+            if model is None or len(self._discards) != len(self._deck):
+                self._discards, model = list(self._deck), None
+            self._deck_state, self._discards = self._discards, []
+
+        if model is None:
+            self.rng.shuffle(self._deck_state)
+        else:
+            self._deck_state = model.apply(self._deck_state, self.rng)
 
     def pick_card(self) -> Card:
-        """Method to pick a card from the top of the deck."""
-        deck = self._deck_state or self._deck
-        return deck.pop()
+        """Method to pick a card from the top of the deck.
+
+        If the deck runs out, a full deck is shuffled in first.
+        """
+        if not self._deck_state:
+            self.shuffle()
+        card = self._deck_state.pop()
+        self._discards.append(card)
+        return card
 
     def reset(self) -> None:
         """Method to clear the deck.
 
         Call this method first if, in a reshuffle, you want a full
-        deck instead of just the current cards in it.
+        deck instead of just the current cards in it. The cards left
+        in the deck go under the discard pile, so that a shuffle model
+        gets the whole shoe in the order it was played.
         """
-        self._deck_state.clear()
+        self._discards[:0] = self._deck_state
+        self._deck_state = []
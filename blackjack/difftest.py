@@ -0,0 +1,983 @@
+"""
+Module which implements differential testing of the fast backends against
+the reference object model.
+
+The reference is what a Game computes: _GenericPlayer.count() and is_soft()
+for the player, Dealer.count() for the dealer and Game._winner() for the
+result of the round. A backend computes the same things its own way (e.g.
+the headless functions of simulation) and must agree on every case.
+
+Cases are edge cases (every two-card hand against every two-card hand,
+multi-ace hands, soft 17s, naturals against a dealer's 21) followed by
+seeded random hands. The first divergence is shrunk, by dropping cards
+and replacing them with lower ones while it keeps diverging, and reported
+with a repro.
+
+Backends which compute probabilities or expected values instead of
+single rounds (odds.DealerOdds and indices.ExactEV) are checked against
+estimates from seeded rounds played through Game: the dealer's final count
+for every face-up card, and the expected values of standing, hitting and
+doubling on a few hands. An estimate diverges when it is more than five
+standard errors away from the value of the backend.
+
+Run it from the command line:
+
+    $ python -m blackjack.difftest --cases 1000000 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import math
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from rich.console import Console
+
+from .console import console
+from .deck import Card, Deck
+from .game import Game, _Move
+from .indices import ExactEV
+from .odds import OUTCOMES, UP_CARDS, dealer_odds
+from .player import Player
+from .policy import HandState, Policy
+from .rules import Rules
+from .simulation import ACE, hand_count, hand_state, settle
+
+# Integer positions of the cards, in the order of Card
+_PIPS = tuple(range(2, 15))
+
+_CHECKS = ("player count", "dealer count", "soft", "result")
+
+# Number of standard errors an estimate can be away from a backend
+_SIGMAS = 5.0
+
+
+class Case(NamedTuple):
+    """Class to represent a case: the final hands of a round.
+
+    Attributes
+    ----------
+    player: tuple
+        Integer positions of the cards of the player (see Card).
+
+    dealer: tuple
+        Integer positions of the cards of the dealer.
+
+    natural: bool
+        Indicates whether the round is settled as a natural for the player.
+    """
+
+    player: Tuple[int, ...]
+    dealer: Tuple[int, ...]
+    natural: bool
+
+
+class Backend:
+    """Base class for backends, which compute in batches what the reference
+    object model computes for a case.
+
+    Methods
+    ----------
+    player_counts(hands: Sequence[Tuple[int, ...]]) -> Sequence[int]:
+        Returns the count of every player's hand.
+
+    dealer_counts(hands: Sequence[Tuple[int, ...]]) -> Sequence[int]:
+        Returns the count of every dealer's hand.
+
+    soft(hands: Sequence[Tuple[int, ...]]) -> Sequence[bool]:
+        Returns whether every player's hand is soft.
+
+    results(p_counts: Sequence[int], d_counts: Sequence[int], naturals:
+    Sequence[bool]) -> Sequence[float]:
+        Returns the net result per unit bet of every round.
+    """
+
+    name = "backend"
+
+    def player_counts(self, hands: Sequence[Tuple[int, ...]]) -> Sequence[int]:
+        """Method which returns the count of every player's hand.
+
+        Arguments
+        ----------
+        hands: Integer positions of the cards of each hand.
+        """
+        raise NotImplementedError
+
+    def dealer_counts(self, hands: Sequence[Tuple[int, ...]]) -> Sequence[int]:
+        """Method which returns the count of every dealer's hand.
+
+        Arguments
+        ----------
+        hands: Integer positions of the cards of each hand.
+        """
+        raise NotImplementedError
+
+    def soft(self, hands: Sequence[Tuple[int, ...]]) -> Sequence[bool]:
+        """Method which returns whether every player's hand is soft.
+
+        Arguments
+        ----------
+        hands: Integer positions of the cards of each hand.
+        """
+        raise NotImplementedError
+
+    def results(
+        self,
+        p_counts: Sequence[int],
+        d_counts: Sequence[int],
+        naturals: Sequence[bool],
+    ) -> Sequence[float]:
+        """Method which returns the net result per unit bet of every round.
+
+        Arguments
+        ----------
+        p_counts: Final count of the player in each round.
+
+        d_counts: Final count of the dealer in each round.
+
+        naturals: Indicates whether each round is settled as a natural.
+        """
+        raise NotImplementedError
+
+
+class HeadlessBackend(Backend):
+    """Class which is the backend of headless simulations (see simulation)."""
+
+    name = "headless"
+
+    def player_counts(self, hands: Sequence[Tuple[int, ...]]) -> List[int]:
+        return [hand_count(hand) for hand in hands]
+
+    def dealer_counts(self, hands: Sequence[Tuple[int, ...]]) -> List[int]:
+        return [hand_count(hand, 17) for hand in hands]
+
+    def soft(self, hands: Sequence[Tuple[int, ...]]) -> List[bool]:
+        return [hand_state(hand).soft for hand in hands]
+
+    def results(
+        self,
+        p_counts: Sequence[int],
+        d_counts: Sequence[int],
+        naturals: Sequence[bool],
+    ) -> List[float]:
+        return [settle(*args) for args in zip(p_counts, d_counts, naturals)]
+
+
+class Divergence(NamedTuple):
+    """Class to represent a case on which a backend and the reference disagree.
+
+    Attributes
+    ----------
+    backend: str
+        Name of the backend.
+
+    check: str
+        What was computed: "player count", "dealer count", "soft" or "result".
+
+    case: Case
+        Case on which the divergence was found.
+
+    minimized: Case
+        Smallest case found which still diverges on the same check.
+
+    expected: object
+        Value computed by the reference for the minimized case.
+
+    actual: object
+        Value computed by the backend for the minimized case.
+
+    Methods
+    ----------
+    repro() -> str:
+        Returns code reproducing the reference value of the minimized case.
+    """
+
+    backend: str
+    check: str
+    case: Case
+    minimized: Case
+    expected: object
+    actual: object
+
+    def repro(self) -> str:
+        """Method which returns code reproducing the reference value
+        of the minimized case."""
+        case = self.minimized
+        player = ", ".join(f"Card({pip})" for pip in case.player)
+        dealer = ", ".join(f"Card({pip})" for pip in case.dealer)
+
+        lines = [
+            "from rich.console import Console",
+            "from blackjack.deck import Card",
+            "from blackjack.game import Game",
+            "from blackjack.player import Player",
+            "",
+            "player = Player(name='', bankroll=-1.0)",
+            "game = Game(player, pace=0, console=Console(quiet=True))",
+            f"player.hand, game.dealer.hand = [{player}], [{dealer}]",
+        ]
+
+        if self.check == "result":
+            lines.append("game.current_bet = 1.0")
+            lines.append(f"game._winner(natural={case.natural})")
+
+        call = {
+            "player count": "player.count()",
+            "dealer count": "game.dealer.count()",
+            "soft": "player.is_soft()",
+            "result": "player.bankroll",
+        }[self.check]
+        lines.append(
+            f"print({call})  # reference: {self.expected!r}, {self.backend}: {self.actual!r}"
+        )
+
+        return "\n".join(lines)
+
+
+# Game used to settle the cases with Game._winner(), one per process
+_game: Optional[Game] = None
+
+
+def reference(case: Case) -> Tuple[int, int, bool, float]:
+    """Function which computes a case with the reference object model.
+
+    Arguments
+    ----------
+    case: Case to compute.
+
+    Returns
+    ----------
+    A four-tuple with the count of the player, the count of the dealer,
+    whether the player's hand is soft and the net result per unit bet.
+    """
+    global _game
+
+    if _game is None:
+        _game = Game(Player(name="", bankroll=0.0), pace=0, console=Console(quiet=True))
+
+    player, dealer = _game.player, _game.dealer
+    player.hand = [Card(pip) for pip in case.player]
+    dealer.hand = [Card(pip) for pip in case.dealer]
+
+    # The bet has been deducted when the round is settled
+    player.bankroll, _game.current_bet = -1.0, 1.0
+    _game._winner(natural=case.natural)
+
+    return player.count(), dealer.count(), player.is_soft(), player.bankroll
+
+
+def _compare(backend: Backend, cases: Sequence[Case]) -> Optional[Tuple[int, str]]:
+    """Function which compares a backend with the reference on cases.
+
+    Returns
+    ----------
+    A two-tuple with the index of the first case on which they disagree and
+    the check which disagrees. None when they agree on every case.
+    """
+    if not cases:
+        return None
+
+    expected = list(zip(*(reference(case) for case in cases)))
+    p_counts, d_counts = expected[0], expected[1]
+
+    players = [case.player for case in cases]
+    actual = (
+        backend.player_counts(players),
+        backend.dealer_counts([case.dealer for case in cases]),
+        backend.soft(players),
+        backend.results(p_counts, d_counts, [case.natural for case in cases]),
+    )
+
+    first: Optional[Tuple[int, str]] = None
+
+    for check, exp, act in zip(_CHECKS, expected, actual):
+        for idx, (e, a) in enumerate(zip(exp, act)):
+            if e != a:
+                if first is None or idx < first[0]:
+                    first = idx, check
+                break
+
+    return first
+
+
+def _diverges(backend: Backend, case: Case, check: str) -> Optional[Tuple]:
+    """Function which returns the reference and backend values of a check
+    on a case when they disagree, and None otherwise."""
+    expected = dict(zip(_CHECKS, reference(case)))
+
+    if check == "player count":
+        actual = backend.player_counts([case.player])[0]
+    elif check == "dealer count":
+        actual = backend.dealer_counts([case.dealer])[0]
+    elif check == "soft":
+        actual = backend.soft([case.player])[0]
+    else:
+        actual = backend.results(
+            [expected["player count"]], [expected["dealer count"]], [case.natural]
+        )[0]
+
+    if expected[check] != actual:
+        return expected[check], actual
+    return None
+
+
+def _simpler(case: Case) -> Iterator[Case]:
+    """Function which generates simpler versions of a case: with a card less,
+    with a card replaced by a lower one, or without a natural."""
+    for field in ("player", "dealer"):
+        hand = getattr(case, field)
+
+        for idx in range(len(hand)):
+            if len(hand) > 1:
+                yield case._replace(**{field: hand[:idx] + hand[idx + 1 :]})
+
+        for idx, pip in enumerate(hand):
+            # Faces become a 10, other cards go one pip lower
+            lower = 10 if pip > ACE else pip - 1 if 2 < pip <= 10 else None
+            if lower is not None:
+                yield case._replace(**{field: hand[:idx] + (lower,) + hand[idx + 1 :]})
+
+    if case.natural:
+        yield case._replace(natural=False)
+
+
+def minimize(backend: Backend, case: Case, check: str) -> Case:
+    """Function which shrinks a case while a check keeps diverging on it.
+
+    Arguments
+    ----------
+    backend: Backend disagreeing with the reference.
+
+    case: Case on which they disagree.
+
+    check: Check which disagrees.
+
+    Returns
+    ----------
+    Case, a case on which the check diverges and which has no simpler
+    version (see _simpler()) on which it diverges.
+    """
+    shrunk = True
+
+    while shrunk:
+        shrunk = False
+        for candidate in _simpler(case):
+            if _diverges(backend, candidate, check) is not None:
+                case, shrunk = candidate, True
+                break
+
+    return case
+
+
+def _hard(hand: Tuple[int, ...]) -> int:
+    """Function which returns the count of a hand with every ace counted as 1."""
+    return sum(1 if pip == ACE else min(pip, 10) for pip in hand)
+
+
+def edge_cases() -> Iterator[Case]:
+    """Function which generates the edge cases.
+
+    These are every two-card hand against every two-card hand, hands with
+    up to six aces, soft 17s against each other, and two-card 21s settled
+    as naturals against every way the dealer makes 21 with up to three cards.
+    """
+    pairs = list(itertools.combinations_with_replacement(_PIPS, 2))
+
+    for player, dealer in itertools.product(pairs, repeat=2):
+        yield Case(player, dealer, natural=_hard(player) == 11 and ACE in player)
+
+    for aces, rest in itertools.product(range(1, 7), pairs + [(p,) for p in _PIPS]):
+        hand = (ACE,) * aces + rest
+        yield Case(hand, hand[::-1], natural=False)
+
+    soft_17s = [(ACE, 6), (ACE, ACE, 5), (ACE, 2, 4), (ACE, 3, 3), (ACE, ACE, ACE, 4)]
+    for player, dealer in itertools.product(soft_17s, repeat=2):
+        yield Case(player, dealer, natural=False)
+
+    twenty_ones = [
+        hand
+        for n in (2, 3)
+        for hand in itertools.combinations_with_replacement(_PIPS, n)
+        if _hard(hand) == 21 or (ACE in hand and _hard(hand) == 11)
+    ]
+    for ten in (10, 12, 13, 14):
+        for dealer in twenty_ones:
+            yield Case((ACE, ten), dealer, natural=True)
+
+
+def random_cases(n: int, seed: int) -> List[Case]:
+    """Function which generates seeded random cases.
+
+    Hands have 1 to 8 cards. In a fifth of the cases, every card is
+    an ace with a probability of one half.
+
+    Arguments
+    ----------
+    n: Number of cases.
+
+    seed: Seed for the random number generator.
+    """
+    rng = random.Random(seed)
+    cases = []
+
+    for _ in range(n):
+        aces = rng.random() < 0.2
+
+        def hand() -> Tuple[int, ...]:
+            size = min(rng.randint(1, 4) + rng.randint(0, 4), 8)
+            return tuple(
+                ACE if aces and rng.random() < 0.5 else rng.choice(_PIPS)
+                for _ in range(size)
+            )
+
+        player = hand()
+        natural = len(player) == 2 and rng.random() < 0.5
+        cases.append(Case(player, hand(), natural))
+
+    return cases
+
+
+def _check_batch(
+    backends: Sequence[Backend], cases: Sequence[Case]
+) -> Optional[Divergence]:
+    """Function which compares backends with the reference on a batch of cases
+    and returns the first divergence, minimized."""
+    first: Optional[Tuple[int, Backend, str]] = None
+
+    for backend in backends:
+        if (found := _compare(backend, cases)) is not None:
+            if first is None or found[0] < first[0]:
+                first = found[0], backend, found[1]
+
+    if first is None:
+        return None
+
+    idx, backend, check = first
+    case = cases[idx]
+    minimized = minimize(backend, case, check)
+    expected, actual = _diverges(backend, minimized, check)
+
+    return Divergence(backend.name, check, case, minimized, expected, actual)
+
+
+def _check_random_batch(
+    backends: Sequence[Backend], n: int, seed: int
+) -> Optional[Divergence]:
+    """Function which checks a batch of random cases in a worker process."""
+    return _check_batch(backends, random_cases(n, seed))
+
+
+class Estimate(NamedTuple):
+    """Class to represent a probability or an expected value computed by a
+    backend, along with its estimate from rounds played through Game.
+
+    Attributes
+    ----------
+    backend: str
+        Name of the backend.
+
+    check: str
+        What is estimated, e.g. "P(22) | up 6".
+
+    expected: float
+        Value computed by the backend.
+
+    observed: float
+        Value estimated from the rounds.
+
+    stderr: float
+        Standard error of the estimate.
+
+    rounds: int
+        Number of rounds the estimate is made from.
+    """
+
+    backend: str
+    check: str
+    expected: float
+    observed: float
+    stderr: float
+    rounds: int
+
+    @property
+    def diverges(self) -> bool:
+        """True when the estimate is more than _SIGMAS standard errors away
+        from the value of the backend, give or take a few rounds."""
+        slack = _SIGMAS * self.stderr + 3 / self.rounds
+        return abs(self.observed - self.expected) > slack
+
+
+class SampledBackend:
+    """Base class for backends which compute probabilities or expected values,
+    checked against estimates from rounds played through Game.
+
+    Methods
+    ----------
+    estimates(rounds: int, seed: int) -> List[Estimate]:
+        Returns the values of the backend along with their estimates.
+    """
+
+    name = "sampled backend"
+
+    def estimates(self, rounds: int, seed: int) -> List[Estimate]:
+        """Method which returns the values of the backend along with their
+        estimates from rounds played through Game.
+
+        Arguments
+        ----------
+        rounds: Number of rounds each value is estimated from.
+
+        seed: Seed for the random number generator of the rounds.
+        """
+        raise NotImplementedError
+
+
+def _quiet_game(policy: Policy = None) -> Game:
+    """Function which creates a game which prints nothing and never pauses."""
+    return Game(
+        Player(name="", bankroll=1e9),
+        pace=0,
+        console=Console(quiet=True),
+        policy=policy,
+    )
+
+
+class DealerOddsBackend(SampledBackend):
+    """Class which checks odds.DealerOdds against the dealer's turns of Game.
+
+    The dealer gets the face-up card and a face-down card from a full shoe
+    without it and plays with Game._dealers_turn(), as the table assumes.
+
+    Attributes
+    ----------
+    rules: Rules
+        Rules the dealer plays under. Only the number of decks can change,
+        since Game's dealer always stands on 17 with an ace limit of 17.
+    """
+
+    name = "dealer odds"
+
+    def __init__(self, decks: int = 1) -> None:
+        """
+        Arguments
+        ----------
+        decks: Size of the shoe in terms of a 52-card deck. Defaults to 1.
+        """
+        self.rules = Rules(decks=decks)
+
+    @staticmethod
+    def _final(game: Game, up: int) -> str:
+        """Method which plays the dealer's turn with a face-up card and
+        returns the outcome (see odds.OUTCOMES)."""
+        deck, dealer = game.deck, game.dealer
+
+        # A cleared deck is refilled with a new shoe, shuffled uniformly
+        deck.reset()
+        deck.shuffle()
+
+        cards = deck._deck_state
+        face_up = cards.pop(next(i for i, c in enumerate(cards) if c.value() == up))
+        # The cards after the first one of a value are more likely to have
+        # the same value, so the shoe is shuffled again without it
+        deck.rng.shuffle(cards)
+
+        dealer.clear_hand()
+        dealer.add_card_to_hand(face_up)
+        dealer.add_card_to_hand(deck.pick_card())
+        game._dealers_turn(natural=False)
+
+        count = dealer.count()
+        return "blackjack" if count == 21 and len(dealer.hand) == 2 else str(count)
+
+    def estimates(self, rounds: int, seed: int) -> List[Estimate]:
+        odds, rules = dealer_odds(), self.rules
+
+        game = _quiet_game()
+        game.deck = Deck(multiplier=rules.decks, rng=random.Random(seed))
+
+        estimates = []
+        for up in UP_CARDS:
+            tallies = Counter(self._final(game, up) for _ in range(rounds))
+
+            # Counts the table has no outcome for are reported with p = 0
+            probabilities = dict(zip(OUTCOMES, odds.probabilities(rules, up)))
+            for outcome in set(tallies) - set(probabilities):
+                probabilities[outcome] = 0
+
+            for outcome, p in probabilities.items():
+                p = float(p)
+                estimates.append(
+                    Estimate(
+                        self.name,
+                        f"P({outcome}) | up {up}",
+                        p,
+                        tallies[outcome] / rounds,
+                        math.sqrt(p * (1 - p) / rounds),
+                        rounds,
+                    )
+                )
+
+        return estimates
+
+
+class _InfiniteDeck(Deck):
+    """Class which is a deck dealing forced cards first and then drawing
+    with replacement from a full shoe, which is the shoe ExactEV assumes."""
+
+    def __init__(self, rng: random.Random) -> None:
+        super().__init__(rng=rng)
+        self.forced: List[Card] = []
+
+    def __bool__(self) -> bool:
+        return True
+
+    def shuffle(self) -> None:
+        pass
+
+    def pick_card(self) -> Card:
+        if self.forced:
+            return self.forced.pop(0)
+        return self.rng.choice(self._deck)
+
+
+class _ProbePolicy(Policy):
+    """Class which makes a given first move and then continues like ExactEV
+    does: it hits while hitting has a higher expected value than standing."""
+
+    name = "probe"
+
+    def __init__(self, ev: ExactEV, first: _Move) -> None:
+        """
+        Arguments
+        ----------
+        ev: Expected values of the moves.
+
+        first: First move of every round.
+        """
+        super().__init__(unit=1.0)
+        self.ev = ev
+        self.first = first
+        self._first_pending = False
+
+    def bet(self, bankroll: float, true_count: Optional[float] = None) -> float:
+        self._first_pending = True
+        return super().bet(bankroll, true_count=true_count)
+
+    def decide(
+        self, hand: HandState, dealer_up: int, true_count: Optional[float] = None
+    ) -> _Move:
+        if self._first_pending:
+            self._first_pending = False
+            return self.first
+
+        evs = self.ev.moves((hand.total, hand.soft, dealer_up, False))
+        return _Move.HIT if evs[_Move.HIT] > evs[_Move.STAND] else _Move.STAND
+
+
+class ExactEVBackend(SampledBackend):
+    """Class which checks indices.ExactEV, for the composition of a full shoe,
+    against rounds played through Game.
+
+    The player is dealt a hand and the dealer a face-up card, and the round
+    is played from there by Game.play() with a move under test, followed by
+    the best moves of ExactEV. Cards are drawn with replacement, as ExactEV
+    assumes.
+
+    Attributes
+    ----------
+    hands: tuple
+        Hands checked, as two-tuples with the total and whether it is soft.
+
+    ups: tuple
+        Values of the dealer's face-up cards checked, with an ace being 11.
+    """
+
+    name = "exact EV"
+
+    def __init__(
+        self,
+        hands: Sequence[Tuple[int, bool]] = (
+            (8, False),
+            (12, False),
+            (16, False),
+            (13, True),
+            (18, True),
+        ),
+        ups: Sequence[int] = (2, 6, 10, ACE),
+    ) -> None:
+        """
+        Arguments
+        ----------
+        hands: Hands checked, as two-tuples with the total and whether it
+        is soft. Defaults to hard 8, 12 and 16 and soft 13 and 18.
+
+        ups: Values of the dealer's face-up cards checked, with an ace being
+        11. Defaults to 2, 6, 10 and an ace.
+        """
+        self.hands = tuple(hands)
+        self.ups = tuple(ups)
+
+    @staticmethod
+    def _cards(total: int, soft: bool) -> Tuple[Card, Card]:
+        """Method which returns two cards making a hand."""
+        if soft:
+            return Card(ACE), Card(total - 11 if total > 12 else ACE)
+        first = min(10, total - 2)
+        return Card(first), Card(total - first)
+
+    def estimates(self, rounds: int, seed: int) -> List[Estimate]:
+        # Number of cards of each value in a deck, tens including faces
+        counts = [4.0] * len(UP_CARDS)
+        counts[10 - 2] *= 4
+        ev = ExactEV(Rules(), counts)
+
+        rng = random.Random(seed)
+        estimates = []
+
+        for (total, soft), up in itertools.product(self.hands, self.ups):
+            expected = ev.moves((total, soft, up, True))
+            first, second = self._cards(total, soft)
+
+            for move, value in expected.items():
+                game = _quiet_game(policy=_ProbePolicy(ev, move))
+                deck = game.deck = _InfiniteDeck(rng)
+                player = game.player
+
+                results = []
+                for _ in range(rounds):
+                    # Dealt in the order of Game._deal_initial_cards()
+                    deck.forced = [first, Card(up), second]
+                    bankroll = player.bankroll
+                    game.play()
+                    results.append(float(player.bankroll - bankroll))
+                    game.reset()
+
+                mean = sum(results) / rounds
+                variance = sum((r - mean) ** 2 for r in results) / (rounds - 1)
+                estimates.append(
+                    Estimate(
+                        self.name,
+                        f"EV of {move.value} on {'soft' if soft else 'hard'} "
+                        f"{total} | up {up}",
+                        value,
+                        mean,
+                        math.sqrt(variance / rounds),
+                        rounds,
+                    )
+                )
+
+        return estimates
+
+
+def _estimate(backend: SampledBackend, rounds: int, seed: int) -> List[Estimate]:
+    """Function which makes the estimates of a backend in a worker process."""
+    return backend.estimates(rounds, seed)
+
+
+class DiffTest:
+    """Class which compares backends with the reference object model.
+
+    Attributes
+    ----------
+    backends: list
+        Backends being tested on cases.
+
+    sampled: list
+        Backends being tested on estimates (see SampledBackend).
+
+    seed: int
+        Seed from which the seeds of the batches of random cases are derived.
+
+    batch_size: int
+        Number of cases compared at once.
+
+    Methods
+    ----------
+    run(n_random: int = 1_000_000, workers: int = 1) -> Optional[Divergence]:
+        Runs the edge cases and random cases and returns the first divergence.
+
+    estimate(rounds: int = 10_000, workers: int = 1) -> List[Estimate]:
+        Checks the sampled backends and returns their estimates.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[Backend] = None,
+        sampled: Sequence[SampledBackend] = None,
+        seed: int = 0,
+        batch_size: int = 10_000,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        backends: Backends to test on cases. Defaults to every built-in one.
+
+        sampled: Backends to test on estimates. Defaults to every built-in one.
+
+        seed: Seed from which the seeds of the batches of random cases are
+        derived. Defaults to 0.
+
+        batch_size: Number of cases compared at once. Defaults to 10,000.
+        """
+        self.backends = list(backends) if backends is not None else [HeadlessBackend()]
+        self.sampled = (
+            list(sampled)
+            if sampled is not None
+            else [DealerOddsBackend(), ExactEVBackend()]
+        )
+        self.seed = seed
+        self.batch_size = batch_size
+        self.checked = 0
+
+    def run(self, n_random: int = 1_000_000, workers: int = 1) -> Optional[Divergence]:
+        """Method which runs the edge cases and then random cases.
+
+        Arguments
+        ----------
+        n_random: Number of random cases. Defaults to 1,000,000.
+
+        workers: Number of processes to check the random cases in.
+        Defaults to 1, in which case they are checked in the current process.
+
+        Returns
+        ----------
+        Divergence, the first divergence found, in the order the cases are
+        generated. None when every backend agrees with the reference.
+        """
+        self.checked = 0
+
+        edges = iter(edge_cases())
+        while batch := list(itertools.islice(edges, self.batch_size)):
+            if (divergence := _check_batch(self.backends, batch)) is not None:
+                return divergence
+            self.checked += len(batch)
+
+        size = self.batch_size
+        batches = [
+            (min(size, n_random - start), self.seed * 1_000_003 + idx)
+            for idx, start in enumerate(range(0, n_random, size))
+        ]
+
+        if workers <= 1:
+            for n, seed in batches:
+                if (
+                    divergence := _check_random_batch(self.backends, n, seed)
+                ) is not None:
+                    return divergence
+                self.checked += n
+            return None
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_check_random_batch, self.backends, n, seed)
+                for n, seed in batches
+            ]
+            for (n, _), future in zip(batches, futures):
+                if (divergence := future.result()) is not None:
+                    for pending in futures:
+                        pending.cancel()
+                    return divergence
+                self.checked += n
+
+        return None
+
+    def estimate(self, rounds: int = 10_000, workers: int = 1) -> List[Estimate]:
+        """Method which checks the sampled backends against rounds played
+        through Game.
+
+        Arguments
+        ----------
+        rounds: Number of rounds each value is estimated from.
+        Defaults to 10,000.
+
+        workers: Number of processes to check the backends in.
+        Defaults to 1, in which case they are checked in the current process.
+
+        Returns
+        ----------
+        list, the estimates of every backend. Those diverging from their
+        backend have diverges set.
+        """
+        seeds = [self.seed * 1_000_003 + idx for idx in range(len(self.sampled))]
+
+        if workers <= 1:
+            results = map(_estimate, self.sampled, [rounds] * len(seeds), seeds)
+            return [e for estimates in results for e in estimates]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_estimate, backend, rounds, seed)
+                for backend, seed in zip(self.sampled, seeds)
+            ]
+            return [e for future in futures for e in future.result()]
+
+
+def _report_estimates(test: DiffTest, estimates: List[Estimate]) -> None:
+    """Function which prints the estimates diverging from their backends,
+    exiting with an error when there are any."""
+    names = ", ".join(backend.name for backend in test.sampled)
+
+    if not (diverging := [e for e in estimates if e.diverges]):
+        console.print(
+            f"[green]No divergence in {len(estimates):,} estimates ({names}).[/green]"
+        )
+        return
+
+    console.print(
+        f"[bold red]{len(diverging)} of {len(estimates):,} estimates diverge "
+        f"({names}).[/bold red]"
+    )
+    for e in diverging:
+        console.print(
+            f"{e.backend}: {e.check}: expected {e.expected:.4f}, "
+            f"observed {e.observed:.4f} ± {e.stderr:.4f}"
+        )
+    raise SystemExit(1)
+
+
+def main() -> None:
+    """Function which runs the differential test from the command line."""
+    parser = argparse.ArgumentParser(description="Test the fast backends.")
+    parser.add_argument("--cases", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=10_000,
+        help="rounds each estimate of the sampled backends is made from "
+        "(0 skips them)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    test = DiffTest(seed=args.seed)
+    divergence = test.run(n_random=args.cases, workers=args.workers)
+    names = ", ".join(backend.name for backend in test.backends)
+
+    if divergence is None:
+        console.print(
+            f"[green]No divergence in {test.checked:,} cases ({names}).[/green]"
+        )
+
+        if args.rounds > 0:
+            estimates = test.estimate(rounds=args.rounds, workers=args.workers)
+            _report_estimates(test, estimates)
+        return
+
+    console.print(
+        f"[bold red]{divergence.backend} diverges on the {divergence.check} "
+        f"after {test.checked:,} cases.[/bold red]"
+    )
+    console.print(f"Case: {divergence.case}")
+    console.print(f"Minimized: {divergence.minimized}")
+    console.print(divergence.repro(), markup=False, highlight=False)
+    raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
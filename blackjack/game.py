@@ -1,24 +1,36 @@
 from __future__ import annotations
 
+import random
 import time
+from decimal import Decimal
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
+from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import FloatPrompt, Prompt
 from rich.table import Table
 
 from .console import console
 from .deck import Card, Deck
+from .live import LiveView
+from .money import to_dollars
 from .player import Dealer, Player, PlayerType
 
+if TYPE_CHECKING:
+    from .policy import Policy
+    from .shuffles import ShuffleModel
+    from .sidebets import SideBet
 
-def _print_centered(msg: str) -> None:
+
+def _print_centered(msg: str, console: Console = console) -> None:
     """Prints a message to the console with center justification.
 
     Arguments
     ----------
     msg: Message to be printed.
+
+    console: Console to print to. Defaults to the global console.
     """
     console.print(msg, justify="center")
 
@@ -60,6 +72,10 @@ class _StatePanel:
     make_state_panel(bet: float) -> Panel:
         Creates and returns the Panel object representing the
         current state of the game.
+
+    make_live_panel(bet: float) -> Panel:
+        Creates and returns the Panel object used by the live view,
+        which has one row per hand.
     """
 
     tf = "[green]{}[/green]"
@@ -131,10 +147,7 @@ class _StatePanel:
         for _ in range(6):
             grid.add_column()
 
-        dealer_hand = (
-            [str(self.dealer.face_up), "_"] if self.dealer.has_face_down else None
-        )
-        dealer_count = "N/A" if self.dealer.has_face_down else self.dealer.count()
+        dealer_hand, dealer_count = self._dealer_state()
 
         grid.add_row(
             self._hand(player=self.player, title="Your Hand"),
@@ -146,6 +159,62 @@ class _StatePanel:
         )
         return Panel(grid)
 
+    def make_live_panel(self, bet: float) -> Panel:
+        """Method to create the Panel object used by the live view.
+
+        Every hand gets its own row so that the layout of the panel does not
+        change as cards are dealt, which lets the live view redraw only the
+        rows that changed. The bet and bankroll are shown in the subtitle.
+
+        Arguments
+        ----------
+        bet: Amount of money currently bet.
+
+        Returns
+        ----------
+        Panel, the created Panel object.
+        """
+        table = Table(expand=True, box=None)
+
+        for title in ("Hand", "Cards", "Count"):
+            table.add_column(self.tf.format(title), ratio=1)
+
+        dealer_hand, dealer_count = self._dealer_state()
+        if dealer_hand is None:
+            dealer_hand = (str(card) for card in self.dealer.hand)
+
+        player_hand = (str(card) for card in self.player.hand)
+        table.add_row(
+            self.player.name,
+            self.df.format(", ".join(player_hand)),
+            self.df.format(self.player.count()),
+        )
+        table.add_row(
+            "Dealer",
+            self.df.format(", ".join(dealer_hand)),
+            self.df.format(dealer_count),
+        )
+
+        subtitle = (
+            f"{self.tf.format('Bet')} {self.df.format(f'${bet}')}  "
+            f"{self.tf.format('Bankroll')} {self.df.format(f'${self.player.bankroll}')}"
+        )
+        return Panel(table, subtitle=subtitle)
+
+    def _dealer_state(self) -> Tuple[Optional[List[str]], Union[int, str]]:
+        """Method to obtain the dealer's hand and count as they should be shown.
+
+        Returns
+        ----------
+        A two-tuple with:
+        - list, the hand with the face-down card hidden. None when there is
+          no face-down card, in which case the whole hand can be shown.
+        - int or str, the count. It is "N/A" when there is a face-down card.
+        """
+        if self.dealer.has_face_down:
+            return [str(self.dealer.face_up), "_"], "N/A"
+        return None, self.dealer.count()
+
 
 class _Move(Enum):
     """Enumeration to represent moves that a player can make.
@@ -199,7 +268,7 @@ class _Move(Enum):
         return f"{moves}\n{prompt}", choices
 
 
-def _get_move(double: bool = False) -> _Move:
+def _get_move(double: bool = False, console: Console = console) -> _Move:
     """Function which asks the user to select a move.
 
     Arguments
@@ -207,12 +276,14 @@ def _get_move(double: bool = False) -> _Move:
         double: Indicates whether the "Double" move should be included or not.
         Defaults to False.
 
+        console: Console to prompt on. Defaults to the global console.
+
     Returns
     ----------
     _Move, the selected move.
     """
     prompt, choices = _Move.make_prompt(double=double)
-    choice = Prompt.ask(prompt, choices=choices.keys())
+    choice = Prompt.ask(prompt, choices=choices.keys(), console=console)
     return choices[choice]
 
 
@@ -231,8 +302,30 @@ class Game:
     player: Player
         Player playing the game.
 
-    current_bet: float
-        Amount of money currently bet. Defaults to 0.
+    current_bet: Decimal
+        Amount of money currently bet, exact to the cent. Amounts assigned
+        to it are rounded to the cent. Defaults to 0.
+
+    decisions: list
+        Decisions made by the player in the current round: the bet
+        followed by the moves, in the order they were made.
+
+    pace: float
+        Number of seconds the game pauses between steps.
+
+    console: Console
+        Console the game is printed on.
+
+    policy: Policy or None
+        Policy making the decisions of the player. None when the
+        player is asked for them.
+
+    side_bets: dict
+        Mapping between the side bets placed every round and their amounts.
+
+    view: LiveView or None
+        Live view the game is drawn on. None when the game prints
+        a new state panel every time the state changes.
 
     Methods
     ----------
@@ -244,13 +337,51 @@ class Game:
         and the dealer's hands and setting the bet back to 0.
     """
 
-    def __init__(self, player: Player) -> None:
+    def __init__(
+        self,
+        player: Player,
+        live: bool = False,
+        max_fps: float = 4.0,
+        pace: float = 1.0,
+        console: Console = console,
+        seed: int = None,
+        policy: Policy = None,
+        side_bets: Dict[SideBet, float] = None,
+        shuffle_model: ShuffleModel = None,
+    ) -> None:
         """
         Arguments
         ----------
         player: Player instance for this game.
+
+        live: Indicates whether the game should be drawn in-place using a live
+        view instead of printing a new panel every time the state changes.
+        It is ignored when the console is not attached to a terminal.
+        Defaults to False.
+
+        max_fps: Maximum number of redraws per second of the live view.
+        Defaults to 4.
+
+        pace: Number of seconds the game pauses between steps. Set it to 0 to
+        run rounds as fast as possible. Defaults to 1.
+
+        console: Console the game is printed on. Nothing is rendered when it
+        is quiet. Defaults to the global console.
+
+        seed: Seed for the random number generator of the deck. Defaults to None.
+
+        policy: Policy making the bets and moves of the player instead of
+        asking for them. Defaults to None.
+
+        side_bets: Mapping between side bets (see sidebets.SideBet) and the
+        amount placed on each of them every round, on top of the bet.
+        Defaults to None.
+
+        shuffle_model: Model of the shuffle of the deck (see Deck). When None,
+        the deck is shuffled uniformly every round. Otherwise, it is only
+        shuffled by the model when it runs out and is rebuilt. Defaults to None.
         """
-        self.deck = Deck()
+        self.deck = Deck(rng=random.Random(seed), shuffle_model=shuffle_model)
 
         self.dealer = Dealer()
 
@@ -258,79 +389,223 @@ class Game:
 
         self.current_bet = 0.0
 
+        self.decisions: List[Union[float, _Move]] = []
+
+        self.pace = pace
+
+        self.console = console
+
+        self.policy = policy
+
+        self.side_bets = {
+            side_bet: to_dollars(amount)
+            for side_bet, amount in (side_bets or {}).items()
+        }
+        self._placed_side_bets: Dict[SideBet, Decimal] = {}
+
         self._panel = _StatePanel(player=player, dealer=self.dealer)
 
+        self.view: Optional[LiveView] = None
+        if live and console.is_terminal and not console.quiet:
+            self.view = LiveView(console=console, max_fps=max_fps)
+
     def play(self) -> None:
         """Run one round of BlackJack."""
+        self.player.rounds += 1
         self._ask_bet()
+        self._place_side_bets()
 
         if not self.deck:
             self.deck.reset()
 
-        _print_centered("[red]Shuffling deck...[/red]")
+        self._say("[red]Shuffling deck...[/red]")
         self.deck.shuffle()
 
-        _print_centered("[red]Dealing initial cards...[/red]")
+        self._say("[red]Dealing initial cards...[/red]")
         self._deal_initial_cards()
 
-        time.sleep(1)
+        self._pause()
         self._show_state()
 
+        self._settle_side_bets()
+
         # Check if player has 21 on first two cards
         if (natural := self.player.has_blackjack()) is True:
-            _print_centered("[blink bold red]BLACKJACK![/blink bold red]")
+            self._say("[blink bold red]BLACKJACK![/blink bold red]")
         else:
-            time.sleep(1)
-            _print_centered(f"[red]It's your turn, {self.player.name}.[/red]")
+            self._pause()
+            self._say(f"[red]It's your turn, {self.player.name}.[/red]")
 
             self._players_turn()
 
-        time.sleep(1)
+        self._pause()
 
-        _print_centered("[red]It's the dealer's turn.[/red]")
+        self._say("[red]It's the dealer's turn.[/red]")
 
-        time.sleep(1)
+        self._pause()
 
         self._dealers_turn(natural=natural)
 
-        time.sleep(1)
+        self._pause()
 
-        _print_centered("[red]Determining winner....[/red]")
+        self._say("[red]Determining winner....[/red]")
 
-        time.sleep(1)
+        self._pause()
 
         self._winner(natural=natural)
 
+    @property
+    def current_bet(self) -> Decimal:
+        """Amount of money currently bet."""
+        return self._current_bet
+
+    @current_bet.setter
+    def current_bet(self, amount: Union[float, Decimal]) -> None:
+        self._current_bet = to_dollars(amount)
+
     def reset(self) -> None:
         self.player.clear_hand()
         self.dealer.clear_hand()
         self.current_bet = 0
+        self.decisions = []
 
     ####################################
     ## UTILITY METHODS USED BY play() ##
     ####################################
 
+    def _pause(self) -> None:
+        """Method which pauses the game between steps."""
+        if self.pace > 0:
+            time.sleep(self.pace)
+
+    def _say(self, msg: str, center: bool = True) -> None:
+        """Method which shows a message to the player.
+
+        In live mode, the message is added to the history ticker of the view.
+
+        Arguments
+        ----------
+        msg: Message to be shown.
+
+        center: Indicates whether the message should be printed with
+        center justification. Defaults to True.
+        """
+        if self.console.quiet:
+            return
+
+        if self.view is not None:
+            self.view.log(msg)
+        elif center is True:
+            _print_centered(msg, console=self.console)
+        else:
+            self.console.print(msg)
+
     def _show_state(self) -> None:
         """Method which displays the current state of the game."""
+        if self.console.quiet:
+            return
+
+        if self.view is not None:
+            self.view.update(self._panel.make_live_panel(bet=self.current_bet))
+            return
+
         panel = self._panel.make_state_panel(bet=self.current_bet)
-        console.print(panel)
+        self.console.print(panel)
+
+    def _ask_move(self, double: bool = False) -> _Move:
+        """Method which asks the player to select a move.
+
+        Arguments
+        ----------
+        double: Indicates whether the "Double" move should be included or not.
+        Defaults to False.
+        """
+        if self.policy is not None:
+            return self.policy.move(self.player, self.dealer, double=double)
+
+        if self.view is not None:
+            self.view.prompt()
+        return _get_move(double=double, console=self.console)
+
+    def _next_move(self, double: bool = False) -> _Move:
+        """Method which obtains the next move of the player and records it.
+
+        Arguments
+        ----------
+        double: Indicates whether the "Double" move is allowed or not.
+        Defaults to False.
+        """
+        move = self._ask_move(double=double)
+        self.decisions.append(move)
+        return move
 
     def _ask_bet(self) -> None:
         """Method which asks the bet amount for the current round."""
+        if self.policy is not None:
+            self._place_bet(self.policy.bet(bankroll=self.player.bankroll))
+            return
+
         while True:
+            if self.view is not None:
+                self.view.prompt()
+
             bet = FloatPrompt.ask(
-                "How much money will you be betting for this round? ($)"
+                "How much money will you be betting for this round? ($)",
+                console=self.console,
             )
 
             if bet > self.player.bankroll:
                 msg = "[bold red]Oops! You're betting more money than you have. Try again :smiley:[/bold red]"
-                console.print(msg, end="\n")
+                self._say(msg, center=False)
                 continue
 
-            self.player.bet(amount=bet)
-            self.current_bet = bet
+            self._place_bet(bet)
             break
 
+    def _place_bet(self, bet: float) -> None:
+        """Method which places the bet for the current round and records it.
+
+        Arguments
+        ----------
+        bet: Amount of money bet.
+        """
+        self.current_bet = bet
+        self.player.bet(amount=self.current_bet)
+        self.decisions.append(self.current_bet)
+
+    def _place_side_bets(self) -> None:
+        """Method which places the side bets the player can afford."""
+        self._placed_side_bets = {}
+
+        for side_bet, amount in self.side_bets.items():
+            if amount > self.player.bankroll:
+                self._say(f"[red]Skipping {side_bet.name}: not enough money.[/red]")
+                continue
+
+            self.player.bet(amount=amount)
+            self._placed_side_bets[side_bet] = amount
+
+    def _settle_side_bets(self) -> None:
+        """Method which settles the side bets placed for the current round."""
+        for side_bet, amount in self._placed_side_bets.items():
+            cards = side_bet.cards(self.player.hand, self.dealer.face_up)
+
+            if (payout := side_bet.payout(cards)) < 0:
+                self._say(f"[red]You lost your {side_bet.name} side bet.[/red]")
+                continue
+
+            won = to_dollars(Decimal(str(payout)) * amount)
+            self._say(
+                "[bold green]"
+                f"{side_bet.hand(cards).capitalize()}! "
+                f"You won [bold]${won}[/bold] on {side_bet.name}."
+                "[/bold green]"
+            )
+            # Refund the side bet + pay the won amount
+            self.player.pay(amount + won)
+
+        self._placed_side_bets = {}
+
     def _deal_initial_cards(self) -> None:
         """Method which deals the first two cards to the player and the dealer."""
         for _ in range(2):
@@ -366,16 +641,16 @@ class Game:
         self.player.bet(amount=self.current_bet)
         self.current_bet *= 2
 
-        _print_centered(
+        self._say(
             f"You've doubled the bet to [bold green]{self.current_bet}[/bold green].\n"
             "The dealer will deal a card to you..."
         )
 
-        time.sleep(1)
+        self._pause()
 
         card = self._hit(self.player)
 
-        console.print(f"[red]You've been dealt a [bold]{card}[/bold].[/red]")
+        self._say(f"[red]You've been dealt a [bold]{card}[/bold].[/red]", center=False)
 
         self._show_state()
 
@@ -397,24 +672,26 @@ class Game:
         If the player stands, their play ends and no action needs to be taken.
         """
         double = self.player.bankroll > self.current_bet
-        move = _get_move(double=double)
+        move = self._next_move(double=double)
 
         if move is _Move.DOUBLE:
             self._double()
             return
 
         while move is not _Move.STAND:
-            time.sleep(1)
+            self._pause()
             card = self._hit(self.player)
-            console.print(f"[red]You've been dealt a [bold]{card}[/bold].[/red]")
+            self._say(
+                f"[red]You've been dealt a [bold]{card}[/bold].[/red]", center=False
+            )
 
             if self.player.count() >= 21:
-                _print_centered("[red]Your count is [bold]>= 21[/bold].")
+                self._say("[red]Your count is [bold]>= 21[/bold].")
                 break
 
             self._show_state()
 
-            move = _get_move()
+            move = self._next_move()
 
         self._show_state()
 
@@ -433,29 +710,29 @@ class Game:
         -----------
         natural: Indicates whether or not the player has a natural.
         """
-        _print_centered("[red]Dealer is revealing their face-down card...[/red]")
+        self._say("[red]Dealer is revealing their face-down card...[/red]")
 
-        time.sleep(1)
+        self._pause()
 
         dealer = self.dealer
 
         face_down = self.dealer.face_down
 
         msg = f"[red]Dealer's face-down card is [bold]{face_down}[/bold].[/red]"
-        console.print(msg)
+        self._say(msg, center=False)
 
         dealer.has_face_down = False
         self._show_state()
 
         if not natural:
             while dealer.count() < 17:
-                time.sleep(1)
+                self._pause()
                 card = self._hit(dealer)
                 msg = f"[red]The dealer has been dealt a [bold]{card}[/bold].[/red]"
-                console.print(msg)
+                self._say(msg, center=False)
                 self._show_state()
 
-            _print_centered("[red]Dealer's count is [bold]>= 17[/bold].[/red]")
+            self._say("[red]Dealer's count is [bold]>= 17[/bold].[/red]")
 
     def _winner(self, natural: bool) -> Optional[Player]:
         """Method which determines the winner and handles the payout.
@@ -465,6 +742,10 @@ class Game:
         - There is no natural, the player is paid an amount equal to their bet amount.
 
         The player loses their bet amount if they cross 21 or the dealer wins.
+        A player who crosses 21 loses even when the dealer has busted too.
+
+        In a push, where neither has crossed 21 and the counts are the same,
+        the bet is refunded to the player.
 
         Arguments
         ----------
@@ -476,19 +757,32 @@ class Game:
         """
         p_count, d_count = self.player.count(), self.dealer.count()
 
+        if p_count > 21:
+            self._say(
+                "[bold red]"
+                "D'oh! You have busted.\n"
+                "You didn't win anything. :frowning:"
+                "[/bold red]"
+            )
+            return
+
         if p_count == d_count:
-            _print_centered(
+            self._say(
                 "[red]"
                 "This round ended in a push since your count and "
                 f"the dealer's counts are the same: [bold]{p_count}[/bold]."
                 "[/red]"
             )
+            self.player.pay(self.current_bet)
             return
 
-        if p_count <= 21 and (d_count < p_count or d_count > 21):
-            won = 1.5 * self.current_bet if natural is True else self.current_bet
+        if d_count < p_count or d_count > 21:
+            won = self.current_bet
+            if natural is True:
+                # Rounded to the cent before it is paid, like the store does
+                won = to_dollars(Decimal("1.5") * won)
 
-            _print_centered(
+            self._say(
                 "[bold green]"
                 f"Congratulations! You're the winner, {self.player.name}.\n"
                 f"You won [bold]${won}[/bold]. :smiley:"
@@ -498,16 +792,7 @@ class Game:
             self.player.pay(self.current_bet + won)
             return self.player
 
-        if p_count > 21:
-            _print_centered(
-                "[bold red]"
-                "D'oh! You have busted.\n"
-                "You didn't win anything. :frowning:"
-                "[/bold red]"
-            )
-            return
-
-        _print_centered(
+        self._say(
             "[red]"
             "The dealer won.\n"
             f"You lost [bold]${self.current_bet}[/bold]. :frowning:"
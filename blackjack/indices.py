@@ -0,0 +1,752 @@
+"""
+Module which computes index plays: the true counts at which a decision
+should deviate from basic strategy.
+
+Index plays are computed from exact expected values at each true count bin:
+- Rounds are simulated in parallel processes with basic strategy, and the
+  cards the player has not seen (the shoe and the dealer's face-down card)
+  at every decision are accumulated per true count bin. This gives the
+  average composition of the shoe in each bin.
+- For each bin, the expected values of standing, hitting and doubling are
+  computed exactly for that composition. The dealer's outcomes are worked
+  out by the rules of Game._dealers_turn() (see simulation.hand_count()),
+  and the rounds are settled like Game._winner() (see simulation.settle()).
+  Cards are drawn with the probabilities of the composition, and the player
+  continues a hit with the best move.
+
+A move replaces the basic strategy move when its expected value is higher.
+The result is flattened into a list indexed by the decision and the bin,
+so looking a move up during play takes constant time.
+
+The compositions are cached in a JSON file per rule set and counting system
+and merged with new simulations, so the table gets better as more rounds
+are simulated. Run it from the command line:
+
+    $ python -m blackjack.indices --rounds 1000000 --decks 6 --cache indices.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from rich.table import Table
+
+from .betting import cache_key
+from .console import console
+from .counting import HI_LO, CountingSystem
+from .deck import Deck
+from .game import _Move
+from .policy import BasicStrategy, HandState
+from .rules import Rules
+from .simulation import ACE, Simulator, count_value, settle, up_value
+
+if TYPE_CHECKING:
+    from .betting import BetRamp
+
+H, S, D = _Move.HIT, _Move.STAND, _Move.DOUBLE
+
+# Values of the cards, with an ace being 11
+_VALUES = tuple(range(2, 12))
+
+# Decision a deviation applies to: count of the player's hand, whether it is
+# soft, value of the dealer's face-up card and whether doubling is allowed
+Decision = Tuple[int, bool, int, bool]
+
+# Number of decisions and number of cards of each value unseen by the player
+# summed over them, keyed by the true count bin
+Compositions = Dict[int, List[float]]
+
+_BASIC = BasicStrategy()
+
+
+def _slot(pip: int) -> int:
+    """Function which returns the position of the value of a pip in _VALUES."""
+    return up_value(pip) - 2
+
+
+class ExactEV:
+    """Class which computes the exact expected values of the moves for a
+    composition of the shoe.
+
+    Cards are drawn with the probabilities of the composition, ignoring
+    the removal of the cards already dealt in the round.
+
+    Attributes
+    ----------
+    rules: Rules
+        Rules the rounds are played under.
+
+    probabilities: tuple
+        Probability of drawing a card of each value, from 2 to an ace.
+
+    Methods
+    ----------
+    dealer(up: int) -> Dict[int, float]:
+        Returns the probabilities of the final counts of the dealer.
+
+    moves(decision: Decision) -> Dict[_Move, float]:
+        Returns the expected value of every allowed move of a decision.
+    """
+
+    def __init__(self, rules: Rules, counts: List[float]) -> None:
+        """
+        Arguments
+        ----------
+        rules: Rules the rounds are played under.
+
+        counts: Number of cards of each value, from 2 to an ace, left in the
+        shoe. They need not be integers.
+
+        Raises
+        ----------
+        ValueError, when there are no cards.
+        """
+        if (total := sum(counts)) <= 0:
+            raise ValueError("The shoe must have cards.")
+
+        self.rules = rules
+        self.probabilities = tuple(count / total for count in counts)
+
+        self._dealer: Dict[Tuple[int, int], Dict[int, float]] = {}
+        self._stand: Dict[Tuple[int, int], float] = {}
+        self._best: Dict[Tuple[int, int, int], float] = {}
+
+    def _draws(self, non_aces: int, aces: int):
+        """Method which yields the hands reachable by drawing a card, along
+        with the probability of drawing it."""
+        for value, p in zip(_VALUES, self.probabilities):
+            if p > 0:
+                if value == ACE:
+                    yield non_aces, aces + 1, p
+                else:
+                    yield non_aces + value, aces, p
+
+    def _dealer_from(self, non_aces: int, aces: int) -> Dict[int, float]:
+        """Method which returns the probabilities of the final counts of the
+        dealer from a hand."""
+        key = non_aces, aces
+        if (outcomes := self._dealer.get(key)) is not None:
+            return outcomes
+
+        rules = self.rules
+        count = count_value(non_aces, aces, rules.dealer_ace_limit)
+
+        if count >= rules.dealer_stands_on:
+            outcomes = {count: 1.0}
+        else:
+            outcomes = {}
+            for n, a, p in self._draws(non_aces, aces):
+                for final, q in self._dealer_from(n, a).items():
+                    outcomes[final] = outcomes.get(final, 0.0) + p * q
+
+        self._dealer[key] = outcomes
+        return outcomes
+
+    def dealer(self, up: int) -> Dict[int, float]:
+        """Method which returns the probabilities of the final counts of the dealer.
+
+        Arguments
+        ----------
+        up: Value of the dealer's face-up card, with an ace being 11.
+        """
+        return self._dealer_from(*((0, 1) if up == ACE else (up, 0)))
+
+    def _stand_ev(self, count: int, up: int) -> float:
+        """Method which returns the expected value of standing on a count."""
+        key = count, up
+        if (ev := self._stand.get(key)) is None:
+            payout = self.rules.blackjack_payout
+            ev = self._stand[key] = sum(
+                p * settle(count, final, natural=False, payout=payout)
+                for final, p in self.dealer(up).items()
+            )
+        return ev
+
+    def _hit_ev(self, non_aces: int, aces: int, up: int) -> float:
+        """Method which returns the expected value of hitting and then
+        playing the best moves."""
+        return sum(
+            p * self._best_ev(n, a, up) for n, a, p in self._draws(non_aces, aces)
+        )
+
+    def _best_ev(self, non_aces: int, aces: int, up: int) -> float:
+        """Method which returns the expected value of a hand played with the
+        best moves, without doubling. The player stops at a count of 21 or more."""
+        key = non_aces, aces, up
+        if (ev := self._best.get(key)) is not None:
+            return ev
+
+        count = count_value(non_aces, aces, 21)
+        ev = self._stand_ev(count, up)
+
+        if count < 21:
+            ev = max(ev, self._hit_ev(non_aces, aces, up))
+
+        self._best[key] = ev
+        return ev
+
+    def moves(self, decision: Decision) -> Dict[_Move, float]:
+        """Method which returns the expected value of every allowed move of
+        a decision, per unit bet.
+
+        A soft hand is taken to have a single ace and a hard hand none.
+
+        Arguments
+        ----------
+        decision: Decision to compute (see Decision).
+        """
+        total, soft, up, can_double = decision
+        non_aces, aces = (total - 11, 1) if soft else (total, 0)
+
+        evs = {
+            H: self._hit_ev(non_aces, aces, up),
+            S: self._stand_ev(count_value(non_aces, aces, 21), up),
+        }
+        if can_double:
+            evs[D] = 2 * sum(
+                p * self._stand_ev(count_value(n, a, 21), up)
+                for n, a, p in self._draws(non_aces, aces)
+            )
+        return evs
+
+
+def decisions() -> List[Decision]:
+    """Function which returns every decision a player can face: hard 4
+    to 20 and soft 12 to 20, against every face-up card, with and without
+    doubling allowed."""
+    hands = [(total, False) for total in range(4, 21)]
+    hands += [(total, True) for total in range(12, 21)]
+
+    return [
+        (total, soft, up, can_double)
+        for total, soft in hands
+        for up in _VALUES
+        for can_double in (True, False)
+    ]
+
+
+class CompositionSimulator(Simulator):
+    """Class which plays rounds with basic strategy and accumulates the cards
+    unseen by the player at every decision, per true count bin.
+
+    Unseen cards are counted as they are drawn, so a decision only adds
+    one number per card value.
+
+    Attributes
+    ----------
+    compositions: dict
+        Accumulated compositions (see Compositions).
+
+    tc_low: int
+        Lowest true count bin.
+
+    tc_high: int
+        Highest true count bin.
+    """
+
+    def __init__(
+        self,
+        rules: Rules = Rules(),
+        system: CountingSystem = HI_LO,
+        seed: int = None,
+        tc_low: int = -5,
+        tc_high: int = 5,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        rules: Rules the rounds are played under. Defaults to Rules().
+
+        system: Counting system used to keep the running count. Defaults to HI_LO.
+
+        seed: Seed for the sequence of shoes. Defaults to None.
+
+        tc_low: Lowest true count bin. Defaults to -5.
+
+        tc_high: Highest true count bin. Defaults to 5.
+        """
+        super().__init__(rules=rules, system=system, seed=seed, policy=_BASIC)
+        self.compositions: Compositions = {}
+        self.tc_low = tc_low
+        self.tc_high = tc_high
+
+    def _shuffle(self) -> None:
+        super()._shuffle()
+
+        # Number of cards of each value not seen by the player
+        self._unseen = [0] * len(_VALUES)
+        for pip in self._shoe:
+            self._unseen[_slot(pip)] += 1
+
+    def _draw(self, seen: bool = True) -> int:
+        pip = super()._draw(seen=seen)
+        if seen is True:
+            self._unseen[_slot(pip)] -= 1
+        return pip
+
+    def _dealers_turn(self, hand: List[int], natural: bool) -> None:
+        self._unseen[_slot(hand[1])] -= 1
+        super()._dealers_turn(hand, natural)
+
+    def _decide(self, hand: List[int], up: int, can_double: bool) -> _Move:
+        tc_bin = self.counter.bin(self.tc_low, self.tc_high)
+
+        if (composition := self.compositions.get(tc_bin)) is None:
+            composition = self.compositions[tc_bin] = [0] * (len(_VALUES) + 1)
+
+        composition[0] += 1
+        for idx, count in enumerate(self._unseen, start=1):
+            composition[idx] += count
+
+        return super()._decide(hand, up, can_double)
+
+
+def _simulate_chunk(
+    rules: Rules, system: CountingSystem, seed: int, n_rounds: int
+) -> Compositions:
+    """Function which simulates a chunk of rounds and returns the compositions."""
+    simulator = CompositionSimulator(rules=rules, system=system, seed=seed)
+    for _ in range(n_rounds):
+        simulator.play_round()
+    return simulator.compositions
+
+
+def _merge(compositions: Compositions, other: Compositions) -> None:
+    """Function which merges compositions into others, in-place."""
+    for tc_bin, values in other.items():
+        merged = compositions.setdefault(tc_bin, [0] * len(values))
+        for idx, value in enumerate(values):
+            merged[idx] += value
+
+
+def simulate(
+    rules: Rules = Rules(),
+    system: CountingSystem = HI_LO,
+    n_rounds: int = 1_000_000,
+    chunk_size: int = 50_000,
+    seed: int = 0,
+    workers: int = None,
+) -> Compositions:
+    """Function which simulates rounds in parallel processes and returns the
+    compositions of the shoe accumulated per true count bin.
+
+    Arguments
+    ----------
+    rules: Rules the rounds are played under. Defaults to Rules().
+
+    system: Counting system used to bin the decisions. Defaults to HI_LO.
+
+    n_rounds: Number of rounds to simulate. Defaults to 1,000,000.
+
+    chunk_size: Number of rounds simulated with the same seed in a single
+    process. Defaults to 50,000.
+
+    seed: Seed from which the seeds of the chunks are derived. Defaults to 0.
+
+    workers: Number of processes. When None, the number of CPUs is used.
+    Defaults to None.
+    """
+    chunks = [
+        (seed * 1_000_003 + idx, min(chunk_size, n_rounds - start))
+        for idx, start in enumerate(range(0, n_rounds, chunk_size))
+    ]
+    compositions: Compositions = {}
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_simulate_chunk, rules, system, chunk_seed, n)
+            for chunk_seed, n in chunks
+        ]
+        for future in futures:
+            _merge(compositions, future.result())
+
+    return compositions
+
+
+class IndexPlay(NamedTuple):
+    """Class to represent an index play.
+
+    Attributes
+    ----------
+    decision: tuple
+        Decision the deviation applies to (see Decision).
+
+    basic: _Move
+        Move made by basic strategy.
+
+    deviation: _Move
+        Move made instead.
+
+    bins: tuple
+        True count bins in which the deviation is made.
+    """
+
+    decision: Decision
+    basic: _Move
+    deviation: _Move
+    bins: Tuple[int, ...]
+
+
+class IndexTable:
+    """Class which maps decisions and true count bins to deviations
+    from basic strategy.
+
+    Attributes
+    ----------
+    tc_low: int
+        Lowest true count bin.
+
+    tc_high: int
+        Highest true count bin.
+
+    Methods
+    ----------
+    from_compositions(compositions: Compositions, rules: Rules = Rules(),
+    min_decisions: int = 1000) -> IndexTable:
+        Class method which computes the table from compositions of the shoe.
+
+    move(hand: HandState, dealer_up: int, tc_bin: int) -> Optional[_Move]:
+        Returns the deviation for a decision in a true count bin, if any.
+
+    plays() -> List[IndexPlay]:
+        Returns the index plays of the table.
+    """
+
+    def __init__(
+        self,
+        deviations: Dict[Tuple[Decision, int], _Move],
+        tc_low: int = -5,
+        tc_high: int = 5,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        deviations: Mapping between decisions in true count bins and the
+        moves to make instead of the basic strategy moves.
+
+        tc_low: Lowest true count bin. Defaults to -5.
+
+        tc_high: Highest true count bin. Defaults to 5.
+        """
+        self.tc_low = tc_low
+        self.tc_high = tc_high
+
+        # Deviation of every decision and bin, flattened (see _index())
+        self._moves: List[Optional[_Move]] = [None] * (
+            (tc_high - tc_low + 1) * 22 * 2 * 12 * 2
+        )
+
+        for (decision, tc_bin), move in deviations.items():
+            if tc_low <= tc_bin <= tc_high:
+                self._moves[self._index(*decision, tc_bin)] = move
+
+    @classmethod
+    def from_compositions(
+        cls,
+        compositions: Compositions,
+        rules: Rules = Rules(),
+        min_decisions: int = 1000,
+    ) -> IndexTable:
+        """Class method which computes the table from compositions of the shoe.
+
+        Arguments
+        ----------
+        compositions: Compositions of the shoe accumulated per true count bin.
+
+        rules: Rules the rounds are played under. Defaults to Rules().
+
+        min_decisions: Minimum number of decisions a bin must have been
+        accumulated over to deviate in it. Defaults to 1000.
+        """
+        deviations: Dict[Tuple[Decision, int], _Move] = {}
+
+        for tc_bin, (n, *counts) in compositions.items():
+            if n < min_decisions:
+                continue
+
+            exact = ExactEV(rules, counts)
+
+            for decision in decisions():
+                evs = exact.moves(decision)
+                best = max(evs, key=evs.get)
+
+                total, soft, up, can_double = decision
+                basic = _BASIC.decide(HandState(total, soft, 2, can_double), up)
+
+                if best is not basic and evs[best] > evs[basic]:
+                    deviations[decision, tc_bin] = best
+
+        bins = [int(tc_bin) for tc_bin in compositions] or [-5, 5]
+        return cls(deviations, tc_low=min(bins), tc_high=max(bins))
+
+    def _index(
+        self, total: int, soft: bool, up: int, can_double: bool, tc_bin: int
+    ) -> int:
+        """Method which returns the position of a decision in the flattened table."""
+        row = ((tc_bin - self.tc_low) * 22 + total) * 2 + soft
+        return (row * 12 + up) * 2 + can_double
+
+    def move(self, hand: HandState, dealer_up: int, tc_bin: int) -> Optional[_Move]:
+        """Method which returns the deviation for a decision in a true count bin.
+
+        Arguments
+        ----------
+        hand: State of the player's hand.
+
+        dealer_up: Value of the dealer's face-up card, with an ace being 11.
+
+        tc_bin: True count bin. Bins out of the range of the table are clamped.
+
+        Returns
+        ----------
+        _Move, the move to make instead of the basic strategy move.
+        None when basic strategy should be followed.
+        """
+        if hand.total > 21:
+            return None
+
+        tc_bin = min(max(tc_bin, self.tc_low), self.tc_high)
+        return self._moves[
+            self._index(hand.total, hand.soft, dealer_up, hand.can_double, tc_bin)
+        ]
+
+    def plays(self) -> List[IndexPlay]:
+        """Method which returns the index plays of the table, sorted by decision."""
+        plays = []
+
+        for decision in sorted(decisions()):
+            total, soft, up, can_double = decision
+            hand = HandState(total, soft, 2, can_double)
+            found: Dict[_Move, List[int]] = {}
+
+            for tc_bin in range(self.tc_low, self.tc_high + 1):
+                if (move := self.move(hand, up, tc_bin)) is not None:
+                    found.setdefault(move, []).append(tc_bin)
+
+            basic = _BASIC.decide(hand, up)
+            for move, bins in found.items():
+                plays.append(IndexPlay(decision, basic, move, tuple(bins)))
+
+        return plays
+
+
+class IndexCache:
+    """Class which stores the compositions of index simulations in a JSON file.
+
+    Compositions from successive simulations are merged.
+
+    Attributes
+    ----------
+    path: str
+        Path to the JSON file.
+
+    Methods
+    ----------
+    get(key: str) -> Tuple[int, Compositions]:
+        Returns the number of rounds and the compositions stored under a key.
+
+    update(key: str, n_rounds: int, compositions: Compositions) -> None:
+        Merges compositions into the ones stored under a key.
+
+    save() -> None:
+        Writes the compositions to the JSON file.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Arguments
+        ----------
+        path: Path to the JSON file. It is created on the first save
+        if it does not exist.
+        """
+        self.path = path
+        self._data: Dict[str, dict] = {}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._data = json.load(f)
+
+    def get(self, key: str) -> Tuple[int, Compositions]:
+        """Method which returns the compositions stored under a key.
+
+        Arguments
+        ----------
+        key: Key of the compositions (see betting.cache_key()).
+
+        Returns
+        ----------
+        A two-tuple with the number of rounds simulated and the compositions.
+        """
+        entry = self._data.get(key, {"rounds": 0, "compositions": {}})
+        compositions = {
+            int(tc_bin): values for tc_bin, values in entry["compositions"].items()
+        }
+        return entry["rounds"], compositions
+
+    def update(self, key: str, n_rounds: int, compositions: Compositions) -> None:
+        """Method which merges compositions into the ones stored under a key.
+
+        Arguments
+        ----------
+        key: Key of the compositions (see betting.cache_key()).
+
+        n_rounds: Number of rounds the compositions were simulated from.
+
+        compositions: Compositions to merge.
+        """
+        rounds, merged = self.get(key)
+        _merge(merged, compositions)
+
+        self._data[key] = {
+            "rounds": rounds + n_rounds,
+            "compositions": {
+                str(tc_bin): values for tc_bin, values in sorted(merged.items())
+            },
+        }
+
+    def save(self) -> None:
+        """Method which writes the compositions to the JSON file."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2)
+
+
+def load_or_simulate(
+    cache: IndexCache,
+    rules: Rules = Rules(),
+    system: CountingSystem = HI_LO,
+    n_rounds: int = 1_000_000,
+    seed: int = 0,
+    workers: int = None,
+) -> IndexTable:
+    """Function which returns the index table of a rule set and a counting
+    system, simulating only the rounds missing from the cache.
+
+    Arguments
+    ----------
+    cache: Cache to read the compositions from and store new ones in.
+
+    rules: Rule set to simulate. Defaults to Rules().
+
+    system: Counting system used to bin the decisions. Defaults to HI_LO.
+
+    n_rounds: Minimum number of rounds the table should be based on.
+    Defaults to 1,000,000.
+
+    seed: Seed for the simulation. It is offset by the number of rounds
+    already cached so that new rounds are not repeats. Defaults to 0.
+
+    workers: Number of processes. When None, the number of CPUs is used.
+    Defaults to None.
+    """
+    key = cache_key(rules, system, _BASIC)
+    rounds, compositions = cache.get(key)
+
+    if (missing := n_rounds - rounds) > 0:
+        new = simulate(rules, system, missing, seed=seed + rounds, workers=workers)
+        cache.update(key, missing, new)
+        cache.save()
+        _, compositions = cache.get(key)
+
+    return IndexTable.from_compositions(compositions, rules=rules)
+
+
+class IndexPolicy(BasicStrategy):
+    """Class which plays basic strategy with the deviations of an index table.
+
+    Deviations are only made when the true count is known.
+    """
+
+    name = "index-plays"
+
+    def __init__(
+        self, table: IndexTable, unit: float = 1.0, ramp: BetRamp = None
+    ) -> None:
+        """
+        Arguments
+        ----------
+        table: Index table with the deviations.
+
+        unit: Amount of money bet every round when there is no ramp. Defaults to 1.
+
+        ramp: Bet ramp used when the true count is known. Defaults to None.
+        """
+        super().__init__(unit=unit, ramp=ramp)
+        self.table = table
+
+    def decide(
+        self, hand: HandState, dealer_up: int, true_count: Optional[float] = None
+    ) -> _Move:
+        if true_count is not None:
+            move = self.table.move(hand, dealer_up, math.floor(true_count))
+            if move is not None:
+                return move
+        return super().decide(hand, dealer_up, true_count=true_count)
+
+
+def _describe(play: IndexPlay, tc_low: int, tc_high: int) -> str:
+    """Function which describes the true counts at which an index play is made."""
+    bins = play.bins
+    contiguous = bins == tuple(range(bins[0], bins[-1] + 1))
+
+    if contiguous and bins[0] == tc_low and bins[-1] == tc_high:
+        return "any"
+    if contiguous and bins[-1] == tc_high:
+        return f">= {bins[0]:+d}"
+    if contiguous and bins[0] == tc_low:
+        return f"< {bins[-1] + 1:+d}"
+    return ", ".join(f"{tc_bin:+d}" for tc_bin in bins)
+
+
+def index_table(table: IndexTable) -> Table:
+    """Function which creates a table showing the index plays of an index table.
+
+    Arguments
+    ----------
+    table: Index table to show.
+    """
+    rich_table = Table(title="Index plays")
+
+    for title in ("Hand", "Dealer", "Basic", "Deviation", "True count"):
+        rich_table.add_column(title)
+
+    for play in table.plays():
+        total, soft, up, can_double = play.decision
+        hand = f"{'soft' if soft else 'hard'} {total}"
+        rich_table.add_row(
+            hand if can_double else f"{hand} (no double)",
+            "A" if up == ACE else str(up),
+            play.basic.name,
+            play.deviation.name,
+            _describe(play, table.tc_low, table.tc_high),
+        )
+
+    return rich_table
+
+
+def main() -> None:
+    """Function which computes the index plays of a rule set."""
+    parser = argparse.ArgumentParser(description="Compute index plays.")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--decks", type=int, default=1, choices=Deck.multipliers)
+    parser.add_argument("--cache", default="indices.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    table = load_or_simulate(
+        IndexCache(args.cache),
+        rules=Rules(decks=args.decks),
+        n_rounds=args.rounds,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    console.print(index_table(table))
+
+
+if __name__ == "__main__":
+    main()
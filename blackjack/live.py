@@ -0,0 +1,261 @@
+"""
+Module which implements an in-place, live-updating view of the game.
+
+Instead of printing a new panel every time the state changes, the view
+keeps the screen laid out as a fixed block (title, state and a history
+ticker) and only rewrites the lines of the block that have changed. The
+ticker is scrolled by the terminal itself, so a new message costs a
+single line.
+Redraws are capped to a maximum frequency; updates arriving in between
+are coalesced into the next frame.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from rich.console import Console, Group, RenderableType
+from rich.rule import Rule
+from rich.text import Text
+
+from .console import console as default_console
+
+# ANSI escape sequences used to draw in-place
+_MOVE_TO = "\x1b[{row};1H"
+_ERASE_LINE = "\x1b[K"
+_ERASE_BELOW = "\x1b[J"
+_SAVE_CURSOR = "\x1b7"
+_RESTORE_CURSOR = "\x1b8"
+_SCROLL_REGION = "\x1b[{top};{bottom}r"
+_RESET_SCROLL_REGION = "\x1b[r"
+
+
+class LiveView:
+    """Class which draws the game in-place on a terminal.
+
+    Attributes
+    ----------
+    console: Console
+        Console the view is drawn on. It should be attached to a terminal.
+
+    title: str
+        Title shown at the top of the view.
+
+    max_fps: float
+        Maximum number of redraws per second.
+
+    bytes_written: int
+        Number of bytes written to the terminal so far.
+
+    Methods
+    ----------
+    start() -> None:
+        Clears the screen and draws the first frame.
+
+    update(state: RenderableType) -> None:
+        Replaces the state shown by the view.
+
+    log(msg: str) -> None:
+        Adds a message to the history ticker.
+
+    prompt() -> None:
+        Draws any pending frame and moves the cursor below the view so
+        that the user can be prompted.
+
+    stop() -> None:
+        Draws any pending frame and leaves the cursor below the view.
+    """
+
+    def __init__(
+        self, console: Console = None, max_fps: float = 4.0, history: int = 5
+    ) -> None:
+        """
+        Arguments
+        ----------
+        console: Console the view is drawn on. When None, the global
+        console is used. Defaults to None.
+
+        max_fps: Maximum number of redraws per second. Defaults to 4.
+
+        history: Number of messages shown in the history ticker. Defaults to 5.
+
+        Raises
+        ----------
+        ValueError, when max_fps is not greater than 0.
+        """
+        if not max_fps > 0:
+            raise ValueError("max_fps must be greater than 0.")
+
+        self.console = console if console is not None else default_console
+        self.title = ""
+        self.max_fps = max_fps
+        self.bytes_written = 0
+
+        self._state: RenderableType = Text("")
+        self._history: Deque[Text] = deque(maxlen=history)
+
+        self._lines: List[str] = []
+        self._last_draw = 0.0
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    def start(self) -> None:
+        """Method which clears the screen and draws the first frame."""
+        with self._lock:
+            self.console.clear()
+            self._lines = []
+            self._draw()
+
+    def update(self, state: RenderableType) -> None:
+        """Method which replaces the state shown by the view.
+
+        Arguments
+        ----------
+        state: Renderable showing the state of the game.
+        """
+        self._state = state
+        self.refresh()
+
+    def log(self, msg: str) -> None:
+        """Method which adds a message to the history ticker.
+
+        Arguments
+        ----------
+        msg: Message, which can have console markup. Messages spanning several
+        lines take one entry of the ticker per line.
+        """
+        self._history.extend(Text.from_markup(msg).split("\n"))
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Method which redraws the view, unless the last frame was drawn too
+        recently, in which case a redraw is scheduled for later.
+        """
+        with self._lock:
+            wait = self._last_draw + 1 / self.max_fps - time.monotonic()
+
+            if wait <= 0:
+                self._draw()
+            elif self._timer is None:
+                self._timer = threading.Timer(wait, self._draw)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def prompt(self) -> None:
+        """Method which draws any pending frame and moves the cursor below
+        the view, clearing whatever was printed there before.
+        """
+        with self._lock:
+            self._draw()
+            self._write(_MOVE_TO.format(row=len(self._lines) + 1) + _ERASE_BELOW)
+
+    def stop(self) -> None:
+        """Method which draws any pending frame and leaves the cursor below the view."""
+        self.prompt()
+
+    def _render(self) -> Tuple[List[str], int]:
+        """Method which renders the view into lines of text with ANSI styles.
+
+        Returns
+        ----------
+        A two-tuple with:
+        - list, the rendered lines.
+        - int, the index of the first line of the history ticker.
+        """
+        ticker = list(self._history)
+        ticker += [Text("")] * (self._history.maxlen - len(ticker))
+
+        group = Group(
+            Rule(f"[bold red]{self.title}[/bold red]"),
+            self._state,
+            Rule("History", style="dim"),
+        )
+
+        with self.console.capture() as capture:
+            self.console.print(group)
+            self.console.print(*ticker, sep="\n")
+
+        # Trailing spaces are not needed since the rest of a line gets erased
+        lines = [line.rstrip() for line in capture.get().splitlines()]
+        return lines, len(lines) - len(ticker)
+
+    def _scroll(self, old: List[str], new: List[str], top: int) -> int:
+        """Method which finds by how many lines the history ticker has scrolled.
+
+        Arguments
+        ----------
+        old: Lines of the last frame.
+
+        new: Lines of the new frame.
+
+        top: Index of the first line of the ticker in both frames.
+
+        Returns
+        ----------
+        int, the number of lines scrolled. It is 0 when the ticker has not
+        scrolled or its lines cannot be reused.
+        """
+        bottom = top + self._history.maxlen
+
+        if len(old) != len(new) or old[top:bottom] == new[top:bottom]:
+            return 0
+
+        for shift in range(1, self._history.maxlen):
+            if old[top + shift : bottom] == new[top : bottom - shift]:
+                return shift
+
+        return 0
+
+    def _draw(self) -> None:
+        """Method which rewrites the lines that have changed since the last frame.
+
+        When messages are added to the history ticker, its lines are moved
+        up by scrolling a region of the terminal instead of being rewritten.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            lines, top = self._render()
+            old = list(self._lines)
+            out = []
+
+            if shift := self._scroll(old, lines, top):
+                bottom = top + self._history.maxlen
+                out.append(
+                    _SCROLL_REGION.format(top=top + 1, bottom=bottom)
+                    + _MOVE_TO.format(row=bottom)
+                    + "\n" * shift
+                    + _RESET_SCROLL_REGION
+                )
+                old[top:bottom] = old[top + shift : bottom] + [""] * shift
+
+            out += [
+                _MOVE_TO.format(row=row) + line + _ERASE_LINE
+                for row, line in enumerate(lines, start=1)
+                if row > len(old) or old[row - 1] != line
+            ]
+
+            # Clear lines left over from a taller frame
+            out += [
+                _MOVE_TO.format(row=row) + _ERASE_LINE
+                for row in range(len(lines) + 1, len(old) + 1)
+            ]
+
+            # The cursor is restored so that drawing never moves it away from a prompt
+            if out:
+                self._write(_SAVE_CURSOR + "".join(out) + _RESTORE_CURSOR)
+
+            self._lines = lines
+            self._last_draw = time.monotonic()
+
+    def _write(self, data: str) -> None:
+        """Method which writes raw data to the terminal."""
+        file = self.console.file
+        file.write(data)
+        file.flush()
+        self.bytes_written += len(data.encode("utf-8"))
@@ -0,0 +1,473 @@
+"""
+Module which implements a load test of the interactive game.
+
+Synthetic players answer the same prompts a human would: every session is
+a Game with pacing disabled, printing on a console whose input() is
+answered by the synthetic player instead of the keyboard. Answers go
+through the prompts' own parsing and validation, and everything the game
+prints is rendered, then discarded.
+
+The latency of an answer is the time from it to the next prompt (or to the
+end of the round), which is what a player waits for. Latencies of bets and
+of moves are reported apart, and only for answers the game accepted: an
+answer which the prompt rejects and asks again for is counted as rejected.
+
+Memory is measured separately with tracemalloc, since tracing skews
+timings: every session is created and plays a warm-up round while traced,
+before the timed rounds.
+
+Run it from the command line:
+
+    $ python -m blackjack.loadtest --sessions 200 --rounds 50 --concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import itertools
+import re
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from rich.console import Console
+from rich.table import Table
+from rich.text import Text
+
+from .console import console
+from .game import Game, _Move
+from .player import Player
+from .policy import BasicStrategy, Policy
+
+# Lines listing the moves in the prompt created by _Move.make_prompt()
+_MOVE_LINE = re.compile(r"^(\d+)\. (\w+)$", re.MULTILINE)
+
+
+class SyntheticPlayer:
+    """Base class for players answering the prompts of a Game.
+
+    Methods
+    ----------
+    bet(game: Game) -> str:
+        Returns the answer to the prompt asking for the bet.
+
+    move(game: Game, choices: Dict[_Move, str]) -> str:
+        Returns the answer to the prompt asking for a move.
+    """
+
+    def bet(self, game: Game) -> str:
+        """Method which returns the answer to the prompt asking for the bet.
+
+        Arguments
+        ----------
+        game: Game asking for the bet.
+        """
+        raise NotImplementedError
+
+    def move(self, game: Game, choices: Dict[_Move, str]) -> str:
+        """Method which returns the answer to the prompt asking for a move.
+
+        Arguments
+        ----------
+        game: Game asking for the move.
+
+        choices: Mapping between the moves offered and their choice numbers.
+        """
+        raise NotImplementedError
+
+
+class ScriptedPlayer(SyntheticPlayer):
+    """Class which answers the prompts from scripts, cycling through them.
+
+    Invalid answers are allowed: the prompts reject them and ask again,
+    as they would for a human.
+    """
+
+    def __init__(self, bets: Sequence[str] = ("10",), moves: Sequence[str] = ("2",)):
+        """
+        Arguments
+        ----------
+        bets: Answers to the prompt asking for the bet. Defaults to ("10",).
+
+        moves: Answers to the prompt asking for a move, as typed by a player
+        (e.g. "1" for Hit). Defaults to ("2",), which always stands.
+        """
+        self._bets = itertools.cycle(bets)
+        self._moves = itertools.cycle(moves)
+
+    def bet(self, game: Game) -> str:
+        return next(self._bets)
+
+    def move(self, game: Game, choices: Dict[_Move, str]) -> str:
+        return next(self._moves)
+
+
+class PolicyPlayer(SyntheticPlayer):
+    """Class which answers the prompts with the decisions of a policy."""
+
+    def __init__(self, policy: Policy) -> None:
+        """
+        Arguments
+        ----------
+        policy: Policy making the decisions.
+        """
+        self.policy = policy
+
+    def bet(self, game: Game) -> str:
+        return str(self.policy.bet(bankroll=game.player.bankroll))
+
+    def move(self, game: Game, choices: Dict[_Move, str]) -> str:
+        double = _Move.DOUBLE in choices
+        return choices[self.policy.move(game.player, game.dealer, double=double)]
+
+
+class _SyntheticConsole(Console):
+    """Class which is a console whose input is answered by a synthetic player.
+
+    It also measures the latency of every answer accepted by the game, by
+    kind of answer ("bet" or "move"), and counts the rejected answers.
+    """
+
+    def __init__(self, player: SyntheticPlayer) -> None:
+        """
+        Arguments
+        ----------
+        player: Synthetic player answering the prompts.
+        """
+        super().__init__(file=_NullFile(), width=80, force_terminal=False)
+        self.player = player
+        self.game: Optional[Game] = None
+        self.latencies: Dict[str, List[float]] = {"bet": [], "move": []}
+        self.rejected = 0
+        # Kind of the last answer, when it was given and the number of
+        # decisions of the game at that time
+        self._answered: Optional[Tuple[str, float, int]] = None
+
+    def input(self, prompt: Text = "", *args, **kwargs) -> str:
+        """Method which renders the prompt and returns the player's answer."""
+        self._stop_clock()
+        self.print(prompt, end="")
+
+        text = prompt.plain if isinstance(prompt, Text) else str(prompt)
+        choices = {_Move[name]: idx for idx, name in _MOVE_LINE.findall(text)}
+
+        if choices:
+            kind, answer = "move", self.player.move(self.game, choices)
+        else:
+            kind, answer = "bet", self.player.bet(self.game)
+
+        self._answered = kind, time.perf_counter(), len(self.game.decisions)
+        return answer
+
+    def end_round(self) -> None:
+        """Method which records the latency of the last answer of a round."""
+        self._stop_clock()
+
+    def _stop_clock(self) -> None:
+        """Method which records the time elapsed since the last answer.
+
+        The game records a decision for every answer it accepts, so an
+        answer after which no decision was recorded was rejected.
+        """
+        if self._answered is None:
+            return
+
+        kind, answered, n_decisions = self._answered
+        elapsed = time.perf_counter() - answered
+        self._answered = None
+
+        if len(self.game.decisions) > n_decisions:
+            self.latencies[kind].append(elapsed)
+        else:
+            self.rejected += 1
+
+
+class _NullFile:
+    """Class which is a file discarding what is written to it and counting it."""
+
+    def __init__(self) -> None:
+        self.written = 0
+
+    def write(self, text: str) -> int:
+        self.written += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class LoadReport(NamedTuple):
+    """Class to represent the result of a load test.
+
+    Attributes
+    ----------
+    sessions: int
+        Number of game sessions.
+
+    rounds: int
+        Number of timed rounds played in total.
+
+    moves: int
+        Number of moves made in total during the timed rounds, not counting
+        rejected answers.
+
+    rejected: int
+        Number of answers rejected by the prompts during the timed rounds.
+
+    elapsed: float
+        Wall-clock duration (in seconds) of the timed rounds.
+
+    bet_p50: float
+        Median latency (in milliseconds) of an accepted bet.
+
+    bet_p99: float
+        99th percentile of the latency (in milliseconds) of an accepted bet.
+
+    move_p50: float
+        Median latency (in milliseconds) of an accepted move.
+
+    move_p99: float
+        99th percentile of the latency (in milliseconds) of an accepted move.
+
+    memory: float
+        Memory (in KiB) held by a session after its warm-up round.
+
+    peak_memory: float
+        Peak memory (in KiB) per session during the warm-up rounds.
+
+    output: float
+        Number of characters printed per round.
+    """
+
+    sessions: int
+    rounds: int
+    moves: int
+    rejected: int
+    elapsed: float
+    bet_p50: float
+    bet_p99: float
+    move_p50: float
+    move_p99: float
+    memory: float
+    peak_memory: float
+    output: float
+
+    @property
+    def rounds_per_second(self) -> float:
+        """Number of rounds played per second."""
+        return self.rounds / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        """Number of moves made per second."""
+        return self.moves / self.elapsed if self.elapsed else 0.0
+
+
+def _percentiles(latencies: List[float]) -> Tuple[float, float]:
+    """Function which returns the median and the 99th percentile of latencies,
+    in milliseconds. Both are 0 when there are fewer than two latencies."""
+    if len(latencies) < 2:
+        return 0.0, 0.0
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return percentiles[49] * 1e3, percentiles[98] * 1e3
+
+
+class LoadTest:
+    """Class which runs concurrent game sessions played by synthetic players.
+
+    Attributes
+    ----------
+    sessions: int
+        Number of game sessions.
+
+    rounds: int
+        Number of timed rounds played by each session.
+
+    concurrency: int
+        Number of sessions played at the same time, each in its own thread.
+
+    Methods
+    ----------
+    run() -> LoadReport:
+        Runs the load test.
+    """
+
+    def __init__(
+        self,
+        sessions: int = 100,
+        rounds: int = 20,
+        concurrency: int = 8,
+        player: SyntheticPlayer = None,
+        seed: int = 0,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        sessions: Number of game sessions. Defaults to 100.
+
+        rounds: Number of timed rounds played by each session. Defaults to 20.
+
+        concurrency: Number of sessions played at the same time, each in its
+        own thread. Defaults to 8.
+
+        player: Factory of the synthetic player of each session, called with
+        no arguments. When None, every session is played by a PolicyPlayer
+        with BasicStrategy. Defaults to None.
+
+        seed: Seed from which the seeds of the decks of the sessions are
+        derived. Defaults to 0.
+        """
+        self.sessions = sessions
+        self.rounds = rounds
+        self.concurrency = concurrency
+        self.seed = seed
+        self._player = player if player is not None else self._policy_player
+
+    @staticmethod
+    def _policy_player() -> SyntheticPlayer:
+        """Method which creates the default synthetic player."""
+        return PolicyPlayer(BasicStrategy(unit=10.0))
+
+    def _session(self, idx: int) -> Game:
+        """Method which creates a session and plays its warm-up round."""
+        game_console = _SyntheticConsole(self._player())
+        player = Player(name=f"load-{idx}", bankroll=1e9)
+
+        game = Game(player, pace=0, console=game_console, seed=self.seed + idx)
+        game_console.game = game
+
+        self._play(game, rounds=1)
+        return game
+
+    @staticmethod
+    def _play(game: Game, rounds: int) -> None:
+        """Method which plays rounds of a session, like driver.main() does."""
+        for _ in range(rounds):
+            game.play()
+            game.console.end_round()
+            game.reset()
+
+    def run(self) -> LoadReport:
+        """Method which runs the load test.
+
+        Returns
+        ----------
+        LoadReport, the throughput, latencies and memory of the sessions.
+        """
+        # Fill the caches shared by all sessions (e.g. rich's) before tracing
+        self._session(-1)
+
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        games = [self._session(idx) for idx in range(self.sessions)]
+
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        for game in games:
+            for latencies in game.console.latencies.values():
+                latencies.clear()
+            game.console.rejected = 0
+            game.console.file.written = 0
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(lambda game: self._play(game, self.rounds), games))
+        elapsed = time.perf_counter() - start
+
+        bets, moves = (
+            [lat for game in games for lat in game.console.latencies[kind]]
+            for kind in ("bet", "move")
+        )
+        bet_p50, bet_p99 = _percentiles(bets)
+        move_p50, move_p99 = _percentiles(moves)
+
+        rounds = self.sessions * self.rounds
+        written = sum(game.console.file.written for game in games)
+
+        return LoadReport(
+            sessions=self.sessions,
+            rounds=rounds,
+            moves=len(moves),
+            rejected=sum(game.console.rejected for game in games),
+            elapsed=elapsed,
+            bet_p50=bet_p50,
+            bet_p99=bet_p99,
+            move_p50=move_p50,
+            move_p99=move_p99,
+            memory=(current - baseline) / self.sessions / 1024,
+            peak_memory=(peak - baseline) / self.sessions / 1024,
+            output=written / rounds if rounds else 0.0,
+        )
+
+
+def report_table(report: LoadReport) -> Table:
+    """Function which creates a table showing the result of a load test.
+
+    Arguments
+    ----------
+    report: Result returned by LoadTest.run().
+    """
+    table = Table(title="Load test", show_header=False)
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+
+    table.add_row("Sessions", f"{report.sessions:,}")
+    table.add_row("Rounds", f"{report.rounds:,}")
+    table.add_row("Moves", f"{report.moves:,}")
+    table.add_row("Rejected answers", f"{report.rejected:,}")
+    table.add_row("Elapsed (s)", f"{report.elapsed:.2f}")
+    table.add_row("Rounds / s", f"{report.rounds_per_second:,.0f}")
+    table.add_row("Moves / s", f"{report.moves_per_second:,.0f}")
+    table.add_row("Bet latency p50 (ms)", f"{report.bet_p50:.3f}")
+    table.add_row("Bet latency p99 (ms)", f"{report.bet_p99:.3f}")
+    table.add_row("Move latency p50 (ms)", f"{report.move_p50:.3f}")
+    table.add_row("Move latency p99 (ms)", f"{report.move_p99:.3f}")
+    table.add_row("Memory / session (KiB)", f"{report.memory:.1f}")
+    table.add_row("Peak memory / session (KiB)", f"{report.peak_memory:.1f}")
+    table.add_row("Output / round (chars)", f"{report.output:,.0f}")
+
+    return table
+
+
+def main() -> None:
+    """Function which runs a load test from the command line."""
+    parser = argparse.ArgumentParser(description="Load test the interactive game.")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--script",
+        nargs="+",
+        metavar="MOVE",
+        help="play every move from this script (e.g. 1 2 for hit then stand) "
+        "instead of basic strategy",
+    )
+    args = parser.parse_args()
+
+    player = None
+    if args.script is not None:
+        player = functools.partial(ScriptedPlayer, moves=args.script)
+
+    test = LoadTest(
+        sessions=args.sessions,
+        rounds=args.rounds,
+        concurrency=args.concurrency,
+        player=player,
+        seed=args.seed,
+    )
+    console.print(report_table(test.run()))
+
+
+if __name__ == "__main__":
+    main()
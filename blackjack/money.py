@@ -0,0 +1,50 @@
+"""
+Module which implements exact amounts of money.
+
+Amounts are Decimal dollars rounded half-even to the cent, so no money is
+lost to floating point errors. They can also be held as integer cents,
+e.g. in the SQLite store or in snapshots.
+"""
+
+from __future__ import annotations
+
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Union
+
+_CENT = Decimal("0.01")
+
+
+def to_dollars(amount: Union[float, str, Decimal]) -> Decimal:
+    """Function which converts an amount of money to exact dollars,
+    rounded half-even to the cent.
+
+    Floats are converted through their shortest string representation,
+    so 0.1 becomes 0.10 dollars and not 0.1000000000000000055 dollars.
+
+    Arguments
+    ----------
+    amount: Amount of money in dollars.
+    """
+    return Decimal(str(amount)).quantize(_CENT, rounding=ROUND_HALF_EVEN)
+
+
+def to_cents(amount: Union[float, str, Decimal]) -> int:
+    """Function which converts an amount of money to integer cents.
+
+    The amount is rounded to the cent like to_dollars() does.
+
+    Arguments
+    ----------
+    amount: Amount of money in dollars.
+    """
+    return int(to_dollars(amount) * 100)
+
+
+def from_cents(cents: int) -> Decimal:
+    """Function which converts integer cents to an exact amount of dollars.
+
+    Arguments
+    ----------
+    cents: Amount of money in cents.
+    """
+    return Decimal(cents) * _CENT
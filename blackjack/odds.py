@@ -0,0 +1,331 @@
+"""
+Module which stores the probabilities of the outcomes of the dealer's hand.
+
+For every ace rule of Dealer.count() (see ACE_LIMITS), shoe size in
+Deck.multipliers and face-up card, the table holds the probability of the
+dealer finishing on 17 through 21, busting or having a blackjack (21 on
+two cards). Busts are kept apart by final count, 22 through 26, so that
+draws from the table give the dealer's exact final count (see sample()). The
+dealer hits below 17, as in Game._dealers_turn(). The probabilities are
+computed exactly, drawing from the shoe without replacement, with the
+face-up card removed from it.
+
+With the ace rules of the game, an ace and a ten count 11, so the
+probability of a blackjack is 0. It is kept so the table also holds
+for rules under which it is not.
+
+The table ships with the package as a small NumPy file, which is
+memory-mapped when it is first needed. If it is missing or does not
+match, it is built (in a couple of seconds) and saved in its place.
+Rebuild it from the command line:
+
+    $ python -m blackjack.odds
+
+Simulations which only need to settle rounds can draw the dealer's final
+count from the table instead of dealing the dealer's hand (see Simulator).
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .console import console
+from .deck import Deck
+from .rules import Rules
+from .simulation import count_value, settle
+
+# Count values up to which the dealer counts an ace as 11: the one used by
+# Dealer.count() and the default one of _GenericPlayer.count()
+ACE_LIMITS = (17, 21)
+
+# Final count of the dealer for each outcome, counts above 21 being busts
+FINAL_COUNTS = tuple(range(17, 27)) + (21,)
+
+# Outcomes of the dealer's hand, in the order of the last axis of the table
+OUTCOMES = tuple(str(count) for count in FINAL_COUNTS[:-1]) + ("blackjack",)
+
+# Values of the face-up cards, with an ace being 11
+UP_CARDS = tuple(range(2, 12))
+
+PATH = os.path.join(os.path.dirname(__file__), "dealer_odds.npy")
+
+_SHAPE = (len(ACE_LIMITS), len(Deck.multipliers), len(UP_CARDS), len(OUTCOMES))
+_STANDS_ON = 17
+
+
+def _final_count(drawn: Tuple[int, ...], ace_limit: int) -> int:
+    """Function which computes the count of a hand from the number of cards
+    of each value in it (see count_value()).
+
+    Arguments
+    ----------
+    drawn: Number of cards of each value, from 2 to an ace.
+
+    ace_limit: Count value up to which aces should be counted as 11.
+    """
+    non_aces = sum(value * n for value, n in zip(UP_CARDS, drawn[:-1]))
+    return count_value(non_aces, drawn[-1], ace_limit)
+
+
+def outcome_probabilities(up: int, decks: int, ace_limit: int) -> np.ndarray:
+    """Function which computes the probabilities of the outcomes of the dealer's hand.
+
+    Arguments
+    ----------
+    up: Value of the dealer's face-up card, with an ace being 11.
+
+    decks: Size of the shoe in terms of a 52-card deck.
+
+    ace_limit: Count value up to which the dealer counts an ace as 11.
+
+    Returns
+    ----------
+    np.ndarray, the probability of every outcome in OUTCOMES.
+    """
+    # Number of cards of each value in the shoe, tens including faces
+    shoe = [4 * decks] * len(UP_CARDS)
+    shoe[10 - 2] *= 4
+
+    memo: Dict[Tuple[int, ...], np.ndarray] = {}
+
+    def play(drawn: Tuple[int, ...]) -> np.ndarray:
+        if (probabilities := memo.get(drawn)) is not None:
+            return probabilities
+
+        count = _final_count(drawn, ace_limit)
+        probabilities = np.zeros(len(OUTCOMES))
+
+        if count >= _STANDS_ON:
+            if count == 21 and sum(drawn) == 2:
+                probabilities[OUTCOMES.index("blackjack")] = 1.0
+            else:
+                probabilities[count - _STANDS_ON] = 1.0
+        else:
+            left = sum(shoe) - sum(drawn)
+            for idx, n in enumerate(drawn):
+                if shoe[idx] > n:
+                    more = drawn[:idx] + (n + 1,) + drawn[idx + 1 :]
+                    probabilities += (shoe[idx] - n) / left * play(more)
+
+        memo[drawn] = probabilities
+        return probabilities
+
+    drawn = [0] * len(UP_CARDS)
+    drawn[up - 2] = 1
+    return play(tuple(drawn))
+
+
+def build() -> np.ndarray:
+    """Function which computes the table of the probabilities of the outcomes
+    of the dealer's hand.
+
+    Returns
+    ----------
+    np.ndarray, the table with axes: ace rule (see ACE_LIMITS), shoe size
+    (see Deck.multipliers), face-up card (see UP_CARDS) and outcome (see OUTCOMES).
+    """
+    table = np.zeros(_SHAPE, dtype=np.float32)
+
+    for i, ace_limit in enumerate(ACE_LIMITS):
+        for j, decks in enumerate(Deck.multipliers):
+            for k, up in enumerate(UP_CARDS):
+                table[i, j, k] = outcome_probabilities(up, decks, ace_limit)
+
+    return table
+
+
+class DealerOdds:
+    """Class which looks up the probabilities of the outcomes of the dealer's hand.
+
+    Attributes
+    ----------
+    table: np.ndarray
+        Probabilities of the outcomes (see build()).
+
+    Methods
+    ----------
+    load(path: str = PATH) -> DealerOdds:
+        Class method which memory-maps the table, building it if needed.
+
+    probabilities(rules: Rules, up: int) -> np.ndarray:
+        Returns the probability of every outcome for a face-up card.
+
+    bust(rules: Rules, up: int) -> float:
+        Returns the probability of the dealer busting.
+
+    expected_value(rules: Rules, p_count: int, up: int) -> float:
+        Returns the expected value per unit bet of standing on a count.
+
+    sampler(rules: Rules) -> List[List[float]]:
+        Returns the cumulative probabilities used by sample().
+
+    sample(cumulative: List[float], u: float) -> int:
+        Static method which draws the dealer's final count.
+    """
+
+    def __init__(self, table: np.ndarray) -> None:
+        """
+        Arguments
+        ----------
+        table: Probabilities of the outcomes (see build()).
+
+        Raises
+        ----------
+        ValueError, when table does not have the shape of the ones built by build().
+        """
+        if table.shape != _SHAPE:
+            raise ValueError(f"table must have a shape of {_SHAPE}.")
+
+        self.table = table
+
+    @classmethod
+    def load(cls, path: str = PATH) -> DealerOdds:
+        """Class method which memory-maps the table stored in a file.
+
+        When the file is missing or does not hold a table, the table is
+        built and saved to it. If it cannot be saved, it is kept in memory.
+
+        Arguments
+        ----------
+        path: Path to the NumPy file. Defaults to the one shipped with the package.
+        """
+        try:
+            return cls(np.load(path, mmap_mode="r"))
+        except (OSError, ValueError):
+            pass
+
+        table = build()
+        try:
+            np.save(path, table)
+        except OSError:
+            return cls(table)
+
+        return cls(np.load(path, mmap_mode="r"))
+
+    def _row(self, rules: Rules) -> np.ndarray:
+        """Method which returns the probabilities of the outcomes for a rule set,
+        for every face-up card.
+
+        Raises
+        ----------
+        ValueError, when the table has no probabilities for the rule set.
+        """
+        if (
+            rules.dealer_ace_limit not in ACE_LIMITS
+            or rules.decks not in Deck.multipliers
+        ):
+            raise ValueError(
+                f"Dealer odds need an ace limit in {ACE_LIMITS} "
+                f"and decks in {Deck.multipliers}."
+            )
+        if rules.dealer_stands_on != _STANDS_ON:
+            raise ValueError(f"Dealer odds need a dealer standing on {_STANDS_ON}.")
+
+        i = ACE_LIMITS.index(rules.dealer_ace_limit)
+        j = Deck.multipliers.index(rules.decks)
+        return self.table[i, j]
+
+    def probabilities(self, rules: Rules, up: int) -> np.ndarray:
+        """Method which returns the probability of every outcome for a face-up card.
+
+        Arguments
+        ----------
+        rules: Rules the dealer plays under.
+
+        up: Value of the dealer's face-up card, with an ace being 11.
+
+        Returns
+        ----------
+        np.ndarray, the probability of every outcome in OUTCOMES.
+
+        Raises
+        ----------
+        ValueError, when the table has no probabilities for the rule set.
+        """
+        return np.asarray(self._row(rules)[up - 2])
+
+    def bust(self, rules: Rules, up: int) -> float:
+        """Method which returns the probability of the dealer busting
+        for a face-up card.
+
+        Arguments
+        ----------
+        rules: Rules the dealer plays under.
+
+        up: Value of the dealer's face-up card, with an ace being 11.
+        """
+        probabilities = self.probabilities(rules, up)
+        return float(sum(p for p, n in zip(probabilities, FINAL_COUNTS) if n > 21))
+
+    def expected_value(self, rules: Rules, p_count: int, up: int) -> float:
+        """Method which returns the expected value per unit bet of standing
+        on a count, without a natural.
+
+        Arguments
+        ----------
+        rules: Rules the round is played under.
+
+        p_count: Final count of the player.
+
+        up: Value of the dealer's face-up card, with an ace being 11.
+        """
+        payout = rules.blackjack_payout
+        return float(
+            sum(
+                p * settle(p_count, d_count, natural=False, payout=payout)
+                for p, d_count in zip(self.probabilities(rules, up), FINAL_COUNTS)
+            )
+        )
+
+    def sampler(self, rules: Rules) -> List[List[float]]:
+        """Method which returns the cumulative probabilities of the outcomes
+        for every face-up card, as plain lists for sample().
+
+        Arguments
+        ----------
+        rules: Rules the dealer plays under.
+        """
+        return np.cumsum(self._row(rules), axis=1, dtype=float).tolist()
+
+    @staticmethod
+    def sample(cumulative: List[float], u: float) -> int:
+        """Static method which draws the dealer's final count.
+
+        Arguments
+        ----------
+        cumulative: Cumulative probabilities of a face-up card (see sampler()).
+
+        u: Uniform random number in [0, 1).
+
+        Returns
+        ----------
+        int, the final count.
+        """
+        idx = bisect.bisect_right(cumulative, u * cumulative[-1])
+        return FINAL_COUNTS[min(idx, len(FINAL_COUNTS) - 1)]
+
+
+_ODDS: Optional[DealerOdds] = None
+
+
+def dealer_odds() -> DealerOdds:
+    """Function which returns the table shipped with the package,
+    memory-mapping it the first time."""
+    global _ODDS
+    if _ODDS is None:
+        _ODDS = DealerOdds.load()
+    return _ODDS
+
+
+def main() -> None:
+    """Function which rebuilds the table shipped with the package."""
+    np.save(PATH, build())
+    console.print(f"Saved the dealer odds to {PATH}.")
+
+
+if __name__ == "__main__":
+    main()
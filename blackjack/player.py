@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from typing import List, Optional, Union
+from decimal import Decimal
+from typing import TYPE_CHECKING, List, Optional, Union
 
 from rich.prompt import FloatPrompt
 
 from .console import console
 from .deck import Card
+from .money import to_dollars
+
+if TYPE_CHECKING:
+    from .store import AccountStore
 
 
 class _GenericPlayer:
@@ -33,6 +38,9 @@ class _GenericPlayer:
     has_busted() -> bool:
         Returns True if the count of value of the current hand
         is greater than 21.
+
+    is_soft() -> bool:
+        Returns True if an ace in the current hand is counted as 11.
     """
 
     def __init__(self) -> None:
@@ -81,6 +89,17 @@ class _GenericPlayer:
         """Method to check if the player has exceeded a count value of 21."""
         return self.count() > 21
 
+    def is_soft(self, ace_limit: int = 21) -> bool:
+        """Method to check if an ace in the hand is counted as 11.
+
+        Arguments
+        ----------
+        ace_limit: Count value up to which aces should be counted as 11.
+        Defaults to 21.
+        """
+        hard = sum(card.value(ace=1) for card in self.hand)
+        return self.count(ace_limit=ace_limit) != hard
+
     def clear_hand(self) -> None:
         """Method to reset the player's hand to an empty hand."""
         self.hand.clear()
@@ -98,67 +117,127 @@ class Player(_GenericPlayer):
     name: str
         Name of the player.
 
-    bankroll: float
-        Amount of money (in dollars) the player has with them.
+    bankroll: Decimal
+        Amount of money (in dollars) the player has with them, exact to the
+        cent. Amounts assigned to it are rounded to the cent.
+
+    rounds: int
+        Number of rounds the player has played.
+
+    store: AccountStore or None
+        Store where the account of the player is persisted. None when
+        the account is not persisted.
 
     Methods
     ----------
-    from_input() -> Player:
+    from_input(store: AccountStore = None) -> Player:
         Class method which creates a Player instance from user-input.
 
-    pay(amount: float) -> None:
+    pay(amount: Union[float, Decimal]) -> None:
         Pays the given amount to the player.
 
-    bet(amount: float) -> None:
+    bet(amount: Union[float, Decimal]) -> None:
         Deducts the given amount from the player's bankroll.
     """
 
-    def __init__(self, name: str, bankroll: float) -> None:
+    def __init__(
+        self,
+        name: str,
+        bankroll: Union[float, Decimal],
+        rounds: int = 0,
+        store: AccountStore = None,
+    ) -> None:
         """
         Arguments
         ----------
         name: Name of the player.
 
         bankroll: Amount of money player has with them.
+
+        rounds: Number of rounds the player has played. Defaults to 0.
+
+        store: Store where every bet and payout of the player should be
+        recorded. The account must already exist in the store. Defaults to None.
         """
         self.name = name
         self.bankroll = bankroll
+        self.rounds = rounds
+        self.store = store
         super().__init__()
 
     @classmethod
-    def from_input(cls) -> Player:
+    def from_input(cls, store: AccountStore = None) -> Player:
         """Class method which creates a Player instance from user-input
 
+        When a store is given and it has an account with the inputted name,
+        the bankroll is taken from the account instead of being asked.
+        Otherwise, a new account is created in the store.
+
+        Arguments
+        ----------
+        store: Store where the account of the player is persisted.
+        Defaults to None.
+
         Returns
         ----------
         A Player instance with the inputted name and bankroll.
         """
         name = console.input("What should we call you? ")
+
+        if store is not None and (account := store.load(name)) is not None:
+            bankroll, rounds = account
+            console.print(
+                f"[green]Welcome back, {name}! "
+                f"You have ${bankroll} after {rounds} rounds.[/green]"
+            )
+            return cls(name=name, bankroll=bankroll, rounds=rounds, store=store)
+
         console.print(f"[green]Hi, {name}![/green]")
 
         bankroll = FloatPrompt.ask("How much money will you be playing with? ($)")
 
-        return cls(name=name, bankroll=bankroll)
+        if store is not None:
+            store.create(name=name, bankroll=bankroll)
 
-    def pay(self, amount: float) -> None:
+        return cls(name=name, bankroll=bankroll, store=store)
+
+    @property
+    def bankroll(self) -> Decimal:
+        """Amount of money the player has with them."""
+        return self._bankroll
+
+    @bankroll.setter
+    def bankroll(self, amount: Union[float, Decimal]) -> None:
+        self._bankroll = to_dollars(amount)
+
+    def pay(self, amount: Union[float, Decimal]) -> None:
         """Method which pays the given amount to the player,
         adding it to their bankroll.
 
         Arguments
         ----------
-        amount: Amount to be paid.
+        amount: Amount to be paid. It is rounded to the cent, like the
+        store does, so the bankroll always matches the stored one.
         """
+        amount = to_dollars(amount)
         self.bankroll += amount
 
-    def bet(self, amount: float) -> None:
+        if self.store is not None:
+            self.store.record(self.name, self.rounds, kind="pay", amount=amount)
+
+    def bet(self, amount: Union[float, Decimal]) -> None:
         """Method which deducts the given amount from the player's bankroll.
 
         Arguments
         ----------
-        amount: Amount that should be deducted.
+        amount: Amount that should be deducted. It is rounded to the cent.
         """
+        amount = to_dollars(amount)
         self.bankroll -= amount
 
+        if self.store is not None:
+            self.store.record(self.name, self.rounds, kind="bet", amount=amount)
+
 
 class Dealer(_GenericPlayer):
     """Class which represents a dealer.
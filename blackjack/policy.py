@@ -0,0 +1,264 @@
+"""
+Module which implements policies, which make the decisions of a player.
+
+A policy is given the state of the player's hand, the value of the dealer's
+face-up card and, optionally, the true count, and returns a move. It also
+decides how much to bet at the start of each round. Policies can drive
+a Game (see Game's policy argument) or headless simulations (see
+simulation.Simulator).
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+from .game import _Move
+
+if TYPE_CHECKING:
+    from .betting import BetRamp
+    from .player import Dealer, Player
+
+H, S, D = _Move.HIT, _Move.STAND, _Move.DOUBLE
+
+
+class HandState(NamedTuple):
+    """Class to represent the state of the player's hand when making a move.
+
+    Attributes
+    ----------
+    total: int
+        Count value of the hand (see _GenericPlayer.count()).
+
+    soft: bool
+        Indicates whether an ace in the hand is counted as 11.
+
+    n_cards: int
+        Number of cards in the hand.
+
+    can_double: bool
+        Indicates whether the "Double" move is allowed.
+    """
+
+    total: int
+    soft: bool
+    n_cards: int
+    can_double: bool
+
+
+class Policy:
+    """Base class for policies.
+
+    Subclasses must implement decide() and can override bet().
+
+    Attributes
+    ----------
+    name: str
+        Name of the policy, used in leaderboards.
+
+    unit: float
+        Amount of money bet every round by the default bet().
+
+    Methods
+    ----------
+    decide(hand: HandState, dealer_up: int, true_count: float = None) -> _Move:
+        Returns the move to make.
+
+    bet(bankroll: float, true_count: float = None) -> float:
+        Returns the amount of money to bet at the start of a round.
+
+    move(player: Player, dealer: Dealer, double: bool = False) -> _Move:
+        Returns the move to make in a Game.
+
+    reseed(seed: int) -> None:
+        Re-seeds the random number generator of the policy, if it has one.
+    """
+
+    name = "policy"
+
+    def __init__(self, unit: float = 1.0) -> None:
+        """
+        Arguments
+        ----------
+        unit: Amount of money bet every round by the default bet(). Defaults to 1.
+        """
+        self.unit = unit
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(unit={self.unit})"
+
+    def decide(
+        self, hand: HandState, dealer_up: int, true_count: Optional[float] = None
+    ) -> _Move:
+        """Method which returns the move to make.
+
+        Arguments
+        ----------
+        hand: State of the player's hand.
+
+        dealer_up: Value of the dealer's face-up card, with an ace being 11.
+
+        true_count: True count of the shoe, when it is known. Defaults to None.
+        """
+        raise NotImplementedError
+
+    def bet(self, bankroll: float, true_count: Optional[float] = None) -> float:
+        """Method which returns the amount of money to bet at the start of a round.
+
+        Arguments
+        ----------
+        bankroll: Amount of money the player has.
+
+        true_count: True count of the shoe, when it is known. Defaults to None.
+        """
+        return min(self.unit, bankroll)
+
+    def move(self, player: Player, dealer: Dealer, double: bool = False) -> _Move:
+        """Method which returns the move to make in a Game.
+
+        Arguments
+        ----------
+        player: Player making the move.
+
+        dealer: Dealer of the game.
+
+        double: Indicates whether the "Double" move is allowed. Defaults to False.
+        """
+        hand = HandState(
+            total=player.count(),
+            soft=player.is_soft(),
+            n_cards=len(player.hand),
+            can_double=double,
+        )
+        return self.decide(hand, dealer.face_up.value())
+
+    def reseed(self, seed: int) -> None:
+        """Method which re-seeds the random number generator of the policy.
+
+        It is called with the seed of every chunk of rounds played in parallel
+        so that the chunks do not repeat the same decisions. Policies without
+        randomness ignore it.
+
+        Arguments
+        ----------
+        seed: Seed of the chunk.
+        """
+
+
+def _row(double: Tuple[int, ...] = (), stand: Tuple[int, ...] = ()) -> Dict[int, _Move]:
+    """Function which creates a row of the strategy table, mapping the values
+    of the dealer's face-up card to moves. Values not listed are hits.
+    """
+    return {up: D if up in double else S if up in stand else H for up in range(2, 12)}
+
+
+# Basic strategy for hitting, standing and doubling (no splits or surrender),
+# keyed by the count value of the hand and then the value of the face-up card
+_HARD_TABLE = {
+    9: _row(double=(3, 4, 5, 6)),
+    10: _row(double=tuple(range(2, 10))),
+    11: _row(double=tuple(range(2, 11))),
+    12: _row(stand=(4, 5, 6)),
+    **{total: _row(stand=(2, 3, 4, 5, 6)) for total in range(13, 17)},
+}
+
+_SOFT_TABLE = {
+    13: _row(double=(5, 6)),
+    14: _row(double=(5, 6)),
+    15: _row(double=(4, 5, 6)),
+    16: _row(double=(4, 5, 6)),
+    17: _row(double=(3, 4, 5, 6)),
+    18: _row(double=(3, 4, 5, 6), stand=(2, 7, 8)),
+}
+
+
+class BasicStrategy(Policy):
+    """Class which plays basic strategy for hitting, standing and doubling.
+
+    It bets according to a bet ramp when one is given and the true count
+    is known, and flat bets a unit otherwise.
+    """
+
+    name = "basic-strategy"
+
+    def __init__(self, unit: float = 1.0, ramp: BetRamp = None) -> None:
+        """
+        Arguments
+        ----------
+        unit: Amount of money bet every round when there is no ramp. Defaults to 1.
+
+        ramp: Bet ramp used when the true count is known. Defaults to None.
+        """
+        super().__init__(unit=unit)
+        self.ramp = ramp
+
+    def decide(
+        self, hand: HandState, dealer_up: int, true_count: Optional[float] = None
+    ) -> _Move:
+        table = _SOFT_TABLE if hand.soft else _HARD_TABLE
+
+        if (row := table.get(hand.total)) is None:
+            move = S if hand.total >= 17 else H
+        else:
+            move = row[dealer_up]
+
+        if move is D and not hand.can_double:
+            # Soft 18 stands when it cannot double, everything else hits
+            return S if hand.soft and hand.total == 18 else H
+
+        return move
+
+    def bet(self, bankroll: float, true_count: Optional[float] = None) -> float:
+        if self.ramp is None or true_count is None:
+            return super().bet(bankroll=bankroll)
+        return min(self.ramp.bet(math.floor(true_count)), bankroll)
+
+
+class DealerMimic(Policy):
+    """Class which plays like the dealer: hit until the count is at least 17."""
+
+    name = "dealer-mimic"
+
+    def decide(
+        self, hand: HandState, dealer_up: int, true_count: Optional[float] = None
+    ) -> _Move:
+        return H if hand.total < 17 else S
+
+
+class AlwaysStand(Policy):
+    """Class which always stands."""
+
+    name = "always-stand"
+
+    def decide(
+        self, hand: HandState, dealer_up: int, true_count: Optional[float] = None
+    ) -> _Move:
+        return S
+
+
+class RandomPolicy(Policy):
+    """Class which picks a move uniformly at random among the allowed ones."""
+
+    name = "random"
+
+    def __init__(self, unit: float = 1.0, seed: int = None) -> None:
+        """
+        Arguments
+        ----------
+        unit: Amount of money bet every round. Defaults to 1.
+
+        seed: Seed for the random number generator. Defaults to None.
+        """
+        super().__init__(unit=unit)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def reseed(self, seed: int) -> None:
+        # Derived from both seeds so that differently seeded policies stay apart
+        self.rng.seed(f"{self.seed}/{seed}")
+
+    def decide(
+        self, hand: HandState, dealer_up: int, true_count: Optional[float] = None
+    ) -> _Move:
+        return self.rng.choice((H, S, D) if hand.can_double else (H, S))
@@ -0,0 +1,453 @@
+"""
+Module which implements a columnar store for the results of simulations.
+
+Every decision made by a player is a row with the state it was made in
+(the player's count, whether the hand is soft, the value of the dealer's
+face-up card and the true count bin), the move, and the outcome and result
+of the round it belongs to. Each column is a NumPy .npy file, memory-mapped
+and grown geometrically as rows are added.
+
+While rows are ingested, aggregate cubes indexed by
+(count, soft, face-up card, move, true count bin) are kept up to date with
+the number of rows per outcome and the sum and sum of squares of the
+results, so pivot queries on those keys never scan the rows.
+
+Usage:
+
+    with ResultsStore("results") as store:
+        Simulator(policy=BasicStrategy(), results=store).run(1_000_000)
+        table = store.pivot(by=("total", "up"), soft=False, move=_Move.HIT)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from .game import _Move
+from .simulation import Outcome
+
+_VERSION = 1
+
+_MOVES = tuple(_Move)
+
+# Columns of the store and their types
+COLUMNS = {
+    "round": np.int64,
+    "total": np.int8,
+    "soft": np.bool_,
+    "up": np.int8,
+    "move": np.int8,
+    "tc_bin": np.int8,
+    "outcome": np.int8,
+    "result": np.float32,
+}
+
+# Dimensions of the cubes, in order. The last one is the true count bin,
+# whose size depends on the range of bins of the store.
+DIMENSIONS = ("total", "soft", "up", "move", "tc_bin")
+
+_CUBES = ("n", "sum", "sum_sq")
+
+
+class Pivot(NamedTuple):
+    """Class to represent the result of a pivot query.
+
+    Cells without any row have an EV and a variance of NaN.
+
+    Attributes
+    ----------
+    by: tuple
+        Names of the dimensions of the arrays.
+
+    labels: tuple
+        Labels of each dimension, e.g. the counts for "total" or the
+        moves for "move".
+
+    n: np.ndarray
+        Number of decisions in each cell.
+
+    ev: np.ndarray
+        Mean result per unit bet of the rounds the decisions belong to.
+
+    variance: np.ndarray
+        Variance of the results.
+
+    frequencies: np.ndarray
+        Fraction of the decisions in each cell that ended with each outcome,
+        along an extra trailing dimension indexed by Outcome.
+    """
+
+    by: Tuple[str, ...]
+    labels: Tuple[tuple, ...]
+    n: np.ndarray
+    ev: np.ndarray
+    variance: np.ndarray
+    frequencies: np.ndarray
+
+
+class ResultsStore:
+    """Class which stores the decisions of simulated rounds in columns.
+
+    Rows are buffered in memory and written to the columns, and to the
+    cubes, every chunk_size rows and on flush().
+
+    Attributes
+    ----------
+    path: str
+        Path to the directory of the store.
+
+    tc_low: int
+        Lowest true count bin. Lower true counts are put in this bin.
+
+    tc_high: int
+        Highest true count bin. Higher true counts are put in this bin.
+
+    chunk_size: int
+        Number of rows buffered before they are written.
+
+    rounds: int
+        Number of rounds added to the store.
+
+    Methods
+    ----------
+    add_round(decisions: list, outcome: Outcome, result: float) -> None:
+        Adds the decisions made in a round.
+
+    extend(columns: Dict[str, np.ndarray]) -> None:
+        Adds rows given as whole columns.
+
+    column(name: str) -> np.ndarray:
+        Returns a read-only view of a column.
+
+    pivot(by: Sequence[str] = ("total", "up"), **where) -> Pivot:
+        Aggregates the cubes along some dimensions.
+
+    flush() -> None:
+        Writes the buffered rows to disk.
+
+    close() -> None:
+        Flushes the store and releases the memory-mapped files.
+    """
+
+    def __init__(
+        self, path: str, tc_low: int = -5, tc_high: int = 5, chunk_size: int = 65_536
+    ) -> None:
+        """
+        Arguments
+        ----------
+        path: Path to the directory of the store. It is created if it does
+        not exist, in which case it uses tc_low and tc_high. Otherwise, the
+        existing store is opened with its own range of bins.
+
+        tc_low: Lowest true count bin. Defaults to -5.
+
+        tc_high: Highest true count bin. Defaults to 5.
+
+        chunk_size: Number of rows buffered before they are written.
+        Defaults to 65,536.
+
+        Raises
+        ----------
+        ValueError, when the store at path has an unsupported version.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+
+        os.makedirs(path, exist_ok=True)
+
+        if os.path.exists(meta := self._file("meta.json")):
+            with open(meta, encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if meta["version"] != _VERSION:
+                raise ValueError(f"Unsupported store version: {meta['version']}.")
+
+            self.tc_low, self.tc_high = meta["tc_low"], meta["tc_high"]
+            self.rounds = meta["rounds"]
+            self._length, self._capacity = meta["length"], meta["capacity"]
+        else:
+            self.tc_low, self.tc_high = tc_low, tc_high
+            self.rounds = 0
+            self._length, self._capacity = 0, 0
+
+        self._columns: Dict[str, np.memmap] = {}
+        if self._capacity:
+            for name in COLUMNS:
+                self._columns[name] = np.load(self._file(f"{name}.npy"), mmap_mode="r+")
+
+        self._shape = (22, 2, 12, len(_MOVES), self.tc_high - self.tc_low + 1)
+        self._cubes: Dict[str, np.ndarray] = {}
+        for name in _CUBES:
+            if os.path.exists(cube := self._file(f"cube_{name}.npy")):
+                self._cubes[name] = np.load(cube)
+            else:
+                shape = self._shape + (len(Outcome),) if name == "n" else self._shape
+                self._cubes[name] = np.zeros(shape, np.int64 if name == "n" else float)
+
+        self._buffer: Dict[str, list] = {name: [] for name in COLUMNS}
+
+    def __len__(self) -> int:
+        return self._length + len(self._buffer["round"])
+
+    def __enter__(self) -> ResultsStore:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _file(self, name: str) -> str:
+        """Method which returns the path to a file of the store."""
+        return os.path.join(self.path, name)
+
+    def add_round(
+        self,
+        decisions: List[Tuple[int, bool, int, _Move, int]],
+        outcome: Outcome,
+        result: float,
+    ) -> None:
+        """Method which adds the decisions made in a round.
+
+        A round without decisions (e.g. a natural) only counts towards rounds.
+
+        Arguments
+        ----------
+        decisions: Five-tuples with the count of the player, whether their
+        hand is soft, the value of the dealer's face-up card, the move and
+        the true count bin, in the order the moves were made.
+
+        outcome: Outcome of the round.
+
+        result: Net amount won (positive) or lost (negative) per unit bet,
+        including doubling.
+        """
+        buffer = self._buffer
+
+        for total, soft, up, move, tc_bin in decisions:
+            buffer["round"].append(self.rounds)
+            buffer["total"].append(total)
+            buffer["soft"].append(soft)
+            buffer["up"].append(up)
+            buffer["move"].append(_MOVES.index(move))
+            buffer["tc_bin"].append(tc_bin)
+            buffer["outcome"].append(outcome)
+            buffer["result"].append(result)
+
+        self.rounds += 1
+
+        if len(buffer["round"]) >= self.chunk_size:
+            self._write_buffer()
+
+    def extend(self, columns: Dict[str, np.ndarray]) -> None:
+        """Method which adds rows given as whole columns.
+
+        The rounds of the rows are not checked, so the number of rounds of
+        the store is only updated to cover the highest one.
+
+        Arguments
+        ----------
+        columns: Mapping between every column of the store (see COLUMNS)
+        and its values. Moves are indices in _Move, and true count bins
+        are clamped to the range of the store.
+
+        Raises
+        ----------
+        ValueError, when a column is missing or the columns have different lengths.
+        """
+        if missing := set(COLUMNS) - set(columns):
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing))}.")
+
+        arrays = {
+            name: np.asarray(columns[name]).astype(dtype, copy=False)
+            for name, dtype in COLUMNS.items()
+        }
+        if len({len(array) for array in arrays.values()}) > 1:
+            raise ValueError("All columns must have the same length.")
+
+        if not (k := len(arrays["round"])):
+            return
+
+        arrays["tc_bin"] = np.clip(arrays["tc_bin"], self.tc_low, self.tc_high)
+
+        self._reserve(self._length + k)
+        for name, array in arrays.items():
+            self._columns[name][self._length : self._length + k] = array
+        self._length += k
+
+        self.rounds = max(self.rounds, int(arrays["round"].max()) + 1)
+        self._update_cubes(arrays)
+
+    def _write_buffer(self) -> None:
+        """Method which writes the buffered rows to the columns and the cubes."""
+        buffer, self._buffer = self._buffer, {name: [] for name in COLUMNS}
+        self.extend(buffer)
+
+    def _reserve(self, length: int) -> None:
+        """Method which grows the columns so that they can hold length rows.
+
+        The capacity at least doubles every time, so adding rows takes
+        amortized constant time.
+        """
+        if length <= self._capacity:
+            return
+
+        capacity = max(length, 2 * self._capacity, self.chunk_size)
+
+        for name, dtype in COLUMNS.items():
+            tmp = self._file(f"{name}.npy.tmp")
+            column = np.lib.format.open_memmap(
+                tmp, mode="w+", dtype=dtype, shape=(capacity,)
+            )
+            if (old := self._columns.pop(name, None)) is not None:
+                column[: self._length] = old[: self._length]
+            column.flush()
+
+            # Release the mappings before the file is replaced
+            del column, old
+            os.replace(tmp, self._file(f"{name}.npy"))
+            self._columns[name] = np.load(self._file(f"{name}.npy"), mmap_mode="r+")
+
+        self._capacity = capacity
+
+    def _update_cubes(self, arrays: Dict[str, np.ndarray]) -> None:
+        """Method which adds rows to the cubes."""
+        index = np.ravel_multi_index(
+            (
+                arrays["total"],
+                arrays["soft"],
+                arrays["up"],
+                arrays["move"],
+                arrays["tc_bin"].astype(np.intp) - self.tc_low,
+            ),
+            self._shape,
+        )
+        size = int(np.prod(self._shape))
+        result = arrays["result"].astype(float)
+
+        by_outcome = index * len(Outcome) + arrays["outcome"]
+        n = np.bincount(by_outcome, minlength=size * len(Outcome))
+
+        self._cubes["n"] += n.reshape(self._cubes["n"].shape)
+        self._cubes["sum"] += np.bincount(index, result, size).reshape(self._shape)
+        self._cubes["sum_sq"] += np.bincount(index, result**2, size).reshape(
+            self._shape
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """Method which returns a read-only view of a column.
+
+        Buffered rows are written first.
+
+        Arguments
+        ----------
+        name: Name of the column (see COLUMNS).
+        """
+        self._write_buffer()
+
+        if not self._length:
+            return np.empty(0, dtype=COLUMNS[name])
+
+        view = self._columns[name][: self._length].view(np.ndarray)
+        view.flags.writeable = False
+        return view
+
+    def labels(self, dimension: str) -> tuple:
+        """Method which returns the labels of a dimension of the cubes.
+
+        Arguments
+        ----------
+        dimension: Name of the dimension (see DIMENSIONS).
+        """
+        if dimension == "soft":
+            return (False, True)
+        if dimension == "move":
+            return _MOVES
+        if dimension == "tc_bin":
+            return tuple(range(self.tc_low, self.tc_high + 1))
+        return tuple(range(self._shape[DIMENSIONS.index(dimension)]))
+
+    def pivot(
+        self, by: Sequence[str] = ("total", "up"), **where: Union[int, bool, _Move]
+    ) -> Pivot:
+        """Method which aggregates the cubes along some dimensions.
+
+        Arguments
+        ----------
+        by: Dimensions (see DIMENSIONS) to keep, in the order of the axes of
+        the returned arrays. The other dimensions are summed over.
+        Defaults to ("total", "up").
+
+        where: Values to restrict the dimensions to before aggregating,
+        e.g. soft=False or move=_Move.HIT.
+
+        Raises
+        ----------
+        ValueError, when a dimension is unknown or a value is out of range.
+        """
+        self._write_buffer()
+
+        if unknown := (set(by) | set(where)) - set(DIMENSIONS):
+            raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}.")
+
+        selection: List[Union[int, slice]] = [slice(None)] * len(DIMENSIONS)
+        for dimension, value in where.items():
+            try:
+                selection[DIMENSIONS.index(dimension)] = self.labels(dimension).index(
+                    value
+                )
+            except ValueError:
+                raise ValueError(f"{value!r} is not a value of {dimension}.")
+
+        kept = [d for d in DIMENSIONS if d not in where]
+        summed = tuple(kept.index(d) for d in kept if d not in by)
+
+        by = tuple(d for d in by if d in kept)
+        remaining = [d for d in kept if d in by]
+        order = [remaining.index(d) for d in by]
+
+        def aggregate(cube: np.ndarray) -> np.ndarray:
+            cube = cube[tuple(selection)].sum(axis=summed)
+            return np.moveaxis(cube, order, range(len(order)))
+
+        counts = aggregate(self._cubes["n"])
+        n = counts.sum(axis=-1)
+        total, total_sq = aggregate(self._cubes["sum"]), aggregate(
+            self._cubes["sum_sq"]
+        )
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ev = total / n
+            variance = np.maximum(total_sq / n - ev**2, 0.0)
+            frequencies = counts / n[..., np.newaxis]
+
+        labels = tuple(self.labels(d) for d in by)
+        return Pivot(by, labels, n, ev, variance, frequencies)
+
+    def flush(self) -> None:
+        """Method which writes the buffered rows, the cubes and the metadata to disk."""
+        self._write_buffer()
+
+        for column in self._columns.values():
+            column.flush()
+
+        for name, cube in self._cubes.items():
+            np.save(self._file(f"cube_{name}.npy"), cube)
+
+        meta = {
+            "version": _VERSION,
+            "tc_low": self.tc_low,
+            "tc_high": self.tc_high,
+            "rounds": self.rounds,
+            "length": self._length,
+            "capacity": self._capacity,
+        }
+        with open(self._file("meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def close(self) -> None:
+        """Method which flushes the store and releases the memory-mapped files."""
+        self.flush()
+        self._columns = {}
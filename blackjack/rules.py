@@ -0,0 +1,54 @@
+"""
+Module which stores the rule set used by headless simulations.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+
+class Rules(NamedTuple):
+    """Class to represent the rules a table is played under.
+
+    The defaults reproduce the rules implemented by Game.
+
+    Attributes
+    ----------
+    decks: int
+        Size of the shoe in terms of a 52-card deck. Must be one
+        of Deck.multipliers. Defaults to 1.
+
+    penetration: float
+        Fraction of the shoe dealt before it is reshuffled. Defaults to 0.75.
+
+    blackjack_payout: float
+        Amount paid per unit bet on a natural. Defaults to 1.5.
+
+    dealer_ace_limit: int
+        Count value up to which the dealer counts an ace as 11.
+        Defaults to 17, which is what Dealer.count() uses.
+
+    dealer_stands_on: int
+        Count value at which the dealer stops hitting. Defaults to 17.
+
+    Methods
+    ----------
+    key() -> str:
+        Returns a string which uniquely identifies the rule set.
+    """
+
+    decks: int = 1
+    penetration: float = 0.75
+    blackjack_payout: float = 1.5
+    dealer_ace_limit: int = 17
+    dealer_stands_on: int = 17
+
+    def key(self) -> str:
+        """Method which returns a string uniquely identifying the rule set.
+
+        It is suitable for use as a cache key.
+        """
+        return (
+            f"d{self.decks}-p{self.penetration}-bj{self.blackjack_payout}"
+            f"-a{self.dealer_ace_limit}-s{self.dealer_stands_on}"
+        )
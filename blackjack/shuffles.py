@@ -0,0 +1,706 @@
+"""
+Module which implements models of non-random shuffles and a shuffle tracker.
+
+A shuffle model permutes a discard pile the way a dealer or a machine does,
+so the order the cards were played in partly survives the shuffle: a slug
+of high cards stays partly together and lands in a predictable part of the
+next shoe. Piles are arrays ordered from the bottom, so the last card is
+dealt first, like Deck and Simulator do.
+
+Models work on a batch of piles at once (one per row) with NumPy. Each one
+draws random labels for the cards and sorts by them:
+- Riffle: the Gilbert-Shannon-Reeds model, in grabs of cards
+- Strip: packets taken off the top and stacked, reversing their order
+- Cut: the pile cut near its middle
+- ContinuousShuffler: cards dropped on the random shelves of a machine
+
+A ShuffleTracker learns where a model sends each segment of the discard
+pile, and predicts the count of every segment of the next shoe from the
+counts of the pile. predictability() scores how well it does, and
+tracking_edge() simulates how much edge a tracker gains by betting on the
+predictions. Run it from the command line:
+
+    $ python -m blackjack.shuffles --model casino --decks 6 --rounds 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+from typing import Dict, List, NamedTuple, Sequence, TypeVar
+
+import numpy as np
+from rich.table import Table
+
+from .betting import BetRamp
+from .console import console
+from .counting import HI_LO, CountingSystem
+from .deck import Deck
+from .policy import BasicStrategy
+from .rules import Rules
+from .simulation import Simulator
+
+T = TypeVar("T")
+
+
+class ShuffleModel:
+    """Base class for shuffle models.
+
+    Subclasses permute a batch of piles in _permute().
+
+    Attributes
+    ----------
+    name: str
+        Name of the model.
+
+    Methods
+    ----------
+    __call__(piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        Returns shuffled copies of piles.
+
+    apply(pile: Sequence[T], rng: random.Random) -> List[T]:
+        Returns a shuffled copy of a pile of any objects.
+    """
+
+    name = "shuffle"
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+    def __call__(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Method which returns shuffled copies of piles.
+
+        Arguments
+        ----------
+        piles: A single pile, or a batch of piles with one pile per row,
+        ordered from the bottom.
+
+        rng: Random number generator used to shuffle.
+        """
+        piles = np.asarray(piles)
+        return self._permute(np.atleast_2d(piles), rng).reshape(piles.shape)
+
+    def _permute(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Method which returns shuffled copies of a batch of piles.
+
+        Arguments
+        ----------
+        piles: Piles to shuffle, one per row.
+
+        rng: Random number generator used to shuffle.
+        """
+        raise NotImplementedError
+
+    def apply(self, pile: Sequence[T], rng: random.Random) -> List[T]:
+        """Method which returns a shuffled copy of a pile of any objects.
+
+        Arguments
+        ----------
+        pile: Pile to shuffle, ordered from the bottom.
+
+        rng: Random number generator the generator used to shuffle is
+        seeded from, so seeded decks and simulators stay reproducible.
+        """
+        order = self(np.arange(len(pile)), np.random.default_rng(rng.getrandbits(64)))
+        return [pile[idx] for idx in order.tolist()]
+
+
+def _sort_by(piles: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Function which reorders every pile by keys, keeping the order of the
+    cards with equal keys."""
+    return np.take_along_axis(piles, np.argsort(keys, axis=1, kind="stable"), axis=1)
+
+
+class Uniform(ShuffleModel):
+    """Class which implements a perfect shuffle, in which every order is
+    equally likely."""
+
+    name = "uniform"
+
+    def _permute(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return rng.permuted(piles, axis=1)
+
+
+class Riffle(ShuffleModel):
+    """Class which implements riffle shuffles with the Gilbert-Shannon-Reeds model.
+
+    Each riffle cuts the cards binomially and drops them from either half
+    with a probability proportional to the size of the half. k riffles are
+    the inverse of labelling every card with k random bits and sorting by
+    the labels, which is what is done here.
+
+    A shoe is too big to riffle at once, so it is riffled in grabs of
+    consecutive cards, which stay apart.
+    """
+
+    name = "riffle"
+
+    def __init__(self, passes: int = 1, grab: int = None) -> None:
+        """
+        Arguments
+        ----------
+        passes: Number of riffles of each grab. Defaults to 1.
+
+        grab: Number of cards riffled together. When None, the whole
+        pile is. Defaults to None.
+
+        Raises
+        ----------
+        ValueError, when passes or grab is less than 1.
+        """
+        if passes < 1 or (grab is not None and grab < 1):
+            raise ValueError("passes and grab must be at least 1.")
+
+        self.passes = passes
+        self.grab = grab
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(passes={self.passes}, grab={self.grab})"
+
+    def _permute(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        n_cards = piles.shape[1]
+        labels = rng.integers(0, 2**self.passes, size=piles.shape)
+
+        if self.grab is not None:
+            labels += (np.arange(n_cards) // self.grab << self.passes)[None, :]
+
+        # Sorting by the labels is the inverse of the riffle, so the cards
+        # are put where the inverse takes them from
+        order = np.argsort(labels, axis=1, kind="stable")
+        shuffled = np.empty_like(piles)
+        np.put_along_axis(shuffled, order, piles, axis=1)
+        return shuffled
+
+
+class Strip(ShuffleModel):
+    """Class which implements strip shuffles.
+
+    Packets are taken off the top of the pile and stacked on a new one,
+    which reverses the order of the packets but not the cards in them.
+    Their sizes are geometric.
+    """
+
+    name = "strip"
+
+    def __init__(self, packet: float = 8.0) -> None:
+        """
+        Arguments
+        ----------
+        packet: Average number of cards in a packet. Defaults to 8.
+
+        Raises
+        ----------
+        ValueError, when packet is less than 1.
+        """
+        if packet < 1:
+            raise ValueError("packet must be at least 1.")
+
+        self.packet = packet
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(packet={self.packet})"
+
+    def _permute(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        packets = np.cumsum(rng.random(piles.shape) < 1 / self.packet, axis=1)
+        return _sort_by(piles, -packets)
+
+
+class Cut(ShuffleModel):
+    """Class which implements a cut, moving the top part of the pile under
+    the bottom part. The cut is normally distributed around the middle."""
+
+    name = "cut"
+
+    def __init__(self, spread: float = 0.1) -> None:
+        """
+        Arguments
+        ----------
+        spread: Standard deviation of the position of the cut as a fraction
+        of the pile. Defaults to 0.1.
+        """
+        self.spread = spread
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(spread={self.spread})"
+
+    def _permute(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        n_piles, n_cards = piles.shape
+        cuts = rng.normal(n_cards / 2, self.spread * n_cards, size=(n_piles, 1))
+        cuts = np.clip(np.rint(cuts), 0, n_cards).astype(np.int64)
+
+        positions = (np.arange(n_cards)[None, :] + cuts) % n_cards
+        return np.take_along_axis(piles, positions, axis=1)
+
+
+class ContinuousShuffler(ShuffleModel):
+    """Class which implements a continuous shuffling machine.
+
+    Every card is dropped on top of a random shelf of the machine, and the
+    shelves are released in a random order.
+
+    Since the machine takes the discards back after every round, simulate
+    it with a penetration of 0 (see Rules), which reshuffles every round.
+    """
+
+    name = "csm"
+
+    def __init__(self, shelves: int = 38) -> None:
+        """
+        Arguments
+        ----------
+        shelves: Number of shelves of the machine. Defaults to 38.
+
+        Raises
+        ----------
+        ValueError, when shelves is less than 1.
+        """
+        if shelves < 1:
+            raise ValueError("shelves must be at least 1.")
+
+        self.shelves = shelves
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(shelves={self.shelves})"
+
+    def _permute(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        n_piles, _ = piles.shape
+
+        shelves = rng.integers(0, self.shelves, size=piles.shape)
+        released = rng.permuted(np.tile(np.arange(self.shelves), (n_piles, 1)), axis=1)
+
+        return _sort_by(piles, np.take_along_axis(released, shelves, axis=1))
+
+
+class Procedure(ShuffleModel):
+    """Class which implements a shuffle procedure made of several shuffles."""
+
+    def __init__(self, *steps: ShuffleModel, name: str = "procedure") -> None:
+        """
+        Arguments
+        ----------
+        steps: Shuffles of the procedure, in the order they are made.
+
+        name: Name of the procedure. Defaults to "procedure".
+
+        Raises
+        ----------
+        ValueError, when there are no steps.
+        """
+        if not steps:
+            raise ValueError("A procedure must have at least one step.")
+
+        self.steps = steps
+        self.name = name
+
+    def __repr__(self) -> str:
+        steps = ", ".join(repr(step) for step in self.steps)
+        return f"{self.__class__.__name__}({steps}, name={self.name!r})"
+
+    def _permute(self, piles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        for step in self.steps:
+            piles = step._permute(piles, rng)
+        return piles
+
+
+# Shuffles commonly made on shoes: riffles a deck at a time, then a strip
+# and a cut, and the same with two riffles
+CASINO = Procedure(Riffle(grab=52), Strip(), Riffle(grab=52), Cut(), name="casino")
+THOROUGH = Procedure(
+    Riffle(passes=2, grab=52),
+    Strip(),
+    Riffle(passes=2, grab=52),
+    Cut(),
+    name="thorough",
+)
+
+MODELS: Dict[str, ShuffleModel] = {
+    model.name: model
+    for model in (Uniform(), Riffle(grab=52), CASINO, THOROUGH, ContinuousShuffler())
+}
+
+
+def _tags(pips: np.ndarray, system: CountingSystem) -> np.ndarray:
+    """Function which returns the tags of pips in a counting system."""
+    table = np.array([0, 0] + [system.tag(pip) for pip in range(2, 15)])
+    return table[pips]
+
+
+class ShuffleTracker:
+    """Class which predicts the counts of the segments of a shoe from the
+    discard pile it was shuffled from.
+
+    The tracker learns, by shuffling piles with the model, the average
+    fraction of every segment of the pile which ends up in every segment
+    of the shoe. The count of a segment of the shoe is then predicted as
+    the counts of the segments of the pile weighted by these fractions.
+
+    Attributes
+    ----------
+    model: ShuffleModel
+        Model of the shuffle.
+
+    n_cards: int
+        Number of cards in the shoe.
+
+    segment: int
+        Number of cards in a segment.
+
+    transfer: np.ndarray
+        Fraction of the cards of each segment of the pile (rows) which end
+        up in each segment of the shoe (columns), in the order they are dealt.
+
+    Methods
+    ----------
+    predict(tags: np.ndarray) -> np.ndarray:
+        Returns the predicted counts of the segments of the shoe.
+
+    counts(tags: np.ndarray) -> np.ndarray:
+        Returns the counts of the segments of piles.
+    """
+
+    def __init__(
+        self,
+        model: ShuffleModel,
+        n_cards: int,
+        segment: int = 52,
+        n_samples: int = 2000,
+        seed: int = 0,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        model: Model of the shuffle.
+
+        n_cards: Number of cards in the shoe.
+
+        segment: Number of cards in a segment. Defaults to 52.
+
+        n_samples: Number of piles shuffled to learn the model. Defaults to 2000.
+
+        seed: Seed for the shuffles. Defaults to 0.
+        """
+        self.model = model
+        self.n_cards = n_cards
+        self.segment = segment
+
+        # Segment of every card of the pile, counted from its top since
+        # that is what is dealt first
+        self._pile_segments = (n_cards - 1 - np.arange(n_cards)) // segment
+        n_segments = self._pile_segments[0] + 1
+
+        piles = np.tile(np.arange(n_cards), (n_samples, 1))
+        shuffled = model(piles, np.random.default_rng(seed))
+
+        # Segments of the pile and of the shoe of every card of every sample
+        pairs = self._pile_segments[shuffled] * n_segments + self._pile_segments
+        counts = np.bincount(pairs.ravel(), minlength=n_segments**2)
+
+        sizes = np.bincount(self._pile_segments) * n_samples
+        self.transfer = counts.reshape(n_segments, n_segments) / sizes[:, None]
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(model={self.model!r}, "
+            f"n_cards={self.n_cards}, segment={self.segment})"
+        )
+
+    def predict(self, tags: np.ndarray) -> np.ndarray:
+        """Method which returns the predicted counts of the segments of the shoe.
+
+        Arguments
+        ----------
+        tags: Tags of the cards of the discard pile, ordered from the bottom.
+        A batch of piles can be given with one pile per row.
+
+        Returns
+        ----------
+        np.ndarray, the predicted sum of the tags of every segment of the
+        shoe, in the order they are dealt.
+        """
+        tags = np.asarray(tags)
+        return self.counts(tags) @ self.transfer
+
+    def counts(self, tags: np.ndarray) -> np.ndarray:
+        """Method which returns the counts of the segments of piles.
+
+        Arguments
+        ----------
+        tags: Tags of the cards of the piles, ordered from the bottom.
+        A batch of piles can be given with one pile per row.
+
+        Returns
+        ----------
+        np.ndarray, the sum of the tags of every segment, from the top.
+        """
+        segments = np.eye(len(self.transfer))[self._pile_segments]
+        return np.asarray(tags) @ segments
+
+
+class Predictability(NamedTuple):
+    """Class to represent how predictable a shuffle is.
+
+    Attributes
+    ----------
+    adjacency: float
+        Fraction of the pairs of adjacent cards of the pile which are still
+        adjacent, in the same order, after the shuffle. It is about 1 / n
+        for a perfect shuffle of n cards.
+
+    rising_sequences: float
+        Average number of rising sequences of the shuffled pile divided by
+        the number for a perfect shuffle. The lower, the more of the order
+        of the pile survives.
+
+    r_squared: float
+        Fraction of the variance of the counts of the segments of the shoe
+        explained by the predictions of a ShuffleTracker.
+    """
+
+    adjacency: float
+    rising_sequences: float
+    r_squared: float
+
+
+def predictability(
+    model: ShuffleModel,
+    decks: int = 6,
+    segment: int = 52,
+    n_shoes: int = 2000,
+    system: CountingSystem = HI_LO,
+    seed: int = 0,
+) -> Predictability:
+    """Function which scores how predictable the shoes made by a shuffle are.
+
+    The discard piles shuffled are uniformly random, and the tracker is
+    trained on shuffles other than the ones it is scored on.
+
+    Arguments
+    ----------
+    model: Model of the shuffle.
+
+    decks: Size of the shoe in terms of a 52-card deck. Defaults to 6.
+
+    segment: Number of cards in a segment tracked. Defaults to 52.
+
+    n_shoes: Number of shoes scored. Defaults to 2000.
+
+    system: Counting system the cards are tagged with. Defaults to HI_LO.
+
+    seed: Seed for the shuffles. Defaults to 0.
+    """
+    n_cards = 52 * decks
+    rng = np.random.default_rng(seed)
+
+    tracker = ShuffleTracker(model, n_cards, segment=segment, seed=seed + 1)
+
+    positions = model(np.tile(np.arange(n_cards), (n_shoes, 1)), rng)
+
+    # Pairs of cards whose positions are consecutive in the pile,
+    # i.e. card c sitting right below card c + 1
+    adjacency = np.mean(positions[:, 1:] == positions[:, :-1] + 1)
+
+    # A rising sequence ends at card c when card c + 1 sits below it
+    where = np.argsort(positions, axis=1)
+    rising = 1 + np.sum(where[:, 1:] < where[:, :-1], axis=1)
+
+    pips = rng.permuted(np.tile(np.arange(n_cards) % 13 + 2, (n_shoes, 1)), axis=1)
+    tags = _tags(pips, system)
+
+    predicted = tracker.predict(tags)
+    actual = tracker.counts(np.take_along_axis(tags, positions, axis=1))
+
+    residuals = np.sum((actual - predicted) ** 2)
+    total = np.sum((actual - actual.mean(axis=0)) ** 2)
+
+    return Predictability(
+        adjacency=float(adjacency),
+        rising_sequences=float(rising.mean() / ((n_cards + 1) / 2)),
+        r_squared=float(1 - residuals / total) if total else 0.0,
+    )
+
+
+class TrackingSimulator(Simulator):
+    """Class which simulates a player sizing their bets by tracking the shuffle.
+
+    After every shuffle, the player predicts the counts of the segments of
+    the new shoe with a ShuffleTracker. The true count bin a round is bet
+    in (see run()) is the one of the segment being dealt, as a true count
+    of the cards of the segment, instead of the running count.
+
+    Attributes
+    ----------
+    tracker: ShuffleTracker
+        Tracker predicting the counts of the segments of the shoes.
+    """
+
+    def __init__(
+        self,
+        rules: Rules = Rules(),
+        shuffle: ShuffleModel = None,
+        system: CountingSystem = HI_LO,
+        seed: int = None,
+        segment: int = 52,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        rules: Rules the rounds are played under. Defaults to Rules().
+
+        shuffle: Model of the shuffle. When None, CASINO is used. Defaults to None.
+
+        system: Counting system the player tracks. Defaults to HI_LO.
+
+        seed: Seed for the sequence of shoes and for the tracker. Defaults to None.
+
+        segment: Number of cards in a segment tracked. Defaults to 52.
+        """
+        shuffle = shuffle if shuffle is not None else CASINO
+        self.tracker = ShuffleTracker(
+            shuffle, 52 * rules.decks, segment=segment, seed=seed or 0
+        )
+        self._tag_table = _tags(np.arange(15), system)
+        self._predicted = np.zeros(len(self.tracker.transfer))
+
+        super().__init__(
+            rules=rules,
+            system=system,
+            seed=seed,
+            policy=BasicStrategy(),
+            shuffle=shuffle,
+        )
+
+    def _shuffle(self) -> None:
+        if self._order:
+            tags = self._tag_table[np.array(self._discard_pile())]
+            self._predicted = self.tracker.predict(tags)
+        super()._shuffle()
+
+    def _bet_bin(self) -> int:
+        dealt = len(self._order) - len(self._shoe)
+        segment = self.tracker.segment
+        predicted = self._predicted[min(dealt // segment, len(self._predicted) - 1)]
+
+        # The tags of the cards to come are against the player, like the
+        # running count is for the cards gone
+        return math.floor(-predicted / (segment / 52))
+
+
+class TrackingEdge(NamedTuple):
+    """Class to represent the edge gained by tracking a shuffle.
+
+    Attributes
+    ----------
+    flat: float
+        Expected value per unit bet when betting the same every round.
+
+    tracked: float
+        Expected value per unit bet when betting by the tracked count.
+
+    gain: float
+        Edge gained by tracking, i.e. tracked - flat.
+    """
+
+    flat: float
+    tracked: float
+    gain: float
+
+
+def tracking_edge(
+    shuffle: ShuffleModel,
+    rules: Rules = Rules(decks=6),
+    ramp: BetRamp = None,
+    n_rounds: int = 500_000,
+    segment: int = 52,
+    seed: int = 0,
+) -> TrackingEdge:
+    """Function which simulates how much edge a player gains by tracking a shuffle.
+
+    The player plays basic strategy and bets by the tracked count. Both
+    simulations deal the same shoes, which keeps the noise of the gain low.
+
+    Arguments
+    ----------
+    shuffle: Model of the shuffle.
+
+    rules: Rules the rounds are played under. Defaults to Rules(decks=6).
+
+    ramp: Bet ramp on the tracked true count bin. When None, 1 unit is bet
+    at 0 and below, doubling up to 8 units at 3 and above. Defaults to None.
+
+    n_rounds: Number of rounds simulated. Defaults to 500,000.
+
+    segment: Number of cards in a segment tracked. Defaults to 52.
+
+    seed: Seed for the simulations. Defaults to 0.
+    """
+    ramp = ramp if ramp is not None else BetRamp({0: 1, 1: 2, 2: 4, 3: 8})
+    edges = []
+
+    for bets in (None, ramp):
+        simulator = TrackingSimulator(
+            rules=rules, shuffle=shuffle, seed=seed, segment=segment
+        )
+        stats = simulator.run(n_rounds, ramp=bets).items()
+
+        units = sum(s.n * (bets.units_for(b) if bets else 1) for b, s in stats)
+        edges.append(sum(s.total for _, s in stats) / units)
+
+    flat, tracked = edges
+    return TrackingEdge(flat=flat, tracked=tracked, gain=tracked - flat)
+
+
+def main() -> None:
+    """Function which scores shuffle models from the command line."""
+    parser = argparse.ArgumentParser(description="Score shuffle models.")
+    parser.add_argument(
+        "--model", nargs="+", choices=list(MODELS), default=list(MODELS)
+    )
+    parser.add_argument("--decks", type=int, default=6, choices=Deck.multipliers)
+    parser.add_argument("--segment", type=int, default=52)
+    parser.add_argument("--rounds", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = Table(title="Shuffle tracking")
+    for title in (
+        "Model",
+        "Adjacency",
+        "Rising seq.",
+        "R²",
+        "Flat EV",
+        "Tracked EV",
+        "Gain",
+    ):
+        table.add_column(title, justify="right")
+
+    for name in args.model:
+        model = MODELS[name]
+        score = predictability(
+            model, decks=args.decks, segment=args.segment, seed=args.seed
+        )
+        # A continuous shuffler takes the discards back after every round
+        penetration = 0.0 if isinstance(model, ContinuousShuffler) else 0.75
+
+        edge = tracking_edge(
+            model,
+            rules=Rules(decks=args.decks, penetration=penetration),
+            n_rounds=args.rounds,
+            segment=args.segment,
+            seed=args.seed,
+        )
+        table.add_row(
+            name,
+            f"{score.adjacency:.3f}",
+            f"{score.rising_sequences:.3f}",
+            f"{score.r_squared:.3f}",
+            f"{edge.flat:+.4f}",
+            f"{edge.tracked:+.4f}",
+            f"{edge.gain:+.4f}",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
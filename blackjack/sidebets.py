@@ -0,0 +1,334 @@
+"""
+Module which implements side bets evaluated through lookup tables.
+
+A side bet looks at the first cards of a round: the player's two cards and,
+for some bets, the dealer's face-up card. Every possible combination of card
+codes (see Card.code) is classified once, when the table of the side bet is
+first needed, into a byte holding its winning hand (0 for a losing one).
+Settling a side bet is then a single index into that table followed by a
+lookup in the paytable, with no branching on ranks or suits.
+
+The same tables give the exact expected value of a side bet for any shoe
+composition, by weighting every combination with the probability of it
+being dealt without replacement.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .deck import Card
+
+# Number of distinct card codes (see Card.code)
+N_CODES = 64
+
+_CODES = np.arange(N_CODES)
+
+# Integer position and suit of every code, with positions outside
+# 2 through 14 marking codes which are not cards
+_PIPS = _CODES & 0xF
+_SUITS = _CODES >> 4
+_VALID = (_PIPS >= 2) & (_PIPS <= 14)
+
+# Rank of every code for straights: 2 through 10 keep their position,
+# then J, Q, K and A are 11 through 14
+_FACE_RANKS = np.array([0] * 11 + [14, 13, 12, 11, 0])
+_RANKS = np.where(_PIPS <= 10, _PIPS, _FACE_RANKS[_PIPS])
+
+# Diamonds and hearts are red
+_RED = (_SUITS == 1) | (_SUITS == 2)
+
+
+def composition(cards: Iterable[Card]) -> np.ndarray:
+    """Function which counts cards by code.
+
+    Arguments
+    ----------
+    cards: Cards to count, e.g. the cards left in a deck.
+
+    Returns
+    ----------
+    np.ndarray, the number of cards of each code.
+    """
+    counts = np.zeros(N_CODES, dtype=np.int64)
+    for card in cards:
+        counts[card.code] += 1
+    return counts
+
+
+class SideBet:
+    """Base class for side bets.
+
+    Subclasses classify combinations of card codes into winning hands
+    in _classify(), all at once with NumPy.
+
+    Attributes
+    ----------
+    name: str
+        Name of the side bet.
+
+    hands: tuple
+        Names of the winning hands, from the lowest to the highest.
+
+    n_cards: int
+        Number of cards the side bet looks at.
+
+    paytable: dict
+        Mapping between the winning hands and the amount paid per unit bet.
+
+    Methods
+    ----------
+    cards(player_hand: Sequence[Card], face_up: Card) -> Tuple[Card, ...]:
+        Returns the cards of a round the side bet looks at.
+
+    hand(cards: Sequence[Card]) -> Optional[str]:
+        Returns the winning hand made by cards.
+
+    payout(cards: Sequence[Card]) -> float:
+        Returns the net amount won per unit bet.
+
+    expected_value(counts: np.ndarray) -> float:
+        Returns the exact expected value per unit bet for a shoe composition.
+
+    house_edge(counts: np.ndarray) -> float:
+        Returns the exact house edge for a shoe composition.
+    """
+
+    name = "side bet"
+    hands: Tuple[str, ...] = ()
+    n_cards = 2
+
+    def __init__(self, paytable: Dict[str, float]) -> None:
+        """
+        Arguments
+        ----------
+        paytable: Mapping between the winning hands and the amount paid
+        per unit bet. Hands left out pay nothing more than the bet back.
+
+        Raises
+        ----------
+        ValueError, when paytable has a hand the side bet does not know.
+        """
+        if unknown := set(paytable) - set(self.hands):
+            raise ValueError(f"Unknown hands for {self.name}: {sorted(unknown)}.")
+
+        self.paytable = dict(paytable)
+
+        # Net amount won per unit bet, indexed by the byte of the hand
+        self._pays = (-1.0,) + tuple(
+            float(self.paytable.get(hand, 0.0)) for hand in self.hands
+        )
+        self._table: Optional[bytes] = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(paytable={self.paytable})"
+
+    @property
+    def table(self) -> bytes:
+        """Winning hand of every combination of codes, indexed by the codes
+        packed with 6 bits each, the first card in the highest bits.
+
+        It is built the first time it is needed.
+        """
+        if self._table is None:
+            grids = np.meshgrid(*[_CODES] * self.n_cards, indexing="ij")
+            hands = self._classify(*grids)
+
+            valid = np.logical_and.reduce([_VALID[grid] for grid in grids])
+            self._table = np.where(valid, hands, 0).astype(np.uint8).tobytes()
+
+        return self._table
+
+    def _classify(self, *codes: np.ndarray) -> np.ndarray:
+        """Method which returns the byte of the winning hand (1 for the lowest
+        hand in hands, 0 for a losing hand) of combinations of codes.
+
+        Arguments
+        ----------
+        codes: One array of codes per card, all of the same shape.
+        """
+        raise NotImplementedError
+
+    def cards(self, player_hand: Sequence[Card], face_up: Card) -> Tuple[Card, ...]:
+        """Method which returns the cards of a round the side bet looks at.
+
+        Arguments
+        ----------
+        player_hand: Hand of the player, of which the first two cards are used.
+
+        face_up: Face-up card of the dealer.
+        """
+        return (player_hand[0], player_hand[1], face_up)[: self.n_cards]
+
+    def hand(self, cards: Sequence[Card]) -> Optional[str]:
+        """Method which returns the winning hand made by cards.
+
+        Arguments
+        ----------
+        cards: Cards the side bet looks at (see cards()).
+
+        Returns
+        ----------
+        str, the name of the hand. None when it is a losing hand.
+        """
+        if byte := self.table[self._index(cards)]:
+            return self.hands[byte - 1]
+        return None
+
+    def payout(self, cards: Sequence[Card]) -> float:
+        """Method which returns the net amount won per unit bet.
+
+        Arguments
+        ----------
+        cards: Cards the side bet looks at (see cards()).
+
+        Returns
+        ----------
+        float, the amount paid per unit bet, or -1 when the bet is lost.
+        """
+        return self._pays[self.table[self._index(cards)]]
+
+    def _index(self, cards: Sequence[Card]) -> int:
+        """Method which packs the codes of cards into an index of the table."""
+        index = 0
+        for card in cards:
+            index = index << 6 | card.code
+        return index
+
+    def expected_value(self, counts: np.ndarray) -> float:
+        """Method which computes the exact expected value per unit bet
+        for a shoe composition.
+
+        The cards the side bet looks at are dealt from the shoe without
+        replacement. Since the order they are dealt in does not matter, this
+        holds even though the dealer's face-up card is dealt between the
+        player's cards.
+
+        Arguments
+        ----------
+        counts: Number of cards of each code in the shoe (see composition()).
+
+        Raises
+        ----------
+        ValueError, when the shoe has fewer cards than the side bet looks at.
+        """
+        counts = np.asarray(counts, dtype=float)
+
+        if (total := counts.sum()) < self.n_cards:
+            raise ValueError(f"The shoe must have at least {self.n_cards} cards.")
+
+        # Number of ordered ways to deal each combination, removing
+        # from each count the cards of the same code dealt before
+        shape = (N_CODES,) * self.n_cards
+        ways = np.ones(shape)
+        grids = np.meshgrid(*[_CODES] * self.n_cards, indexing="ij")
+
+        for idx, grid in enumerate(grids):
+            dealt = sum(grids[prev] == grid for prev in range(idx))
+            ways *= np.maximum(counts[grid] - dealt, 0)
+
+        deals = np.prod([total - idx for idx in range(self.n_cards)])
+        hands = np.frombuffer(self.table, dtype=np.uint8).reshape(shape)
+
+        return float((ways * np.asarray(self._pays)[hands]).sum() / deals)
+
+    def house_edge(self, counts: np.ndarray) -> float:
+        """Method which computes the exact house edge for a shoe composition.
+
+        Arguments
+        ----------
+        counts: Number of cards of each code in the shoe (see composition()).
+
+        Returns
+        ----------
+        float, the expected loss per unit bet.
+        """
+        return -self.expected_value(counts)
+
+
+class PerfectPairs(SideBet):
+    """Class which implements the Perfect Pairs side bet on the player's two cards.
+
+    Winning hands are pairs of the same pip:
+    - mixed: of different colors
+    - colored: of the same color but different suits
+    - perfect: of the same suit
+    """
+
+    name = "Perfect Pairs"
+    hands = ("mixed", "colored", "perfect")
+    n_cards = 2
+
+    def __init__(self, paytable: Dict[str, float] = None) -> None:
+        """
+        Arguments
+        ----------
+        paytable: Mapping between the winning hands and the amount paid per
+        unit bet. Defaults to 6, 12 and 25 to 1 for mixed, colored and perfect
+        pairs respectively.
+        """
+        super().__init__(
+            paytable
+            if paytable is not None
+            else {"mixed": 6, "colored": 12, "perfect": 25}
+        )
+
+    def _classify(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        pair = _PIPS[first] == _PIPS[second]
+        colored = _RED[first] == _RED[second]
+        suited = _SUITS[first] == _SUITS[second]
+        return pair * (1 + colored + suited)
+
+
+class TwentyOnePlusThree(SideBet):
+    """Class which implements the 21+3 side bet, on the three-card poker hand
+    made by the player's two cards and the dealer's face-up card.
+
+    Winning hands, from the lowest to the highest:
+    - flush: three cards of the same suit
+    - straight: three cards in sequence, with an ace being high or low
+    - three of a kind: three cards of the same pip
+    - straight flush: a straight of the same suit
+    - suited trips: three of a kind of the same suit
+    """
+
+    name = "21+3"
+    hands = ("flush", "straight", "three of a kind", "straight flush", "suited trips")
+    n_cards = 3
+
+    def __init__(self, paytable: Dict[str, float] = None) -> None:
+        """
+        Arguments
+        ----------
+        paytable: Mapping between the winning hands and the amount paid per
+        unit bet. Defaults to 5, 10, 30, 40 and 100 to 1 for a flush, a
+        straight, three of a kind, a straight flush and suited trips respectively.
+        """
+        if paytable is None:
+            paytable = dict(zip(self.hands, (5, 10, 30, 40, 100)))
+        super().__init__(paytable)
+
+    def _classify(self, *codes: np.ndarray) -> np.ndarray:
+        ranks = np.sort(np.stack([_RANKS[code] for code in codes]), axis=0)
+        low, mid, high = ranks
+
+        flush = (_SUITS[codes[0]] == _SUITS[codes[1]]) & (
+            _SUITS[codes[1]] == _SUITS[codes[2]]
+        )
+        trips = (low == mid) & (mid == high)
+        # An ace (rank 14) also completes A-2-3
+        straight = ((mid == low + 1) & (high == mid + 1)) | (
+            (low == 2) & (mid == 3) & (high == 14)
+        )
+
+        return np.select(
+            [trips & flush, straight & flush, trips, straight, flush],
+            [5, 4, 3, 2, 1],
+            default=0,
+        )
+
+
+# Side bets by name, used to rebuild them (e.g. from snapshots)
+SIDE_BETS = {side_bet.name: side_bet for side_bet in (PerfectPairs, TwentyOnePlusThree)}
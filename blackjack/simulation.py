@@ -0,0 +1,572 @@
+"""
+Module which implements headless rounds of Blackjack for simulations.
+
+Rounds follow the same rules as Game, but cards are plain integer
+positions (see Card) and nothing is printed, which makes them cheap
+enough to run millions of times.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from enum import IntEnum
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from .counting import HI_LO, CountingSystem, RunningCount
+from .game import _Move
+from .policy import DealerMimic, HandState, Policy
+from .rules import Rules
+
+if TYPE_CHECKING:
+    from .betting import BetRamp
+    from .odds import DealerOdds
+    from .results import ResultsStore
+    from .shuffles import ShuffleModel
+
+# Integer position of an ace (see Card)
+ACE = 11
+
+
+def count_value(non_aces: int, aces: int, ace_limit: int = 21) -> int:
+    """Function to compute the count value of a hand from the sum of its
+    non-ace cards and its number of aces.
+
+    This mirrors _GenericPlayer.count(): aces are greedily counted as 11
+    as long as the count stays below ace_limit. Every backend which counts
+    hands goes through it, so the rule is checked in one place by difftest.
+
+    Arguments
+    ----------
+    non_aces: Sum of the values of the non-ace cards.
+
+    aces: Number of aces.
+
+    ace_limit: Count value up to which aces should be counted as 11.
+    Defaults to 21.
+    """
+    count = non_aces
+
+    for _ in range(aces):
+        count += 11 if count + 11 < ace_limit else 1
+
+    return count
+
+
+def hand_count(pips: Sequence[int], ace_limit: int = 21) -> int:
+    """Function to compute the count value of a hand (see count_value()).
+
+    Arguments
+    ----------
+    pips: Integer positions of the cards in the hand.
+
+    ace_limit: Count value up to which aces should be counted as 11.
+    Defaults to 21.
+    """
+    non_aces, aces = 0, 0
+
+    for pip in pips:
+        if pip == ACE:
+            aces += 1
+        else:
+            non_aces += pip if pip <= 10 else 10
+
+    return count_value(non_aces, aces, ace_limit)
+
+
+def hand_state(pips: Sequence[int], can_double: bool = False) -> HandState:
+    """Function which returns the state of a player's hand.
+
+    Arguments
+    ----------
+    pips: Integer positions of the cards in the hand.
+
+    can_double: Indicates whether the "Double" move is allowed. Defaults to False.
+    """
+    total = hand_count(pips)
+    hard = sum(1 if pip == ACE else pip if pip <= 10 else 10 for pip in pips)
+    return HandState(total, total != hard, len(pips), can_double)
+
+
+def up_value(pip: int) -> int:
+    """Function which returns the value of the dealer's face-up card,
+    with an ace being 11.
+
+    Arguments
+    ----------
+    pip: Integer position of the card.
+    """
+    return pip if pip <= 11 else 10
+
+
+def settle(p_count: int, d_count: int, natural: bool, payout: float = 1.5) -> float:
+    """Function which computes the result of a round per unit bet.
+
+    This mirrors Game._winner().
+
+    Arguments
+    ----------
+    p_count: Final count of the player.
+
+    d_count: Final count of the dealer.
+
+    natural: Indicates whether or not the player has a natural.
+
+    payout: Amount paid per unit bet on a natural. Defaults to 1.5.
+
+    Returns
+    ----------
+    float, the net amount won (positive) or lost (negative) per unit bet.
+    """
+    if p_count > 21:
+        return -1.0
+
+    if p_count == d_count:
+        return 0.0
+
+    if d_count < p_count or d_count > 21:
+        return payout if natural is True else 1.0
+
+    return -1.0
+
+
+class Outcome(IntEnum):
+    """Enumeration to represent the outcomes of a round, as told
+    by Game._winner().
+
+    Members
+    ----------
+    - LOSS: the dealer has a higher count
+    - BUST: the player's count is above 21
+    - PUSH: the counts are the same, without the player busting
+    - WIN: the player has a higher count or the dealer busts
+    - NATURAL: the player wins with a natural
+    """
+
+    LOSS = 0
+    BUST = 1
+    PUSH = 2
+    WIN = 3
+    NATURAL = 4
+
+
+def outcome(p_count: int, d_count: int, natural: bool) -> Outcome:
+    """Function which determines the outcome of a round.
+
+    This mirrors Game._winner(), like settle().
+
+    Arguments
+    ----------
+    p_count: Final count of the player.
+
+    d_count: Final count of the dealer.
+
+    natural: Indicates whether or not the player has a natural.
+    """
+    if p_count > 21:
+        return Outcome.BUST
+
+    if p_count == d_count:
+        return Outcome.PUSH
+
+    if d_count < p_count or d_count > 21:
+        return Outcome.NATURAL if natural is True else Outcome.WIN
+
+    return Outcome.LOSS
+
+
+class BinStats:
+    """Class which accumulates the results of rounds played in a true count bin.
+
+    Attributes
+    ----------
+    n: int
+        Number of rounds.
+
+    total: float
+        Sum of the results.
+
+    total_sq: float
+        Sum of the squared results.
+
+    Methods
+    ----------
+    add(result: float) -> None:
+        Adds the result of a round.
+
+    merge(other: BinStats) -> None:
+        Adds the rounds accumulated by another instance.
+
+    mean -> float:
+        Property with the mean result (EV) per round.
+
+    variance -> float:
+        Property with the variance of the results.
+    """
+
+    def __init__(self, n: int = 0, total: float = 0.0, total_sq: float = 0.0) -> None:
+        """
+        Arguments
+        ----------
+        n: Number of rounds. Defaults to 0.
+
+        total: Sum of the results. Defaults to 0.
+
+        total_sq: Sum of the squared results. Defaults to 0.
+        """
+        self.n = n
+        self.total = total
+        self.total_sq = total_sq
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(n={self.n}, "
+            f"mean={self.mean:.4f}, variance={self.variance:.4f})"
+        )
+
+    @property
+    def mean(self) -> float:
+        """Mean result per round."""
+        return self.total / self.n if self.n else 0.0
+
+    @property
+    def variance(self) -> float:
+        """Variance of the results."""
+        if not self.n:
+            return 0.0
+        return max(self.total_sq / self.n - self.mean**2, 0.0)
+
+    def add(self, result: float) -> None:
+        """Method to add the result of a round.
+
+        Arguments
+        ----------
+        result: Net amount won (positive) or lost (negative).
+        """
+        self.n += 1
+        self.total += result
+        self.total_sq += result * result
+
+    def merge(self, other: BinStats) -> None:
+        """Method to add the rounds accumulated by another instance.
+
+        Arguments
+        ----------
+        other: Instance whose rounds should be added.
+        """
+        self.n += other.n
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+
+class Simulator:
+    """Class which plays headless rounds of Blackjack.
+
+    Every shoe is shuffled with a seed drawn from the seed of the simulator,
+    so two simulators with the same seed deal the same sequence of shoes even
+    when their players make different decisions.
+
+    Attributes
+    ----------
+    rules: Rules
+        Rules the rounds are played under.
+
+    policy: Policy
+        Policy making the decisions of the player.
+
+    counter: RunningCount
+        Running count of the shoe.
+
+    rng: random.Random
+        Random number generator used to shuffle the shoe.
+
+    results: ResultsStore
+        Store the decisions are written to, if any.
+
+    shuffle: ShuffleModel
+        Model of the shuffle of the discard pile, if any.
+
+    dealer_odds: DealerOdds
+        Probabilities the dealer's final count is drawn from, if any.
+
+    decision_time: float
+        Total time (in seconds) spent by the policy making decisions.
+
+    n_decisions: int
+        Number of decisions made by the policy.
+
+    Methods
+    ----------
+    play_round(bet: float = None) -> float:
+        Plays a single round and returns the net amount won.
+
+    run(n_rounds: int, ramp: BetRamp = None) -> Dict[int, BinStats]:
+        Plays several rounds and collects statistics per true count bin.
+    """
+
+    def __init__(
+        self,
+        rules: Rules = Rules(),
+        system: CountingSystem = HI_LO,
+        seed: int = None,
+        policy: Policy = None,
+        results: ResultsStore = None,
+        shuffle: ShuffleModel = None,
+        dealer_odds: DealerOdds = None,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        rules: Rules the rounds are played under. Defaults to Rules().
+
+        system: Counting system used to keep the running count. Defaults to HI_LO.
+
+        seed: Seed for the sequence of shoes. Defaults to None.
+
+        policy: Policy making the decisions of the player. When None, the
+        player mimics the dealer (see DealerMimic). Defaults to None.
+
+        results: Store the decisions of every round are written to, along
+        with the outcome of the round. Defaults to None.
+
+        shuffle: Model of the shuffle (see shuffles.ShuffleModel). When given,
+        every shoe but the first is the previous one's discard pile shuffled
+        by the model, instead of a uniformly shuffled one. Defaults to None.
+
+        dealer_odds: Probabilities of the outcomes of the dealer's hand (see
+        odds.dealer_odds()). When given, the dealer's final count is drawn from
+        them instead of dealing the dealer's hand, which is faster but leaves
+        the dealer's cards in the shoe. Defaults to None.
+
+        Raises
+        ----------
+        ValueError, when dealer_odds has no probabilities for rules.
+        """
+        self.rules = rules
+        self.policy = policy if policy is not None else DealerMimic()
+        self.results = results
+        self.shuffle = shuffle
+        self.dealer_odds = dealer_odds
+        self.counter = RunningCount(system=system, decks=rules.decks)
+        self.rng = random.Random()
+
+        self.decision_time = 0.0
+        self.n_decisions = 0
+
+        self._seeds = random.Random(seed)
+
+        # Decisions of the current round, as rows of the results store
+        self._decisions: List[Tuple[int, bool, int, _Move, int]] = []
+
+        # Cumulative probabilities of the dealer's outcomes per face-up card
+        self._dealer_cdf: Optional[List[List[float]]] = None
+        if dealer_odds is not None:
+            self._dealer_cdf = dealer_odds.sampler(rules)
+
+        self._shoe: List[int] = []
+        # Shoe as it was after its shuffle, when there is a shuffle model
+        self._order: List[int] = []
+        self._cut = int(52 * rules.decks * (1 - rules.penetration))
+        self._shuffle()
+
+    def _shuffle(self) -> None:
+        """Method which refills and shuffles the shoe."""
+        if self.shuffle is not None and self._order:
+            self.rng.seed(self._seeds.getrandbits(64))
+            self._shoe = self.shuffle.apply(self._discard_pile(), self.rng)
+        else:
+            self._shoe = list(range(2, 15)) * (4 * self.rules.decks)
+            self.rng.seed(self._seeds.getrandbits(64))
+            self.rng.shuffle(self._shoe)
+
+        if self.shuffle is not None:
+            self._order = list(self._shoe)
+        self.counter.reset()
+
+    def _discard_pile(self) -> List[int]:
+        """Method which returns the discard pile of the shoe, from the bottom.
+
+        The cards left in the shoe are at the bottom, with the cards dealt
+        from it on top in the order they were dealt.
+        """
+        return self._shoe + self._order[len(self._shoe) :][::-1]
+
+    def _bet_bin(self) -> int:
+        """Method which returns the true count bin the bet of a round is sized by."""
+        return self.counter.bin()
+
+    def _draw(self, seen: bool = True) -> int:
+        """Method which draws a card from the shoe.
+
+        Arguments
+        ----------
+        seen: Indicates whether the card is exposed and should be counted.
+        Defaults to True.
+        """
+        if not self._shoe:
+            self._shuffle()
+
+        pip = self._shoe.pop()
+        if seen is True:
+            self.counter.observe_pip(pip)
+        return pip
+
+    def _decide(self, hand: List[int], up: int, can_double: bool) -> _Move:
+        """Method which asks the policy for the next move and times it."""
+        state = hand_state(hand, can_double=can_double)
+        true_count = self.counter.true_count()
+
+        start = time.perf_counter()
+        move = self.policy.decide(state, up, true_count=true_count)
+        self.decision_time += time.perf_counter() - start
+        self.n_decisions += 1
+
+        if (results := self.results) is not None:
+            tc_bin = self.counter.bin(results.tc_low, results.tc_high)
+            self._decisions.append((state.total, state.soft, up, move, tc_bin))
+
+        return move
+
+    def _players_turn(self, hand: List[int], up: int) -> bool:
+        """Method which implements the player's play.
+
+        This mirrors Game._players_turn(): the player can double on their
+        first move only, and stops hitting once their count is >= 21.
+
+        Arguments
+        ----------
+        hand: Hand of the player, updated in-place.
+
+        up: Value of the dealer's face-up card.
+
+        Returns
+        ----------
+        bool, True when the player has doubled.
+        """
+        move = self._decide(hand, up, can_double=True)
+
+        if move is _Move.DOUBLE:
+            hand.append(self._draw())
+            return True
+
+        while move is not _Move.STAND:
+            hand.append(self._draw())
+
+            if hand_count(hand) >= 21:
+                break
+
+            move = self._decide(hand, up, can_double=False)
+
+        return False
+
+    def _dealers_turn(self, hand: List[int], natural: bool) -> None:
+        """Method which implements the dealer's play.
+
+        Arguments
+        ----------
+        hand: Hand of the dealer, updated in-place. The face-down card
+        is the second card and is counted here since it gets revealed.
+
+        natural: Indicates whether or not the player has a natural.
+        """
+        self.counter.observe_pip(hand[1])
+
+        if natural:
+            return
+
+        rules = self.rules
+        while hand_count(hand, rules.dealer_ace_limit) < rules.dealer_stands_on:
+            hand.append(self._draw())
+
+    def play_round(self, bet: float = None) -> float:
+        """Method which plays a single round.
+
+        The shoe is reshuffled at the start of the round once it has been
+        dealt past the penetration.
+
+        Arguments
+        ----------
+        bet: Amount bet for the round. When None, the policy decides it,
+        with the bankroll considered unlimited. Defaults to None.
+
+        Returns
+        ----------
+        float, the net amount won (positive) or lost (negative).
+        """
+        if len(self._shoe) <= self._cut:
+            self._shuffle()
+
+        if bet is None:
+            bet = self.policy.bet(math.inf, true_count=self.counter.true_count())
+
+        draw = self._draw
+        player = [draw(), 0]
+        dealer = [draw(), 0]
+        player[1] = draw()
+
+        natural = hand_count(player) == 21
+        doubled = False
+        up = up_value(dealer[0])
+
+        # With dealer odds, the dealer's hand is only dealt to settle a natural
+        cdf = self._dealer_cdf if not natural else None
+        if cdf is None:
+            dealer[1] = draw(seen=False)
+
+        if not natural:
+            doubled = self._players_turn(player, up)
+
+        rules = self.rules
+        p_count = hand_count(player)
+
+        if cdf is None:
+            self._dealers_turn(dealer, natural=natural)
+            d_count = hand_count(dealer, rules.dealer_ace_limit)
+        else:
+            d_count = self.dealer_odds.sample(cdf[up - 2], self.rng.random())
+
+        result = settle(p_count, d_count, natural, payout=rules.blackjack_payout)
+        result *= 2 if doubled else 1
+
+        if self.results is not None:
+            self.results.add_round(
+                self._decisions, outcome(p_count, d_count, natural), result
+            )
+            self._decisions = []
+
+        return result * bet
+
+    def run(self, n_rounds: int, ramp: BetRamp = None) -> Dict[int, BinStats]:
+        """Method which plays several rounds and collects statistics
+        per true count bin.
+
+        The bin of a round is the true count bin at the start of the round.
+
+        Arguments
+        ----------
+        n_rounds: Number of rounds to play.
+
+        ramp: Bet ramp used to size the bets. When None, one unit is bet
+        every round. Defaults to None.
+
+        Returns
+        ----------
+        dict, a mapping between true count bins and the statistics of
+        the results (in units) of the rounds played in that bin.
+        """
+        stats: Dict[int, BinStats] = {}
+
+        for _ in range(n_rounds):
+            if len(self._shoe) <= self._cut:
+                self._shuffle()
+
+            tc_bin = self._bet_bin()
+            units = ramp.units_for(tc_bin) if ramp is not None else 1
+
+            if (bin_stats := stats.get(tc_bin)) is None:
+                bin_stats = stats[tc_bin] = BinStats()
+
+            bin_stats.add(self.play_round(bet=units))
+
+        return stats
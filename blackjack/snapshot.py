@@ -0,0 +1,545 @@
+"""
+Module which implements snapshots of a table and deterministic replays of rounds.
+
+A snapshot packs everything needed to resume a Game into about 2.5 KB,
+all but a hundred or so of which are the state of the random number
+generator:
+- the bet, the bankroll and the number of rounds of the player, with
+  amounts of money as integer cents
+- the cards left in the deck, the player's hand and the dealer's hand,
+  with one byte per card (see Card.code)
+- whether the dealer's face-down card is still hidden
+- the state of the random number generator of the deck
+- the side bets of the table, with their amounts and paytables
+- the shuffle model of the deck (by its name in shuffles.MODELS) and the
+  discard pile the model rebuilds the shoe from
+
+Since the deck is shuffled with its own generator, a round replayed from a
+snapshot taken before it, with the same decisions, deals the same cards
+and settles the same side bets, even when the shoe is rebuilt during it.
+
+Check that replays match the rounds they were recorded from:
+
+    $ python -m blackjack.snapshot --rounds 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from rich.console import Console
+
+from .console import console
+from .deck import Card, Deck
+from .game import Game, _Move
+from .money import from_cents, to_cents, to_dollars
+from .player import Player
+from .policy import BasicStrategy
+from .shuffles import MODELS, ShuffleModel
+from .sidebets import SIDE_BETS, PerfectPairs, SideBet, TwentyOnePlusThree
+
+_MAGIC = b"BJS"
+_VERSION = 4
+
+# Versions restore() can read, version 1 having no side bets, versions
+# before 3 storing amounts of money as doubles instead of cents and
+# versions before 4 having no shuffle model and discard pile
+_VERSIONS = (1, 2, 3, 4)
+
+# Magic, version, deck multiplier, dealer has face-down card,
+# current bet and bankroll (in cents) and rounds
+_HEADER = struct.Struct("<3sBBBqqI")
+
+# Header of the versions before 3, with the bet and the bankroll as doubles
+_FLOAT_HEADER = struct.Struct("<3sBBBddI")
+
+# Size of the snapshot in the record, bet (in cents) and number of moves
+_RECORD = struct.Struct("<IqB")
+
+# Version, 624 words of Mersenne Twister state + position, has gauss_next, gauss_next
+_RNG = struct.Struct("<B625IBd")
+
+_MOVES = tuple(_Move)
+
+
+def _pack_cards(cards: List[Card], fmt: str) -> bytes:
+    """Function which packs cards as a length followed by one byte per card."""
+    return struct.pack(fmt, len(cards)) + bytes(card.code for card in cards)
+
+
+def _unpack_cards(data: bytes, offset: int, fmt: str) -> Tuple[List[Card], int]:
+    """Function which unpacks cards packed by _pack_cards().
+
+    Returns
+    ----------
+    A two-tuple with the cards and the offset right after them.
+    """
+    (n,) = struct.unpack_from(fmt, data, offset)
+    offset += struct.calcsize(fmt)
+    cards = [Card.from_code(code) for code in data[offset : offset + n]]
+    return cards, offset + n
+
+
+def _pack_side_bets(side_bets: Dict[SideBet, Decimal]) -> bytes:
+    """Function which packs side bets as a count followed by the name,
+    the amount and the paytable of each side bet."""
+    parts = [struct.pack("<B", len(side_bets))]
+
+    for side_bet, amount in side_bets.items():
+        name = side_bet.name.encode("utf-8")
+        parts.append(struct.pack("<B", len(name)) + name)
+        parts.append(struct.pack("<qB", to_cents(amount), len(side_bet.paytable)))
+        parts.extend(
+            struct.pack("<Bd", side_bet.hands.index(hand), pays)
+            for hand, pays in side_bet.paytable.items()
+        )
+
+    return b"".join(parts)
+
+
+def _unpack_side_bets(
+    data: bytes, offset: int, cents: bool = True
+) -> Tuple[Dict[SideBet, Decimal], int]:
+    """Function which unpacks side bets packed by _pack_side_bets().
+
+    Amounts are read as doubles instead of cents when cents is False,
+    as packed by versions before 3.
+
+    Returns
+    ----------
+    A two-tuple with the side bets and the offset right after them.
+
+    Raises
+    ----------
+    ValueError, when a side bet is not in sidebets.SIDE_BETS.
+    """
+    (n,) = struct.unpack_from("<B", data, offset)
+    offset += 1
+    side_bets = {}
+
+    for _ in range(n):
+        size = data[offset]
+        name = data[offset + 1 : offset + 1 + size].decode("utf-8")
+        offset += 1 + size
+
+        if (cls := SIDE_BETS.get(name)) is None:
+            raise ValueError(f"Unknown side bet: {name}.")
+
+        fmt = "<qB" if cents else "<dB"
+        amount, n_hands = struct.unpack_from(fmt, data, offset)
+        offset += struct.calcsize(fmt)
+
+        paytable = {}
+        for _ in range(n_hands):
+            hand, pays = struct.unpack_from("<Bd", data, offset)
+            offset += struct.calcsize("<Bd")
+            paytable[cls.hands[hand]] = pays
+
+        side_bets[cls(paytable)] = from_cents(amount) if cents else to_dollars(amount)
+
+    return side_bets, offset
+
+
+def _pack_shuffle(model: Optional[ShuffleModel], discards: List[Card]) -> bytes:
+    """Function which packs the shuffle model of a deck, as its name in
+    shuffles.MODELS (empty when there is none), and the discard pile.
+
+    Raises
+    ----------
+    ValueError, when the model is not in shuffles.MODELS.
+    """
+    name = b""
+
+    if model is not None:
+        if repr(MODELS.get(model.name)) != repr(model):
+            raise ValueError(
+                f"Only the shuffle models of shuffles.MODELS can be saved, "
+                f"not {model!r}."
+            )
+        name = model.name.encode("utf-8")
+
+    return struct.pack("<B", len(name)) + name + _pack_cards(discards, "<H")
+
+
+def _unpack_shuffle(
+    data: bytes, offset: int
+) -> Tuple[Optional[ShuffleModel], List[Card]]:
+    """Function which unpacks a shuffle model and a discard pile packed
+    by _pack_shuffle().
+
+    Raises
+    ----------
+    ValueError, when the model is not in shuffles.MODELS.
+    """
+    size = data[offset]
+    name = data[offset + 1 : offset + 1 + size].decode("utf-8")
+    offset += 1 + size
+
+    model = None
+    if name and (model := MODELS.get(name)) is None:
+        raise ValueError(f"Unknown shuffle model: {name}.")
+
+    discards, _ = _unpack_cards(data, offset, "<H")
+    return model, discards
+
+
+def snapshot(game: Game) -> bytes:
+    """Function which takes a snapshot of a game.
+
+    Arguments
+    ----------
+    game: Game to take a snapshot of.
+
+    Returns
+    ----------
+    bytes, the snapshot.
+
+    Raises
+    ----------
+    ValueError, when the shuffle model of the deck is not in shuffles.MODELS.
+    """
+    deck, player, dealer = game.deck, game.player, game.dealer
+
+    version, words, gauss = deck.rng.getstate()
+    name = player.name.encode("utf-8")
+
+    return b"".join(
+        (
+            _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                deck.multiplier,
+                dealer.has_face_down,
+                to_cents(game.current_bet),
+                to_cents(player.bankroll),
+                player.rounds,
+            ),
+            struct.pack("<H", len(name)) + name,
+            _pack_cards(deck._deck_state, "<H"),
+            _pack_cards(player.hand, "<B"),
+            _pack_cards(dealer.hand, "<B"),
+            _RNG.pack(version, *words, gauss is not None, gauss or 0.0),
+            _pack_side_bets(game.side_bets),
+            _pack_shuffle(deck.shuffle_model, deck._discards),
+        )
+    )
+
+
+def _unpack_header(data: bytes) -> Tuple[int, int, int, Decimal, Decimal, int]:
+    """Function which unpacks the header of a snapshot.
+
+    Returns
+    ----------
+    A six-tuple with the version, the deck multiplier, whether the dealer
+    has a face-down card, the bet, the bankroll and the number of rounds.
+
+    Raises
+    ----------
+    ValueError, when data is not a snapshot or has an unsupported version.
+    """
+    if len(data) < _HEADER.size or data[:3] != _MAGIC:
+        raise ValueError("data is not a snapshot of a game.")
+
+    if (version := data[3]) not in _VERSIONS:
+        raise ValueError(f"Unsupported snapshot version: {version}.")
+
+    if version >= 3:
+        _, _, multiplier, face_down, bet, bankroll, rounds = _HEADER.unpack_from(data)
+        return (
+            version,
+            multiplier,
+            face_down,
+            from_cents(bet),
+            from_cents(bankroll),
+            rounds,
+        )
+
+    header = _FLOAT_HEADER.unpack_from(data)
+    _, _, multiplier, face_down, bet, bankroll, rounds = header
+    return version, multiplier, face_down, to_dollars(bet), to_dollars(bankroll), rounds
+
+
+def restore(game: Game, data: bytes) -> None:
+    """Function which restores a game from a snapshot.
+
+    Arguments
+    ----------
+    game: Game to restore. Its deck (with its shuffle model), hands, bet,
+    side bets and player's account are replaced by the ones in the snapshot.
+
+    data: Snapshot taken by snapshot().
+
+    Raises
+    ----------
+    ValueError, when data is not a snapshot, has an unsupported version or
+    has an unknown side bet or shuffle model.
+    """
+    version, multiplier, face_down, bet, bankroll, rounds = _unpack_header(data)
+    offset = _HEADER.size
+
+    (n,) = struct.unpack_from("<H", data, offset)
+    name = data[offset + 2 : offset + 2 + n].decode("utf-8")
+    offset += 2 + n
+
+    deck_state, offset = _unpack_cards(data, offset, "<H")
+    player_hand, offset = _unpack_cards(data, offset, "<B")
+    dealer_hand, offset = _unpack_cards(data, offset, "<B")
+
+    rng_version, *words, has_gauss, gauss = _RNG.unpack_from(data, offset)
+    offset += _RNG.size
+
+    side_bets = {}
+    if version >= 2:
+        side_bets, offset = _unpack_side_bets(data, offset, cents=version >= 3)
+
+    model, discards = None, []
+    if version >= 4:
+        model, discards = _unpack_shuffle(data, offset)
+
+    deck = game.deck
+    if deck.multiplier != multiplier:
+        deck = game.deck = Deck(multiplier=multiplier, rng=deck.rng)
+
+    deck.shuffle_model = model
+    deck._deck_state = deck_state
+    deck._discards = discards
+    deck.rng.setstate((rng_version, tuple(words), gauss if has_gauss else None))
+
+    player = game.player
+    player.name, player.bankroll, player.rounds = name, bankroll, rounds
+    player.hand = player_hand
+
+    game.dealer.hand = dealer_hand
+    game.dealer.has_face_down = bool(face_down)
+
+    game.current_bet = bet
+    game.side_bets = side_bets
+    game.decisions = []
+
+
+class RoundRecord(NamedTuple):
+    """Class to represent a recorded round.
+
+    Attributes
+    ----------
+    snapshot: bytes
+        Snapshot of the game taken right before the round.
+
+    decisions: tuple
+        Decisions made by the player during the round: the bet followed by
+        the moves (see Game.decisions). The bet is packed as integer cents.
+
+    Methods
+    ----------
+    to_bytes() -> bytes:
+        Packs the record into bytes.
+
+    from_bytes(data: bytes) -> RoundRecord:
+        Class method which unpacks a record packed by to_bytes().
+    """
+
+    snapshot: bytes
+    decisions: Tuple[Union[Decimal, _Move], ...]
+
+    def to_bytes(self) -> bytes:
+        """Method which packs the record into bytes.
+
+        The moves take one byte each.
+        """
+        bet, *moves = self.decisions
+        return b"".join(
+            (
+                _RECORD.pack(len(self.snapshot), to_cents(bet), len(moves)),
+                self.snapshot,
+                bytes(_MOVES.index(move) for move in moves),
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> RoundRecord:
+        """Class method which unpacks a record packed by to_bytes().
+
+        Arguments
+        ----------
+        data: Packed record.
+        """
+        size, bet, n_moves = _RECORD.unpack_from(data)
+        offset = _RECORD.size
+
+        snap = data[offset : offset + size]
+        moves = tuple(_MOVES[idx] for idx in data[offset + size :][:n_moves])
+
+        return cls(snapshot=snap, decisions=(from_cents(bet),) + moves)
+
+
+def record_round(game: Game) -> RoundRecord:
+    """Function which plays a round of a game and records it.
+
+    Arguments
+    ----------
+    game: Game to play the round in.
+
+    Returns
+    ----------
+    RoundRecord, the recorded round.
+    """
+    snap = snapshot(game)
+    game.play()
+    return RoundRecord(snapshot=snap, decisions=tuple(game.decisions))
+
+
+class _ReplayGame(Game):
+    """Class which replays a recorded round without any output or pauses.
+
+    Decisions are taken from the record instead of being asked. The deck
+    gets the shuffle model of the record's snapshot, through restore().
+    """
+
+    def __init__(self, record: RoundRecord) -> None:
+        """
+        Arguments
+        ----------
+        record: Round to replay.
+        """
+        super().__init__(
+            Player(name="", bankroll=0.0), pace=0, console=Console(quiet=True)
+        )
+        restore(self, record.snapshot)
+        self._script = iter(record.decisions)
+
+    def _scripted(self) -> Union[Decimal, _Move]:
+        """Method which returns the next decision of the record.
+
+        Raises
+        ----------
+        ValueError, when the record has no decisions left.
+        """
+        try:
+            return next(self._script)
+        except StopIteration:
+            raise ValueError("The record has fewer decisions than the round.")
+
+    def _ask_bet(self) -> None:
+        self._place_bet(self._scripted())
+
+    def _ask_move(self, double: bool = False) -> _Move:
+        return self._scripted()
+
+
+def replay(record: RoundRecord) -> Game:
+    """Function which replays a recorded round.
+
+    Arguments
+    ----------
+    record: Round to replay.
+
+    Returns
+    ----------
+    Game, the game in the state it was left in at the end of the round.
+    """
+    game = _ReplayGame(record)
+    game.play()
+    return game
+
+
+def _replay_result(record: RoundRecord) -> Decimal:
+    """Function which replays a recorded round and returns the net amount won."""
+    bankroll = _unpack_header(record.snapshot)[4]
+    return replay(record).player.bankroll - bankroll
+
+
+def replay_many(records: Iterable[RoundRecord], workers: int = 1) -> List[Decimal]:
+    """Function which replays recorded rounds in bulk.
+
+    Arguments
+    ----------
+    records: Rounds to replay.
+
+    workers: Number of processes to replay the rounds in. Defaults to 1,
+    in which case they are replayed in the current process.
+
+    Returns
+    ----------
+    list, the net amount won (positive) or lost (negative) by the player
+    in each round.
+    """
+    if workers <= 1:
+        return [_replay_result(record) for record in records]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_replay_result, records, chunksize=256))
+
+
+def check_replay(
+    rounds: int = 1000, seed: int = 0, workers: int = 1, shuffle: str = None
+) -> List[int]:
+    """Function which checks that replays match the rounds they were recorded from.
+
+    Rounds of a seeded game, played by BasicStrategy with every side bet
+    placed, are recorded and replayed, and the net amounts won are compared.
+
+    Arguments
+    ----------
+    rounds: Number of rounds to play. Defaults to 1000.
+
+    seed: Seed for the random number generator of the deck. Defaults to 0.
+
+    workers: Number of processes to replay the rounds in. Defaults to 1.
+
+    shuffle: Name of the shuffle model of the deck (see shuffles.MODELS).
+    When None, the deck is shuffled uniformly every round. Defaults to None.
+
+    Returns
+    ----------
+    list, the indices of the rounds whose replay won a different amount.
+    """
+    game = Game(
+        Player(name="replay", bankroll=1_000_000),
+        pace=0,
+        console=Console(quiet=True),
+        seed=seed,
+        policy=BasicStrategy(unit=10),
+        side_bets={PerfectPairs(): 1, TwentyOnePlusThree(): 2.5},
+        shuffle_model=MODELS[shuffle] if shuffle is not None else None,
+    )
+
+    records, played = [], []
+    for _ in range(rounds):
+        bankroll = game.player.bankroll
+        records.append(record_round(game))
+        played.append(game.player.bankroll - bankroll)
+        game.reset()
+
+    replayed = replay_many(records, workers=workers)
+    return [idx for idx, (a, b) in enumerate(zip(played, replayed)) if a != b]
+
+
+def main() -> None:
+    """Function which checks replays from the command line."""
+    parser = argparse.ArgumentParser(description="Check deterministic replays.")
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--shuffle", choices=list(MODELS))
+    args = parser.parse_args()
+
+    mismatches = check_replay(
+        rounds=args.rounds, seed=args.seed, workers=args.workers, shuffle=args.shuffle
+    )
+
+    if mismatches:
+        console.print(
+            f"[bold red]{len(mismatches)} of {args.rounds:,} replays differ, "
+            f"the first being round {mismatches[0]}.[/bold red]"
+        )
+        raise SystemExit(1)
+
+    console.print(f"[bold green]All {args.rounds:,} replays match.[/bold green]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Module which implements persistent player accounts backed by SQLite.
+
+Bankrolls and the ledger of every bet and payout are stored as integer
+cents, so no money is lost to floating point errors. Writes go through a
+write-behind queue which a background thread commits in batches, one
+transaction per batch, on a single connection reused by the whole process.
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from .money import from_cents, to_cents
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    bankroll INTEGER NOT NULL,
+    rounds INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL REFERENCES players(name),
+    round INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ledger_player_round ON ledger(player, round);
+"""
+
+# Connections reused by the process and the locks serializing their use,
+# keyed by the process ID and the path
+_connections: Dict[Tuple[int, str], Tuple[sqlite3.Connection, threading.Lock]] = {}
+_connections_lock = threading.Lock()
+
+# Marker put in the queue to stop the writer thread
+_STOP = object()
+
+
+def _connect(path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+    """Function which returns the connection of the current process to a database
+    along with the lock that must be held while using it.
+
+    The connection is created the first time and reused afterwards. A
+    process that was forked gets its own connection since SQLite
+    connections must not be shared across processes.
+
+    Arguments
+    ----------
+    path: Path to the database.
+    """
+    key = (os.getpid(), os.path.abspath(path))
+
+    with _connections_lock:
+        if key not in _connections:
+            conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            _connections[key] = conn, threading.Lock()
+
+    return _connections[key]
+
+
+class AccountStore:
+    """Class which stores player accounts and their ledgers in SQLite.
+
+    Reads are served directly while writes are queued and committed in
+    batches by a background thread. Any read first waits for the queued
+    writes so that it always sees them.
+
+    Attributes
+    ----------
+    path: str
+        Path to the database.
+
+    batch_size: int
+        Maximum number of writes committed in a single transaction.
+
+    Methods
+    ----------
+    load(name: str) -> Optional[Tuple[Decimal, int]]:
+        Returns the bankroll and the number of rounds of a player.
+
+    create(name: str, bankroll: float) -> None:
+        Creates a new player.
+
+    record(name: str, round_no: int, kind: str, amount: float) -> None:
+        Queues an entry of the ledger of a player.
+
+    ledger(name: str, round_no: int = None) -> List[Tuple[int, str, Decimal]]:
+        Returns the ledger of a player.
+
+    flush() -> None:
+        Waits until all queued writes have been committed.
+
+    close() -> None:
+        Commits all queued writes and stops the background thread.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000) -> None:
+        """
+        Arguments
+        ----------
+        path: Path to the database. It is created if it does not exist.
+
+        batch_size: Maximum number of writes committed in a single
+        transaction. Defaults to 1000.
+        """
+        self.path = path
+        self.batch_size = batch_size
+
+        self._conn, self._lock = _connect(path)
+        self._queue: queue.Queue = queue.Queue()
+        self._error: Optional[Exception] = None
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def __enter__(self) -> AccountStore:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def load(self, name: str) -> Optional[Tuple[Decimal, int]]:
+        """Method which returns the account of a player.
+
+        Arguments
+        ----------
+        name: Name of the player.
+
+        Returns
+        ----------
+        A two-tuple with the bankroll and the number of rounds played
+        by the player. None when there is no such player.
+        """
+        self.flush()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT bankroll, rounds FROM players WHERE name = ?", (name,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return from_cents(row[0]), row[1]
+
+    def create(self, name: str, bankroll: float) -> None:
+        """Method which creates a new player.
+
+        Arguments
+        ----------
+        name: Name of the player.
+
+        bankroll: Amount of money the player starts with.
+        """
+        self._queue.put(("create", name, to_cents(bankroll)))
+
+    def record(self, name: str, round_no: int, kind: str, amount: float) -> None:
+        """Method which queues an entry of the ledger of a player.
+
+        The bankroll of the player is updated by the same transaction as the
+        entry. Bets are deducted from the bankroll and payouts are added to it.
+
+        Arguments
+        ----------
+        name: Name of the player.
+
+        round_no: Round the entry belongs to.
+
+        kind: Kind of the entry, either "bet" or "pay".
+
+        amount: Amount of money bet or paid.
+
+        Raises
+        ----------
+        ValueError, when kind is not "bet" or "pay".
+        """
+        if kind not in ("bet", "pay"):
+            raise ValueError('kind can only be "bet" or "pay".')
+
+        cents = to_cents(amount)
+        self._queue.put(("record", name, round_no, kind, cents, time.time()))
+
+    def ledger(self, name: str, round_no: int = None) -> List[Tuple[int, str, Decimal]]:
+        """Method which returns the ledger of a player.
+
+        Arguments
+        ----------
+        name: Name of the player.
+
+        round_no: When given, only the entries of this round are returned.
+        Defaults to None.
+
+        Returns
+        ----------
+        list, three-tuples with the round, the kind and the amount of each entry
+        in the order they were recorded.
+        """
+        self.flush()
+
+        query = "SELECT round, kind, amount FROM ledger WHERE player = ?"
+        params: tuple = (name,)
+
+        if round_no is not None:
+            query += " AND round = ?"
+            params += (round_no,)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+
+        return [(r, kind, from_cents(amount)) for r, kind, amount in rows]
+
+    def flush(self) -> None:
+        """Method which waits until all queued writes have been committed.
+
+        Raises
+        ----------
+        Exception, the error raised by the background thread when a batch
+        could not be committed since the last flush.
+
+        RuntimeError, when the background thread has stopped with writes
+        still queued.
+        """
+        done = self._queue.all_tasks_done
+
+        with done:
+            # Polled so a writer thread which died does not block forever
+            while self._queue.unfinished_tasks and self._writer.is_alive():
+                done.wait(timeout=0.1)
+
+            pending = self._queue.unfinished_tasks
+
+        if (error := self._error) is not None:
+            self._error = None
+            raise error
+
+        if pending:
+            raise RuntimeError(
+                f"The writer thread has stopped with {pending} writes still queued."
+            )
+
+    def close(self) -> None:
+        """Method which commits all queued writes and stops the background thread.
+
+        The connection stays open since it is shared by the process.
+
+        Raises
+        ----------
+        Exception, the error raised by the background thread when a batch
+        could not be committed since the last flush.
+        """
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+        if (error := self._error) is not None:
+            self._error = None
+            raise error
+
+    def _write_loop(self) -> None:
+        """Method run by the background thread to commit queued writes."""
+        while True:
+            batch = [self._queue.get()]
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+
+            try:
+                self._commit([item for item in batch if item is not _STOP])
+            except Exception as e:
+                # Surfaced by the next call to flush()
+                self._error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _commit(self, batch: List[tuple]) -> None:
+        """Method which commits a batch of writes in a single transaction.
+
+        Arguments
+        ----------
+        batch: Queued writes, in the order they were queued.
+        """
+        if not batch:
+            return
+
+        players, entries, deltas = [], [], {}
+        rounds: Dict[str, int] = {}
+
+        for item in batch:
+            if item[0] == "create":
+                players.append(item[1:])
+                continue
+
+            _, name, round_no, kind, cents, created = item
+            entries.append((name, round_no, kind, cents, created))
+            deltas[name] = deltas.get(name, 0) + (cents if kind == "pay" else -cents)
+            rounds[name] = max(rounds.get(name, 0), round_no)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO players (name, bankroll) VALUES (?, ?)", players
+            )
+            self._conn.executemany(
+                "INSERT INTO ledger (player, round, kind, amount, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                entries,
+            )
+            self._conn.executemany(
+                "UPDATE players SET bankroll = bankroll + ?, rounds = MAX(rounds, ?) "
+                "WHERE name = ?",
+                [(delta, rounds[name], name) for name, delta in deltas.items()],
+            )
@@ -0,0 +1,237 @@
+"""
+Module which implements a tournament between policies.
+
+Every policy plays the same number of rounds over the same sequence of
+shoes: the rounds are split into chunks, each chunk being played with its
+own seed, and every policy plays every chunk. Chunks are played in
+parallel processes, so policies must be picklable.
+
+Run it from the command line to pit the built-in policies against each other:
+
+    $ python -m blackjack.tournament --rounds 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from rich.table import Table
+
+from .console import console
+from .counting import HI_LO, CountingSystem
+from .deck import Deck
+from .policy import AlwaysStand, BasicStrategy, DealerMimic, Policy, RandomPolicy
+from .rules import Rules
+from .simulation import Simulator
+
+
+class Standing(NamedTuple):
+    """Class to represent the result of a policy in a tournament.
+
+    Attributes
+    ----------
+    name: str
+        Name of the policy.
+
+    rounds: int
+        Number of rounds played.
+
+    ev: float
+        Mean net result per round, in units.
+
+    variance: float
+        Variance of the net result per round.
+
+    stderr: float
+        Standard error of ev.
+
+    latency: float
+        Mean time (in microseconds) taken by the policy to make a move.
+    """
+
+    name: str
+    rounds: int
+    ev: float
+    variance: float
+    stderr: float
+    latency: float
+
+
+# Number of rounds, sum and sum of squares of the results, time spent
+# deciding and number of decisions
+_ChunkResult = Tuple[int, float, float, float, int]
+
+
+def _play_chunk(
+    policy: Policy, rules: Rules, system: CountingSystem, seed: int, n_rounds: int
+) -> _ChunkResult:
+    """Function which plays a chunk of rounds with a policy."""
+    # The policy is pickled into every worker with the same state
+    policy.reseed(seed)
+    simulator = Simulator(rules=rules, system=system, seed=seed, policy=policy)
+    total, total_sq = 0.0, 0.0
+
+    for _ in range(n_rounds):
+        result = simulator.play_round()
+        total += result
+        total_sq += result * result
+
+    return n_rounds, total, total_sq, simulator.decision_time, simulator.n_decisions
+
+
+class Tournament:
+    """Class which runs a tournament between policies.
+
+    Attributes
+    ----------
+    policies: dict
+        Mapping between unique names and the competing policies.
+
+    rules: Rules
+        Rules the rounds are played under.
+
+    rounds: int
+        Number of rounds each policy plays.
+
+    Methods
+    ----------
+    run(workers: int = None) -> List[Standing]:
+        Runs the tournament and returns the leaderboard.
+    """
+
+    def __init__(
+        self,
+        policies: Sequence[Policy],
+        rules: Rules = Rules(),
+        system: CountingSystem = HI_LO,
+        rounds: int = 100_000,
+        chunk_size: int = 10_000,
+        seed: int = 0,
+    ) -> None:
+        """
+        Arguments
+        ----------
+        policies: Competing policies. Policies sharing a name get a numeric
+        suffix in the leaderboard.
+
+        rules: Rules the rounds are played under. Defaults to Rules().
+
+        system: Counting system used to compute the true count given to
+        the policies. Defaults to HI_LO.
+
+        rounds: Number of rounds each policy plays. Defaults to 100,000.
+
+        chunk_size: Number of rounds played with the same seed in a single
+        process. Defaults to 10,000.
+
+        seed: Seed from which the seeds of the chunks are derived. Defaults to 0.
+        """
+        self.policies: Dict[str, Policy] = {}
+
+        for policy in policies:
+            name, n = policy.name, 1
+            while name in self.policies:
+                n += 1
+                name = f"{policy.name}#{n}"
+            self.policies[name] = policy
+
+        self.rules = rules
+        self.system = system
+        self.rounds = rounds
+
+        n_chunks = math.ceil(rounds / chunk_size)
+        self._chunks = [
+            (seed * 1_000_003 + idx, min(chunk_size, rounds - idx * chunk_size))
+            for idx in range(n_chunks)
+        ]
+
+    def run(self, workers: int = None) -> List[Standing]:
+        """Method which runs the tournament.
+
+        Arguments
+        ----------
+        workers: Number of processes to play the rounds in. When None, the
+        number of CPUs is used. Defaults to None.
+
+        Returns
+        ----------
+        list, the standings of the policies, from the highest to the lowest EV.
+        """
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            rules, system = self.rules, self.system
+            futures = [
+                (name, executor.submit(_play_chunk, policy, rules, system, seed, n))
+                for name, policy in self.policies.items()
+                for seed, n in self._chunks
+            ]
+            totals = {name: [0, 0.0, 0.0, 0.0, 0] for name in self.policies}
+
+            for name, future in futures:
+                for idx, value in enumerate(future.result()):
+                    totals[name][idx] += value
+
+        standings = []
+
+        for name, (n, total, total_sq, decision_time, n_decisions) in totals.items():
+            ev = total / n
+            variance = max(total_sq / n - ev * ev, 0.0)
+            latency = decision_time / n_decisions * 1e6 if n_decisions else 0.0
+            standings.append(
+                Standing(name, n, ev, variance, math.sqrt(variance / n), latency)
+            )
+
+        return sorted(standings, key=lambda standing: standing.ev, reverse=True)
+
+
+def leaderboard(standings: List[Standing]) -> Table:
+    """Function which creates a table showing the standings of a tournament.
+
+    Arguments
+    ----------
+    standings: Standings returned by Tournament.run().
+    """
+    table = Table(title="Leaderboard")
+
+    table.add_column("#", justify="right")
+    table.add_column("Policy")
+    for title in ("Rounds", "EV / round", "Std. error", "Variance", "Latency (µs)"):
+        table.add_column(title, justify="right")
+
+    for rank, s in enumerate(standings, start=1):
+        table.add_row(
+            str(rank),
+            s.name,
+            f"{s.rounds:,}",
+            f"{s.ev:+.4f}",
+            f"{s.stderr:.4f}",
+            f"{s.variance:.4f}",
+            f"{s.latency:.2f}",
+        )
+
+    return table
+
+
+def main() -> None:
+    """Function which runs a tournament between the built-in policies."""
+    parser = argparse.ArgumentParser(description="Pit the built-in policies.")
+    parser.add_argument("--rounds", type=int, default=100_000)
+    parser.add_argument("--decks", type=int, default=1, choices=Deck.multipliers)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    tournament = Tournament(
+        [BasicStrategy(), DealerMimic(), AlwaysStand(), RandomPolicy(seed=args.seed)],
+        rules=Rules(decks=args.decks),
+        rounds=args.rounds,
+        seed=args.seed,
+    )
+    console.print(leaderboard(tournament.run(workers=args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import argparse
+
 from rich.prompt import Confirm
 
 from blackjack.console import console
 from blackjack import Game
 from blackjack.player import Player
+from blackjack.shuffles import MODELS
+from blackjack.sidebets import PerfectPairs, TwentyOnePlusThree
+from blackjack.store import AccountStore
 
 
 def welcome() -> str:
@@ -19,37 +24,163 @@ def welcome() -> str:
     """
 
 
-def main() -> None:
+def positive_float(value: str) -> float:
+    """Function which parses a command-line argument as a float greater than 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a number")
+
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"{value!r} is not greater than 0")
+    return number
+
+
+def parse_args() -> argparse.Namespace:
+    """Function which parses the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Play a game of Blackjack.")
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="update the game in-place instead of reprinting it, "
+        "which writes much less to the terminal on slow links",
+    )
+    parser.add_argument(
+        "--max-fps",
+        type=positive_float,
+        default=4.0,
+        help="maximum number of redraws per second in live mode (default: 4)",
+    )
+    parser.add_argument(
+        "--db",
+        help="SQLite database where player accounts are saved, "
+        "so that bankrolls carry over between sessions",
+    )
+    parser.add_argument(
+        "--perfect-pairs",
+        type=float,
+        default=0.0,
+        metavar="AMOUNT",
+        help="amount placed on the Perfect Pairs side bet every round",
+    )
+    parser.add_argument(
+        "--21+3",
+        dest="twenty_one_plus_three",
+        type=float,
+        default=0.0,
+        metavar="AMOUNT",
+        help="amount placed on the 21+3 side bet every round",
+    )
+    parser.add_argument(
+        "--shuffle",
+        choices=list(MODELS),
+        help="shuffle the shoe like this model when it runs out, "
+        "instead of shuffling it uniformly every round",
+    )
+    return parser.parse_args()
+
+
+def main(
+    live: bool = False,
+    max_fps: float = 4.0,
+    db: str = None,
+    perfect_pairs: float = 0.0,
+    twenty_one_plus_three: float = 0.0,
+    shuffle: str = None,
+) -> None:
+    """Function which runs the game until the player stops playing.
+
+    Arguments
+    ----------
+    live: Indicates whether the game should be updated in-place.
+    Defaults to False.
+
+    max_fps: Maximum number of redraws per second in live mode. Defaults to 4.
+
+    db: Path to the SQLite database where player accounts are saved.
+    When None, nothing is saved. Defaults to None.
+
+    perfect_pairs: Amount placed on the Perfect Pairs side bet every round.
+    Defaults to 0, in which case it is not offered.
+
+    twenty_one_plus_three: Amount placed on the 21+3 side bet every round.
+    Defaults to 0, in which case it is not offered.
+
+    shuffle: Name of the shuffle model of the deck (see shuffles.MODELS).
+    When None, the deck is shuffled uniformly every round. Defaults to None.
+    """
     console.rule("[bold red]Blackjack by Malay Agarwal[/bold red]")
+    store = AccountStore(db) if db is not None else None
     try:
         console.print(welcome())
 
-        player = Player.from_input()
+        player = Player.from_input(store=store)
 
         input("Press ENTER to start playing.")
         console.clear()
 
-        game = Game(player)
+        side_bets = {
+            side_bet: amount
+            for side_bet, amount in (
+                (PerfectPairs(), perfect_pairs),
+                (TwentyOnePlusThree(), twenty_one_plus_three),
+            )
+            if amount > 0
+        }
+        game = Game(
+            player,
+            live=live,
+            max_fps=max_fps,
+            side_bets=side_bets,
+            shuffle_model=MODELS[shuffle] if shuffle is not None else None,
+        )
+        view = game.view
+
+        if view is not None:
+            view.start()
 
         n_round = 1
 
         while True:
-            console.rule("[bold red]Blackjack by Malay Agarwal[/bold red]")
-            console.rule(f"[bold blue]Round {n_round}[/bold blue]")
+            if view is None:
+                console.rule("[bold red]Blackjack by Malay Agarwal[/bold red]")
+                console.rule(f"[bold blue]Round {n_round}[/bold blue]")
+            else:
+                view.title = f"Blackjack by Malay Agarwal - Round {n_round}"
+
             game.play()
 
+            if view is not None:
+                view.prompt()
+
             next_round = Confirm.ask("Play another round?")
             if not next_round:
                 break
 
             game.reset()
-            console.clear()
+            if view is None:
+                console.clear()
             n_round += 1
 
+        if view is not None:
+            view.stop()
+
     except KeyboardInterrupt:
         print("\nExiting...")
         exit()
 
+    finally:
+        if store is not None:
+            store.close()
+
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(
+        live=args.live,
+        max_fps=args.max_fps,
+        db=args.db,
+        perfect_pairs=args.perfect_pairs,
+        twenty_one_plus_three=args.twenty_one_plus_three,
+        shuffle=args.shuffle,
+    )